@@ -3,13 +3,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.services.auth_service import decode_token
-from app.repositories.user_repo import UserRepository
+from app.services.auth_service import access_token_subject, decode_token
+from app.services.principal_cache import get_principal
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
+oauth2_optional = OAuth2PasswordBearer(tokenUrl="/v1/auth/login", auto_error=False)
 
-async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
+    """Solo valida el JWT y retorna `sub`; no toca la DB ni el cache."""
     try:
         payload = decode_token(token)
         if payload.get("typ") != "access":
@@ -19,9 +21,20 @@ async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depe
             raise ValueError("missing sub")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    return str(user_id)
 
-    repo = UserRepository(db)
-    user = await repo.get(user_id)
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), user_id: str = Depends(get_current_user_id)
+) -> User:
+    # La sesión es perezosa: con hit en cache no se abre conexión.
+    user = await get_principal(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
+
+async def get_optional_user(
+    db: AsyncSession = Depends(get_db), token: str | None = Depends(oauth2_optional)
+) -> User | None:
+    """Principal si viene un access token válido; None para clientes sin sesión (o con token vencido)."""
+    user_id = access_token_subject(token)
+    return await get_principal(db, user_id) if user_id else None
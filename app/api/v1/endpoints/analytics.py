@@ -1,10 +1,17 @@
 from __future__ import annotations
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, datetime, timezone
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from redis.exceptions import RedisError
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.deps import get_db
+from app.api.deps import get_current_user, get_db
+from app.db.session import AsyncSessionLocal
+from app.repositories.events_repo import EventRepository
 from app.services.analytics import AnalyticsService
+from app.services.analytics_cache import cached_analytics
+from app.services import live_counters
+from app.utils.export import ExportFormat, export_response
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -19,6 +26,14 @@ def _range(start: str | None, end: str | None) -> tuple[datetime, datetime]:
         raise HTTPException(status_code=400, detail="Query params 'start' and 'end' are required (ISO).")
     return _parse_iso(start), _parse_iso(end)
 
+def _export(name: str, fmt: ExportFormat, row_model: type[BaseModel], start: datetime, end: datetime, **kw):
+    """Variante en streaming (ndjson/csv/arrow) con su propia sesión: vive lo que dure la respuesta."""
+    async def batches():
+        async with AsyncSessionLocal() as db:
+            async for batch in AnalyticsService(db).stream_bq(name, start=start, end=end, **kw):
+                yield batch
+    return export_response(fmt, list(row_model.model_fields), batches(), filename=name)
+
 # ---------- 1.x ----------
 class BQ11Row(BaseModel):
     day: str
@@ -26,10 +41,18 @@ class BQ11Row(BaseModel):
     count: int
 
 @router.get("/bq/1_1", response_model=list[BQ11Row])
-async def bq_1_1(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_1_1")
+async def bq_1_1(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_1_1", fmt, BQ11Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_1_1_listings_per_day_by_category(start=s_dt, end=e_dt)
-    return [BQ11Row(day=str(r[0]), category_id=r[1], count=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "category_id": r[1], "count": int(r[2])} for r in rows]
 
 class BQ12Row(BaseModel):
     step: str
@@ -38,10 +61,18 @@ class BQ12Row(BaseModel):
     pct_cancelled: float
 
 @router.get("/bq/1_2", response_model=list[BQ12Row])
-async def bq_1_2(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_1_2")
+async def bq_1_2(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_1_2", fmt, BQ12Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_1_2_escrow_cancel_rate(start=s_dt, end=e_dt)
-    return [BQ12Row(step=r[0], total=int(r[1]), cancelled=int(r[2]), pct_cancelled=float(r[3])) for r in rows]
+    return [{"step": r[0], "total": int(r[1]), "cancelled": int(r[2]), "pct_cancelled": float(r[3])} for r in rows]
 
 # ---------- 2.x ----------
 class BQ21Row(BaseModel):
@@ -50,10 +81,18 @@ class BQ21Row(BaseModel):
     count: int
 
 @router.get("/bq/2_1", response_model=list[BQ21Row])
-async def bq_2_1(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_2_1")
+async def bq_2_1(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_2_1", fmt, BQ21Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_2_1_events_per_type_by_day(start=s_dt, end=e_dt)
-    return [BQ21Row(day=str(r[0]), event_type=r[1], count=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "event_type": r[1], "count": int(r[2])} for r in rows]
 
 class BQ22Row(BaseModel):
     day: str
@@ -61,10 +100,18 @@ class BQ22Row(BaseModel):
     count: int
 
 @router.get("/bq/2_2", response_model=list[BQ22Row])
-async def bq_2_2(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_2_2")
+async def bq_2_2(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_2_2", fmt, BQ22Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_2_2_clicks_by_button_by_day(start=s_dt, end=e_dt)
-    return [BQ22Row(day=str(r[0]), button=r[1], count=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "button": r[1], "count": int(r[2])} for r in rows]
 
 class BQ24Row(BaseModel):
     screen: str | None
@@ -73,18 +120,19 @@ class BQ24Row(BaseModel):
     avg_seconds: int
 
 @router.get("/bq/2_4", response_model=list[BQ24Row])
+@cached_analytics("bq_2_4")
 async def bq_2_4(
     start: str = Query(..., description="ISO 8601 e.g. 2025-10-14T00:00:00Z"),
     end:   str = Query(..., description="ISO 8601 e.g. 2025-10-15T00:00:00Z"),
     max_idle_sec: int = Query(300, ge=30, le=3600, description="Cap para intervalos sin siguiente pantalla"),
+    fmt: ExportFormat = Query("json", alias="format"),
     db: AsyncSession = Depends(get_db),
 ):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_2_4", fmt, BQ24Row, s_dt, e_dt, max_idle_sec=max_idle_sec)
     rows = await AnalyticsService(db).bq_2_4_time_by_screen(start=s_dt, end=e_dt, max_idle_sec=max_idle_sec)
-    return [
-        BQ24Row(screen=r[0], total_seconds=int(r[1]), views=int(r[2]), avg_seconds=int(r[3]))
-        for r in rows
-    ]
+    return [{"screen": r[0], "total_seconds": int(r[1]), "views": int(r[2]), "avg_seconds": int(r[3])} for r in rows]
 
 # ---------- 3.x ----------
 class BQ31Row(BaseModel):
@@ -92,20 +140,36 @@ class BQ31Row(BaseModel):
     dau: int
 
 @router.get("/bq/3_1", response_model=list[BQ31Row])
-async def bq_3_1(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_3_1")
+async def bq_3_1(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_3_1", fmt, BQ31Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_3_1_dau(start=s_dt, end=e_dt)
-    return [BQ31Row(day=str(r[0]), dau=int(r[1])) for r in rows]
+    return [{"day": str(r[0]), "dau": int(r[1])} for r in rows]
 
 class BQ32Row(BaseModel):
     day: str
     sessions: int
 
 @router.get("/bq/3_2", response_model=list[BQ32Row])
-async def bq_3_2(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_3_2")
+async def bq_3_2(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_3_2", fmt, BQ32Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_3_2_sessions_by_day(start=s_dt, end=e_dt)
-    return [BQ32Row(day=str(r[0]), sessions=int(r[1])) for r in rows]
+    return [{"day": str(r[0]), "sessions": int(r[1])} for r in rows]
 
 # ---------- 4.x ----------
 class BQ41Row(BaseModel):
@@ -114,10 +178,18 @@ class BQ41Row(BaseModel):
     count: int
 
 @router.get("/bq/4_1", response_model=list[BQ41Row])
-async def bq_4_1(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_4_1")
+async def bq_4_1(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_4_1", fmt, BQ41Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_4_1_orders_by_status_by_day(start=s_dt, end=e_dt)
-    return [BQ41Row(day=str(r[0]), status=r[1], count=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "status": r[1], "count": int(r[2])} for r in rows]
 
 class BQ42Row(BaseModel):
     day: str
@@ -125,10 +197,18 @@ class BQ42Row(BaseModel):
     orders_paid: int
 
 @router.get("/bq/4_2", response_model=list[BQ42Row])
-async def bq_4_2(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_4_2")
+async def bq_4_2(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_4_2", fmt, BQ42Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_4_2_gmv_by_day(start=s_dt, end=e_dt)
-    return [BQ42Row(day=str(r[0]), gmv_cents=int(r[1]), orders_paid=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "gmv_cents": int(r[1]), "orders_paid": int(r[2])} for r in rows]
 
 # ---------- 5.x ----------
 class BQ51Row(BaseModel):
@@ -137,7 +217,133 @@ class BQ51Row(BaseModel):
     count: int
 
 @router.get("/bq/5_1", response_model=list[BQ51Row])
-async def bq_5_1(start: str = Query(...), end: str = Query(...), db: AsyncSession = Depends(get_db)):
+@cached_analytics("bq_5_1")
+async def bq_5_1(
+    start: str = Query(...),
+    end: str = Query(...),
+    fmt: ExportFormat = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
     s_dt, e_dt = _range(start, end)
+    if fmt != "json":
+        return _export("bq_5_1", fmt, BQ51Row, s_dt, e_dt)
     rows = await AnalyticsService(db).bq_5_1_quick_view_by_category_by_day(start=s_dt, end=e_dt)
-    return [BQ51Row(day=str(r[0]), category_id=r[1], count=int(r[2])) for r in rows]
+    return [{"day": str(r[0]), "category_id": r[1], "count": int(r[2])} for r in rows]
+
+# ---------- Dashboard ----------
+class DashboardOut(BaseModel):
+    bq_1_1: list[BQ11Row]
+    bq_1_2: list[BQ12Row]
+    bq_2_1: list[BQ21Row]
+    bq_2_2: list[BQ22Row]
+    bq_2_4: list[BQ24Row]
+    bq_3_1: list[BQ31Row]
+    bq_3_2: list[BQ32Row]
+    bq_4_1: list[BQ41Row]
+    bq_4_2: list[BQ42Row]
+    bq_5_1: list[BQ51Row]
+
+@router.get("/dashboard", response_model=DashboardOut)
+@cached_analytics("dashboard")
+async def dashboard(
+    start: str = Query(...),
+    end: str = Query(...),
+    max_idle_sec: int = Query(300, ge=30, le=3600),
+    db: AsyncSession = Depends(get_db),
+):
+    s_dt, e_dt = _range(start, end)
+    d = await AnalyticsService(db).dashboard(start=s_dt, end=e_dt, max_idle_sec=max_idle_sec)
+    return dict(
+        bq_1_1=[{"day": str(r[0]), "category_id": r[1], "count": int(r[2])} for r in d["bq_1_1"]],
+        bq_1_2=[{"step": r[0], "total": int(r[1]), "cancelled": int(r[2]), "pct_cancelled": float(r[3])} for r in d["bq_1_2"]],
+        bq_2_1=[{"day": str(r[0]), "event_type": r[1], "count": int(r[2])} for r in d["bq_2_1"]],
+        bq_2_2=[{"day": str(r[0]), "button": r[1], "count": int(r[2])} for r in d["bq_2_2"]],
+        bq_2_4=[{"screen": r[0], "total_seconds": int(r[1]), "views": int(r[2]), "avg_seconds": int(r[3])} for r in d["bq_2_4"]],
+        bq_3_1=[{"day": str(r[0]), "dau": int(r[1])} for r in d["bq_3_1"]],
+        bq_3_2=[{"day": str(r[0]), "sessions": int(r[1])} for r in d["bq_3_2"]],
+        bq_4_1=[{"day": str(r[0]), "status": r[1], "count": int(r[2])} for r in d["bq_4_1"]],
+        bq_4_2=[{"day": str(r[0]), "gmv_cents": int(r[1]), "orders_paid": int(r[2])} for r in d["bq_4_2"]],
+        bq_5_1=[{"day": str(r[0]), "category_id": r[1], "count": int(r[2])} for r in d["bq_5_1"]],
+    )
+
+# ---------- Usuarios / sesiones activos ----------
+class ActiveRow(BaseModel):
+    period_start: str
+    period_end: str
+    count: int
+    approx: bool
+
+@router.get("/active", response_model=list[ActiveRow])
+async def active(
+    request: Request,
+    start: date = Query(..., description="Día inicial (YYYY-MM-DD, UTC)"),
+    end: date = Query(..., description="Día final exclusivo (YYYY-MM-DD, UTC)"),
+    window: Literal["day", "week", "month"] = Query("day", description="day=DAU, week=WAU, month=MAU"),
+    metric: Literal["users", "sessions"] = Query("users"),
+    exact: bool = Query(False, description="COUNT(DISTINCT) sobre eventos en vez de HyperLogLog"),
+    db: AsyncSession = Depends(get_db),
+):
+    if end <= start or (end - start).days > 400:
+        raise HTTPException(status_code=400, detail="Range must be between 1 and 400 days")
+    rows = await AnalyticsService(db).active(
+        request.app.state.redis, metric=metric, window=window, start=start, end=end, exact=exact,
+    )
+    return [ActiveRow(period_start=str(s), period_end=str(e), count=n, approx=a) for s, e, n, a in rows]
+
+# ---------- Contadores en vivo (Redis) ----------
+class LiveBucket(BaseModel):
+    bucket_start: str
+    event_types: dict[str, int]
+    clicks: dict[str, int]
+    listings_by_category: dict[str, int]
+    orders_by_status: dict[str, int]
+
+class LiveOut(BaseModel):
+    resolution: Literal["minute", "hour"]
+    buckets: list[LiveBucket]
+    totals: LiveBucket
+
+@router.get("/live", response_model=LiveOut)
+async def live(
+    request: Request,
+    resolution: Literal["minute", "hour"] = Query("minute"),
+    last: int = Query(60, ge=1, description="Buckets a devolver, incluido el actual"),
+):
+    """Últimos N minutos/horas desde los contadores de Redis actualizados en la ingesta (sin tocar Postgres)."""
+    if last > live_counters.retention(resolution):
+        raise HTTPException(status_code=400, detail=f"'last' must be <= {live_counters.retention(resolution)} for {resolution}")
+    try:
+        rows = await live_counters.read(request.app.state.redis, res=resolution, last=last)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Live counters unavailable")
+
+    totals: dict[str, dict[str, int]] = {g: {} for g in live_counters.GROUPS.values()}
+    buckets = []
+    for start, groups in rows:
+        for g, counts in groups.items():
+            for k, n in counts.items():
+                totals[g][k] = totals[g].get(k, 0) + n
+        buckets.append(LiveBucket(bucket_start=datetime.fromtimestamp(start, timezone.utc).isoformat(), **groups))
+    return LiveOut(
+        resolution=resolution,
+        buckets=buckets,
+        totals=LiveBucket(bucket_start=buckets[0].bucket_start, **totals),
+    )
+
+# ---------- Export de eventos crudos ----------
+@router.get("/events/export")
+async def export_events(
+    start: str = Query(...),
+    end: str = Query(...),
+    event_type: str | None = Query(None, max_length=80),
+    fmt: Literal["ndjson", "csv", "arrow"] = Query("ndjson", alias="format"),
+    current=Depends(get_current_user),
+):
+    """Eventos del rango en streaming (cursor de servidor) para análisis offline."""
+    s_dt, e_dt = _range(start, end)
+
+    async def batches():
+        async with AsyncSessionLocal() as db:
+            async for batch in EventRepository(db).stream_events(start=s_dt, end=e_dt, event_type=event_type):
+                yield batch
+    return export_response(fmt, EventRepository.EXPORT_COLUMNS, batches(), filename="events")
@@ -7,6 +7,7 @@ from app.schemas.auth import RegisterIn, LoginIn, TokenPair, RefreshIn
 from app.schemas.user import UserOut
 from app.services.auth_service import authenticate_user, make_token_pair, register_user, decode_token
 from app.api.deps import get_current_user
+from app.services.principal_cache import invalidate_principal
 from app.models.user import User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -27,6 +28,7 @@ async def login(data: LoginIn, db: AsyncSession = Depends(get_db)):
     tokens = make_token_pair(user)
     user.last_login_at = datetime.now(timezone.utc)
     await db.commit()
+    await invalidate_principal(user.id)
     return tokens
 
 @router.post("/refresh", response_model=TokenPair)
@@ -2,7 +2,9 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_user
+from app.core.conditional import conditional
 from app.db.session import get_db
+from app.services.http_cache import catalog_entity_validator
 from app.repositories.brand_repo import BrandRepository
 from app.schemas.brand import BrandCreate, BrandOut
 
@@ -16,6 +18,7 @@ async def create_brand(data: BrandCreate, db: AsyncSession = Depends(get_db), cu
     return BrandOut.model_validate(obj)
 
 @router.get("", response_model=list[BrandOut])
+@conditional(catalog_entity_validator("brand"), auth=True)
 async def list_brands(category_id: str | None = None, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
     repo = BrandRepository(db)
     if category_id:
@@ -2,7 +2,9 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_user
+from app.core.conditional import conditional
 from app.db.session import get_db
+from app.services.http_cache import catalog_entity_validator
 from app.repositories.category_repo import CategoryRepository
 from app.schemas.category import CategoryCreate, CategoryOut
 
@@ -16,6 +18,7 @@ async def create_category(data: CategoryCreate, db: AsyncSession = Depends(get_d
     return CategoryOut.model_validate(obj)
 
 @router.get("", response_model=list[CategoryOut])
+@conditional(catalog_entity_validator("category"), auth=True)
 async def list_categories(db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
     repo = CategoryRepository(db)
     items = await repo.list(order_by=[])
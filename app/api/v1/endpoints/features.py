@@ -3,21 +3,30 @@ from fastapi import APIRouter, Depends, status
 from app.schemas.feature import FeatureUseIn
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user_id, get_optional_user
+from app.models.user import User
+from app.core.conditional import conditional
+from app.services.http_cache import flags_validator
 from app.services.feature_service import get_feature_flags, register_feature_use
 
 router = APIRouter(prefix="/features", tags=["features"])
 
 @router.get("", response_model=dict[str, bool])
-async def list_flags(db: AsyncSession = Depends(get_db)):
-    return await get_feature_flags(db)
+@conditional(flags_validator)
+async def list_flags(
+    db: AsyncSession = Depends(get_db),
+    user: User | None = Depends(get_optional_user),
+):
+    """Público: sin token solo aplican las reglas global; con token, también las del usuario y su campus."""
+    if user is None:
+        return await get_feature_flags(db)
+    return await get_feature_flags(db, user_id=user.id, campus=user.campus)
 
 @router.post("/use", status_code=status.HTTP_202_ACCEPTED)
 async def feature_used(
     payload: FeatureUseIn,
     db: AsyncSession = Depends(get_db),
-    user=Depends(get_current_user),  
+    user_id: str = Depends(get_current_user_id),
 ):
-    await register_feature_use(db, user_id=getattr(user, "id", None), feature_key=payload.feature_key)
-    await db.commit()
+    await register_feature_use(db, user_id=user_id, feature_key=payload.feature_key)
     return {"ok": True}
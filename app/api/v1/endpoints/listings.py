@@ -1,16 +1,19 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Literal
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_id
+from app.core.conditional import conditional
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.repositories.listing_repo import ListingRepository
-from app.repositories.events_repo import EventRepository
-from app.schemas.listing import ListingCreate, ListingUpdate, ListingOut
+from app.schemas.listing import ListingCreate, ListingUpdate, ListingOut, listing_payload
 from app.schemas.common import Page
-from app.services.search_service import search_with_telemetry
+from app.services.search_service import TotalMode, invalidate_listing_totals, search_with_telemetry
+from app.services.event_emitter import emitter
+from app.services.http_cache import listing_validator
 
 router = APIRouter(prefix="/listings", tags=["listings"])
 
@@ -39,15 +42,15 @@ async def create_listing(
         price_suggestion_used=data.price_suggestion_used,
         quick_view_enabled=data.quick_view_enabled,
     )
-    ev = EventRepository(db)
-    await ev.insert_batch([{
+    await db.commit()
+    await invalidate_listing_totals()
+    emitter.emit({
         "event_type":"listing.created",
         "user_id": current.id,
         "session_id": "srv",
         "listing_id": obj.id,
         "properties": {"category_id": obj.category_id, "brand_id": obj.brand_id},
-    }])
-    await db.commit()
+    })
 
     stmt = sa.select(type(obj)).where(type(obj).id == obj.id).options(selectinload(type(obj).photos))
     out = (await db.execute(stmt)).scalars().first()
@@ -65,41 +68,60 @@ async def list_listings(
     radius_km: float | None = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
+    pagination: Literal["page", "cursor"] = Query("page", description="'cursor' para scroll infinito (keyset)"),
+    cursor: str | None = Query(None, description="next_cursor de la página anterior (implica pagination=cursor)"),
+    total_mode: TotalMode | None = Query(None, description="exact|capped|estimate|cached|none (default: LISTING_TOTAL_MODE)"),
     db: AsyncSession = Depends(get_db),
-    current=Depends(get_current_user),
+    user_id: str = Depends(get_current_user_id),
 ):
-    items, total = await search_with_telemetry(
-        db, user_id=current.id, session_id="srv",
-        q=q, category_id=category_id, brand_id=brand_id,
-        min_price=min_price, max_price=max_price,
-        near_lat=near_lat, near_lon=near_lon, radius_km=radius_km,
-        page=page, page_size=page_size,
-    )
+    use_cursor = pagination == "cursor" or cursor is not None
+    try:
+        result = await search_with_telemetry(
+            db, user_id=user_id, session_id="srv",
+            q=q, category_id=category_id, brand_id=brand_id,
+            min_price=min_price, max_price=max_price,
+            near_lat=near_lat, near_lon=near_lon, radius_km=radius_km,
+            page=page, page_size=page_size,
+            use_cursor=use_cursor, cursor=cursor or None,
+            total_mode=total_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = result.items
     ids = [i.id for i in items]
     if ids:
         stmt = sa.select(type(items[0])).where(type(items[0]).id.in_(ids)).options(selectinload(type(items[0]).photos))
-        items = (await db.execute(stmt)).scalars().all()
+        by_id = {o.id: o for o in (await db.execute(stmt)).scalars().all()}
+        items = [by_id[i] for i in ids if i in by_id]
 
-    return Page[ListingOut](
-        items=[ListingOut.model_validate(i) for i in items],
-        total=total, page=page, page_size=page_size, has_next=(page*page_size < total)
-    )
+    # Respuesta directa (sin re-validar contra response_model): ver scripts/bench_serialization.py
+    return FastJSONResponse({
+        "items": [listing_payload(i) for i in items],
+        "total": result.total, "total_approx": result.total_approx,
+        "page": page, "page_size": page_size, "has_next": result.has_next, "next_cursor": result.next_cursor,
+    })
 
 @router.get("/{listing_id}", response_model=ListingOut)
-async def get_listing(listing_id: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+@conditional(listing_validator, auth=True)
+async def get_listing(listing_id: str, db: AsyncSession = Depends(get_db), user_id: str = Depends(get_current_user_id)):
     from app.models.listing import Listing
-    stmt = sa.select(Listing).where(Listing.id == listing_id).options(selectinload(Listing.photos))
+    stmt = (
+        sa.select(Listing)
+        .where(Listing.id == listing_id, Listing.deleted_at.is_(None))
+        .options(selectinload(Listing.photos))
+    )
     obj = (await db.execute(stmt)).scalars().first()
     if not obj:
         raise HTTPException(status_code=404, detail="Listing not found")
-    return ListingOut.model_validate(obj)
+    return FastJSONResponse(listing_payload(obj))
 
 @router.patch("/{listing_id}", response_model=ListingOut)
 async def update_listing(
     listing_id: str, data: ListingUpdate, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)
 ):
     repo = ListingRepository(db)
-    obj = await repo.get(listing_id)
+    obj = await repo.get_live(listing_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Listing not found")
 
@@ -111,6 +133,7 @@ async def update_listing(
 
     obj = await repo.update(obj, **fields)
     await db.commit()
+    await invalidate_listing_totals()
     from app.models.listing import Listing
     stmt = sa.select(Listing).where(Listing.id == listing_id).options(selectinload(Listing.photos))
     obj = (await db.execute(stmt)).scalars().first()
@@ -119,7 +142,9 @@ async def update_listing(
 @router.delete("/{listing_id}", status_code=204)
 async def delete_listing(listing_id: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
     repo = ListingRepository(db)
-    affected = await repo.delete(listing_id)
+    affected = await repo.soft_delete(listing_id)
     await db.commit()
+    if affected:
+        await invalidate_listing_totals()
     if not affected:
         raise HTTPException(status_code=404, detail="Listing not found")
@@ -8,6 +8,8 @@ from app.db.session import get_db
 from app.repositories.listing_repo import ListingRepository
 from app.repositories.order_repo import OrderRepository
 from app.schemas.order import OrderCreate, OrderOut
+from app.models.enums import OrderStatus
+from app.services.live_counters import record_order_status
 from app.services.order_service import pay_order, cancel_order, complete_order
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -43,6 +45,7 @@ async def create_new_order(
     )
     await db.flush()
     await db.commit()
+    await record_order_status(OrderStatus.created)
 
     order_id = str(getattr(created, "id", created)) 
     order_db = await order_repo.get(order_id)
@@ -57,6 +60,7 @@ async def pay(order_id: str, db: AsyncSession = Depends(get_db), current=Depends
     await db.commit()
     if not ok:
         raise HTTPException(status_code=400, detail="Cannot pay order")
+    await record_order_status(OrderStatus.paid)
 
     repo = OrderRepository(db)
     obj = await repo.get_with_relations(order_id) or await repo.get(order_id)
@@ -71,6 +75,7 @@ async def complete(order_id: str, db: AsyncSession = Depends(get_db), current=De
     await db.commit()
     if not ok:
         raise HTTPException(status_code=400, detail="Cannot complete order")
+    await record_order_status(OrderStatus.completed)
 
     repo = OrderRepository(db)
     obj = await repo.get_with_relations(order_id) or await repo.get(order_id)
@@ -85,6 +90,7 @@ async def cancel(order_id: str, db: AsyncSession = Depends(get_db), current=Depe
     await db.commit()
     if not ok:
         raise HTTPException(status_code=400, detail="Cannot cancel order")
+    await record_order_status(OrderStatus.cancelled)
 
     repo = OrderRepository(db)
     obj = await repo.get_with_relations(order_id) or await repo.get(order_id)
@@ -1,17 +1,26 @@
 from __future__ import annotations
+import gzip
 from datetime import datetime
-from fastapi import APIRouter, Depends, Header, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db
-from app.services.sync_service import get_catalog_delta, not_modified
+from app.core.conditional import conditional
+from app.core.config import settings
+from app.services import cache, catalog_snapshot
+from app.services.http_cache import sync_delta_validator
+from app.services.image_service import presign_get
+from app.services.sync_service import get_catalog_delta, resolve_cursor
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 @router.get("/delta", status_code=status.HTTP_200_OK)
+@conditional(sync_delta_validator)
 async def sync_delta(
     response: Response,
-    since: str | None = None,
-    if_none_match: str | None = Header(default=None, convert_underscores=False),
+    cursor: int | None = Query(None, ge=0, description="`cursor` de la respuesta anterior (versión del catálogo)"),
+    since: str | None = Query(None, description="Compatibilidad: ISO8601; preferir `cursor`"),
+    limit: int = Query(500, ge=1, le=2000),
     db: AsyncSession = Depends(get_db),
 ):
     since_dt: datetime | None = None
@@ -21,12 +30,40 @@ async def sync_delta(
         except Exception:
             since_dt = None
 
-    payload, etag, last_modified = await get_catalog_delta(db, since=since_dt, limit=200)
-
-    if not_modified(if_none_match, etag):
-        response.status_code = status.HTTP_304_NOT_MODIFIED
-        return
-
-    response.headers["ETag"] = etag
+    start = await resolve_cursor(db, cursor=cursor, since=since_dt)
+    # ETag / 304: ConditionalRequestMiddleware (sync_delta_validator), antes de llegar aquí
+    payload, last_modified = await get_catalog_delta(db, cursor=start, limit=limit)
     response.headers["Last-Modified"] = last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT")
     return payload
+
+@router.get("/snapshot", status_code=status.HTTP_200_OK)
+async def sync_snapshot(
+    request: Request,
+    redirect: bool = Query(False, description="307 a una URL prefirmada de S3 (si SYNC_SNAPSHOT_TO_S3)"),
+):
+    """
+    Catálogo completo precomputado para el arranque en frío, sin tocar Postgres: bytes ya comprimidos
+    desde Redis (o redirect a S3). Luego seguir con /sync/delta?cursor=<X-Catalog-Version>.
+    """
+    redis = await cache.client()
+    version = await catalog_snapshot.latest(redis)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Catalog snapshot not built yet; use /sync/delta?cursor=0")
+
+    etag = f'"catalog-{version}"'
+    headers = {"ETag": etag, "X-Catalog-Version": str(version), "Vary": "Accept-Encoding"}
+    inm = request.headers.get("if-none-match")
+    if inm and etag in {t.strip().removeprefix("W/") for t in inm.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding = catalog_snapshot.pick_encoding(request.headers.get("accept-encoding"))
+    if redirect and settings.sync_snapshot_to_s3:
+        url = presign_get(catalog_snapshot.s3_key(version, encoding or "gzip"))
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
+
+    body = await catalog_snapshot.load(redis, version, encoding or "gzip")
+    if body is None:
+        raise HTTPException(status_code=404, detail="Catalog snapshot expired; use /sync/delta?cursor=0")
+    if encoding is None:  # cliente sin gzip/zstd: descomprimir aquí
+        return Response(gzip.decompress(body), media_type="application/json", headers=headers)
+    return Response(body, media_type="application/json", headers={**headers, "Content-Encoding": encoding})
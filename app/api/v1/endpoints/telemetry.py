@@ -1,25 +1,40 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_id
 from app.schemas.telemetry import TelemetryBatchIn
-from app.services.telemetry_sink import ingest_batch
+from app.services.telemetry_sink import TelemetryBackpressure, enqueue_batch, ingest_batch
 
 router = APIRouter(prefix="/events", tags=["telemetry"])
+log = logging.getLogger(__name__)
 
 @router.post("", status_code=202)
 async def ingest_events(
+    request: Request,
     batch: TelemetryBatchIn,
     db: AsyncSession = Depends(get_db),
-    current=Depends(get_current_user),  # <— ahora puede ser None
+    user_id: str = Depends(get_current_user_id),
 ):
     payload = [e.model_dump() for e in batch.events]
-    # Ignora user_id del cliente y pon el del server si existe sesión
-    if current is not None:
-        uid = str(current.id)
-        for e in payload:
-            e["user_id"] = uid
+    # Ignora user_id del cliente y pon el del token
+    for e in payload:
+        e["user_id"] = user_id
 
-    ids = await ingest_batch(db, payload)
-    return {"inserted": len(ids), "ids": ids[:5]}
+    try:
+        entry_id = await enqueue_batch(request.app.state.redis, payload)
+    except TelemetryBackpressure:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Telemetry backlog is full, retry later",
+            headers={"Retry-After": "5"},
+        )
+    except RedisError as e:
+        # Redis caído: degradamos a escritura directa para no perder el lote
+        log.warning("telemetry stream unavailable, writing batch inline: %s", e)
+        ids = await ingest_batch(db, payload, redis=request.app.state.redis)
+        return {"accepted": len(payload), "inserted": len(ids)}
+
+    return {"accepted": len(payload), "entry_id": entry_id}
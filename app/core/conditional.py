@@ -0,0 +1,94 @@
+from __future__ import annotations
+import logging
+from typing import Callable
+from starlette.requests import Request
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.auth_service import decode_token
+from app.services.http_cache import Validator, make_etag
+
+log = logging.getLogger(__name__)
+
+_ATTR = "__http_validator__"
+
+def conditional(validator: Validator, *, auth: bool = False) -> Callable:
+    """
+    Marca un endpoint GET para ConditionalRequestMiddleware. `auth=True` exige un access token válido
+    (solo se decodifica el JWT) antes de responder 304; sin él la petición sigue a la ruta (401).
+    """
+    def deco(fn: Callable) -> Callable:
+        setattr(fn, _ATTR, (validator, auth))
+        return fn
+    return deco
+
+def _has_access_token(scope: Scope) -> bool:
+    auth = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    if not auth.lower().startswith("bearer "):
+        return False
+    try:
+        return decode_token(auth[7:].strip()).get("typ") == "access"
+    except Exception:
+        return False
+
+def _etag_matches(scope: Scope, etag: str) -> bool:
+    inm = dict(scope["headers"]).get(b"if-none-match")
+    if not inm:
+        return False
+    tags = {t.strip().removeprefix("W/").strip('"') for t in inm.decode("latin-1").split(",")}
+    return etag in tags or "*" in tags
+
+class ConditionalRequestMiddleware:
+    """
+    ASGI puro: para GET a rutas marcadas con @conditional, calcula primero el token de versión del
+    validador y, si coincide con If-None-Match, responde 304 sin ejecutar la ruta (ni consultas pesadas
+    ni serialización). Si no, deja pasar la petición y agrega el ETag fuerte a la respuesta 200.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    def _hook(self, scope: Scope) -> tuple[Validator, bool, dict] | None:
+        router = getattr(scope.get("app"), "router", None)
+        for route in getattr(router, "routes", ()):
+            match, child = route.matches(scope)
+            if match == Match.FULL:
+                hook = getattr(child.get("endpoint"), _ATTR, None)
+                return (*hook, child) if hook else None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        hook = self._hook(scope)
+        if hook is None:
+            await self.app(scope, receive, send)
+            return
+        validator, auth, child = hook
+        if auth and not _has_access_token(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            token = await validator(Request({**scope, **child}))
+        except Exception:
+            log.exception("http validator failed for %s", scope["path"])
+            token = None
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag = make_etag(f"{scope['path']}?{scope.get('query_string', b'').decode('latin-1')}|{token}")
+        headers = [(b"etag", f'"{etag}"'.encode()), (b"cache-control", b"private, no-cache")]
+        if _etag_matches(scope, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                names = {k.lower() for k, _ in message.get("headers", [])}
+                extra = [h for h in headers if h[0] not in names]
+                message = {**message, "headers": [*message.get("headers", []), *extra]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
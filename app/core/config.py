@@ -32,6 +32,52 @@ class Settings(BaseSettings):
     # --- App ---
     app_env: str = Field("dev", alias="APP_ENV")
 
+    # --- Listings search ---
+    listing_total_mode: str = Field("cached", alias="LISTING_TOTAL_MODE")  # exact|capped|estimate|cached|none
+    listing_count_cap: int = Field(1000, alias="LISTING_COUNT_CAP")
+    listing_count_ttl: int = Field(60, alias="LISTING_COUNT_TTL")          # segundos
+
+    # --- Price suggestions ---
+    price_quantile_max_age_min: int = Field(30, alias="PRICE_QUANTILE_MAX_AGE_MIN")  # store vigente si se verificó hace menos
+    price_precompute_chunk: int = Field(2000, alias="PRICE_PRECOMPUTE_CHUNK")              # listings por INSERT…SELECT
+    price_precompute_budget_s: int = Field(50, alias="PRICE_PRECOMPUTE_BUDGET_S")          # tiempo máximo por corrida
+    price_precompute_fresh_hours: int = Field(24, alias="PRICE_PRECOMPUTE_FRESH_HOURS")    # no repetir sugerencias recientes
+
+    # --- Analytics rollups ---
+    analytics_rollup_backfill_days: int = Field(90, alias="ANALYTICS_ROLLUP_BACKFILL_DAYS")  # días cerrados que se mantienen materializados
+    analytics_rollup_lateness_min: int = Field(5, alias="ANALYTICS_ROLLUP_LATENESS_MIN")     # margen sobre el watermark (commits tardíos)
+
+    # --- Sesionización (dwell time bq_2_4) ---
+    dwell_max_idle_sec: int = Field(300, alias="DWELL_MAX_IDLE_SEC")      # cap de los agregados persistidos
+    dwell_lateness_min: int = Field(10, alias="DWELL_LATENESS_MIN")       # espera antes de cerrar intervalos
+
+    # --- Analytics response cache ---
+    analytics_cache_ttl_closed: int = Field(86_400, alias="ANALYTICS_CACHE_TTL_CLOSED")  # rangos que terminan antes de hoy
+    analytics_cache_ttl_open: int = Field(60, alias="ANALYTICS_CACHE_TTL_OPEN")          # rangos que incluyen hoy
+
+    # --- Active users (HyperLogLog) ---
+    activity_sketch_ttl_days: int = Field(400, alias="ACTIVITY_SKETCH_TTL_DAYS")  # sketches diarios de usuarios/sesiones
+
+    # --- Sync (snapshots del catálogo) ---
+    sync_snapshot_ttl_s: int = Field(86400, alias="SYNC_SNAPSHOT_TTL_S")      # vida de cada snapshot en Redis
+    sync_snapshot_to_s3: bool = Field(False, alias="SYNC_SNAPSHOT_TO_S3")      # copia en S3 para URLs prefirmadas
+
+    # --- Contadores en vivo (Redis) ---
+    live_minute_buckets: int = Field(180, alias="LIVE_MINUTE_BUCKETS")  # buckets de 1 min conservados (3 h)
+    live_hour_buckets: int = Field(48, alias="LIVE_HOUR_BUCKETS")       # buckets de 1 h conservados (2 días)
+
+    # --- Event store (particiones mensuales) ---
+    event_partition_premake_months: int = Field(3, alias="EVENT_PARTITION_PREMAKE_MONTHS")  # particiones futuras creadas por adelantado
+    event_retention_months: int = Field(12, alias="EVENT_RETENTION_MONTHS")                 # meses completos conservados
+    event_archive_to_s3: bool = Field(False, alias="EVENT_ARCHIVE_TO_S3")                   # Parquet en S3 antes de eliminar (requiere pyarrow)
+
+    # --- Telemetry (Redis Streams) ---
+    telemetry_stream: str = Field("telemetry:events", alias="TELEMETRY_STREAM")
+    telemetry_stream_max_backlog: int = Field(50_000, alias="TELEMETRY_STREAM_MAX_BACKLOG")  # entradas pendientes antes de 503
+    telemetry_ingest_batch: int = Field(200, alias="TELEMETRY_INGEST_BATCH")                 # entradas por XREADGROUP
+    telemetry_max_deliveries: int = Field(5, alias="TELEMETRY_MAX_DELIVERIES")               # reintentos antes de dead-letter
+    telemetry_dedup_days: int = Field(7, alias="TELEMETRY_DEDUP_DAYS")                       # ventana de dedup por event_id
+
     # helper: si no hay público, usa el interno
     @property
     def s3_presign_endpoint(self) -> str:
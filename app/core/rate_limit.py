@@ -1,41 +1,174 @@
 from __future__ import annotations
+import logging
+import math
 import time
-from typing import Callable, Awaitable
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from typing import NamedTuple
+from urllib.parse import parse_qs
+import orjson
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.config import settings
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+log = logging.getLogger(__name__)
 
-    def __init__(self, app, max_requests: int = 60, window_seconds: int = 60):
-        super().__init__(app)
-        self.max_requests = max_requests
-        self.window = window_seconds
+class RateLimitPolicy(NamedTuple):
+    name: str           # bucket compartido por todas las rutas de la política
+    prefix: str         # prefijo del path
+    limit: int          # peticiones por ventana
+    window: int         # segundos
+    methods: frozenset[str] | None = None  # None = todos
+    continuation: str | None = None        # solo aplica si este query param viene con valor > 0
+
+# Primera coincidencia gana; lo demás cae en la política por defecto (bucket por path, como antes).
+# Las páginas de continuación de /sync/delta (cursor > 0, keyset acotado por `limit`) tienen su propio
+# bucket amplio: un cold start paginando desde cursor=0 (o varios detrás del NAT del campus) no choca
+# con el límite de arranques/snapshots.
+DEFAULT_POLICIES: tuple[RateLimitPolicy, ...] = (
+    RateLimitPolicy("auth", "/v1/auth/", 10, 60, frozenset({"POST"})),
+    RateLimitPolicy("telemetry", "/v1/events", 600, 60),
+    RateLimitPolicy("sync-page", "/v1/sync/delta", 1200, 60, continuation="cursor"),
+    RateLimitPolicy("sync", "/v1/sync/", 30, 60),
+)
+
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+
+# Ventana deslizante aproximada (dos ventanas fijas ponderadas), atómica y en un round trip.
+# KEYS: contador de la ventana actual y de la anterior. ARGV: incremento, límite, ventana (s), peso de la anterior.
+# La petición rechazada no se cuenta (el cliente se recupera al bajar el ritmo).
+_SLIDING_WINDOW_LUA = """
+local cur = redis.call('INCRBY', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]) * 2)
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local est = math.floor(prev * tonumber(ARGV[4]) + cur)
+if est > tonumber(ARGV[2]) then
+  redis.call('DECRBY', KEYS[1], 1)
+  return {0, est - 1}
+end
+return {1, est}
+"""
+
+_LOCAL_FRACTION = 0.5   # por debajo de esta fracción del límite se admite localmente
+_LOCAL_BATCH = 10       # máximo de peticiones admitidas localmente antes de reportar a Redis
+_LOCAL_SYNC_SEC = 1.0   # y como mucho cada cuánto se sincroniza
+_LOCAL_MAX_KEYS = 50_000
+
+def _is_continuation(scope: Scope, param: str) -> bool:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(param)
+    try:
+        return bool(values) and int(values[0]) > 0
+    except ValueError:
+        return False
+
+class _LocalState:
+    __slots__ = ("window_id", "remote", "pending", "synced_at")
+
+    def __init__(self, window_id: int) -> None:
+        self.window_id = window_id
+        self.remote = 0       # último estimado global devuelto por Redis
+        self.pending = 0      # admitidas aquí y aún no reportadas
+        self.synced_at = 0.0
+
+class RateLimitMiddleware:
+    """
+    Rate limiter ASGI puro (sin BaseHTTPMiddleware):
+    - políticas por prefijo de ruta (DEFAULT_POLICIES) + límite por defecto por path;
+    - ventana deslizante en un script Lua atómico (un round trip);
+    - pre-chequeo en proceso: clientes muy por debajo del límite se admiten sin Redis y sus peticiones
+      se reportan en lote (sobrepaso acotado a procesos x _LOCAL_BATCH);
+    - 429 JSON limpio con Retry-After; /health y /metrics exentos; si Redis falla, deja pasar.
+    """
+    def __init__(self, app: ASGIApp, max_requests: int = 60, window_seconds: int = 60,
+                 policies: tuple[RateLimitPolicy, ...] = DEFAULT_POLICIES) -> None:
+        self.app = app
+        self.default = RateLimitPolicy("path", "/", max_requests, window_seconds)
+        self.policies = policies
         self._redis: Redis | None = None
+        self._script = None
+        self._local: dict[str, _LocalState] = {}
+
+    def _policy(self, scope: Scope) -> tuple[RateLimitPolicy, str]:
+        method, path = scope["method"], scope["path"]
+        for p in self.policies:
+            if not path.startswith(p.prefix) or (p.methods is not None and method not in p.methods):
+                continue
+            if p.continuation is not None and not _is_continuation(scope, p.continuation):
+                continue
+            return p, p.name
+        return self.default, path
+
+    @staticmethod
+    def _ident(scope: Scope) -> str:
+        auth = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        if auth.startswith("Bearer "):
+            return auth[-20:]
+        client = scope.get("client")
+        return client[0] if client else "-"
+
+    async def _check(self, key: str, policy: RateLimitPolicy, now: float) -> tuple[bool, int]:
+        """(permitido, estimado de peticiones en la ventana deslizante)."""
+        window_id = int(now // policy.window)
+        st = self._local.get(key)
+        if st is None or st.window_id != window_id:
+            if len(self._local) >= _LOCAL_MAX_KEYS:
+                self._local.clear()
+            # al cambiar de ventana el estimado global arranca del peso de la anterior
+            carried = st.remote if st is not None and st.window_id == window_id - 1 else 0
+            st = self._local[key] = _LocalState(window_id)
+            st.remote = carried
+        st.pending += 1
+        est = st.remote + st.pending
+        if (est < policy.limit * _LOCAL_FRACTION and st.pending < _LOCAL_BATCH
+                and now - st.synced_at < _LOCAL_SYNC_SEC):
+            return True, est
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
         if self._redis is None:
             self._redis = Redis.from_url(settings.redis_url, decode_responses=True)
+            self._script = self._redis.register_script(_SLIDING_WINDOW_LUA)
+        weight = 1 - (now % policy.window) / policy.window
+        pending, st.pending, st.synced_at = st.pending, 0, now
+        allowed, est = await self._script(
+            keys=[f"ratelimit:{key}:{window_id}", f"ratelimit:{key}:{window_id - 1}"],
+            args=[pending, policy.limit, policy.window, weight],
+        )
+        st.remote = int(est)
+        return bool(allowed), int(est)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        policy, bucket = self._policy(scope)
+        now = time.time()
+        try:
+            allowed, count = await self._check(f"{bucket}:{self._ident(scope)}", policy, now)
+        except RedisError as e:
+            log.warning("rate limiter unavailable, allowing request: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        limit_headers = [
+            (b"x-ratelimit-limit", str(policy.limit).encode()),
+            (b"x-ratelimit-remaining", str(max(policy.limit - count, 0)).encode()),
+        ]
+        if not allowed:
+            retry_after = max(1, math.ceil(policy.window - now % policy.window))
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(retry_after).encode()),
+                    *limit_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": orjson.dumps({"detail": "Rate limit exceeded"})})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *limit_headers]}
+            await send(message)
 
-        auth = request.headers.get("Authorization", "")
-        ident = auth[-20:] if auth.startswith("Bearer ") else request.client.host 
-        route = request.scope.get("path", "/")
-        now = int(time.time())
-        bucket = now // self.window
-        key = f"ratelimit:{route}:{ident}:{bucket}"
-
-        pipe = self._redis.pipeline()
-        pipe.incr(key, 1)
-        pipe.expire(key, self.window + 1)
-        count, _ = await pipe.execute()
-
-        remaining = max(self.max_requests - int(count), 0)
-        if remaining <= 0:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
-
-        resp = await call_next(request)
-        resp.headers["X-RateLimit-Limit"] = str(self.max_requests)
-        resp.headers["X-RateLimit-Remaining"] = str(remaining)
-        return resp
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Respuesta por defecto de la app: orjson (datetimes, UUID y dataclasses nativos) con `Z` para UTC,
+    igual que Pydantic, para no cambiar el formato que ya consumen los clientes.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
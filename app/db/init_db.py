@@ -25,11 +25,12 @@ async def ensure_extensions(db: AsyncSession) -> None:
         'CREATE EXTENSION IF NOT EXISTS postgis',
         'CREATE EXTENSION IF NOT EXISTS "pgcrypto"',
         'CREATE EXTENSION IF NOT EXISTS "citext"',
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
     ]
     for sql in stmts:
         await db.execute(text(sql))
     await db.commit()
-    log.info("DB extensions ensured (postgis, pgcrypto, citext).")
+    log.info("DB extensions ensured (postgis, pgcrypto, citext, pg_trgm).")
 
 async def seed_minimal_catalog(db: AsyncSession) -> None:
     await db.execute(text(SEED_CATEGORIES_SQL))
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from sqlalchemy.types import UserDefinedType
+
+class Geography(UserDefinedType):
+    """Tipo PostGIS `geography` mínimo (sin depender de GeoAlchemy2)."""
+    cache_ok = True
+
+    def __init__(self, geometry_type: str = "Point", srid: int = 4326) -> None:
+        self.geometry_type = geometry_type
+        self.srid = srid
+
+    def get_col_spec(self, **kw) -> str:
+        return f"geography({self.geometry_type},{self.srid})"
@@ -11,12 +11,15 @@ from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.router import api_router
+from app.core.conditional import ConditionalRequestMiddleware
 from app.core.config import settings
 from app.core.cors import setup_cors
 from app.core.logging import setup_logging
+from app.core.responses import FastJSONResponse
 from app.core.rate_limit import RateLimitMiddleware
 from app.db.init_db import ensure_extensions, seed_minimal_catalog
 from app.db.session import AsyncSessionLocal
+from app.services.event_emitter import emitter
 
 # -----------------------------------------------------------------------------
 # App bootstrap
@@ -29,8 +32,12 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
+# ETag/304 antes de ejecutar rutas marcadas con @conditional (debajo de CORS y rate limit)
+app.add_middleware(ConditionalRequestMiddleware)
+
 # CORS mejorado para producción con IP pública
 # Si APP_ENV != prod, permite todos los orígenes
 if settings.app_env.lower() != "prod":
@@ -76,12 +83,17 @@ async def on_startup() -> None:
     except Exception as e:
         log.warning(f"⚠️  Redis not ready: {e}")
 
+    await emitter.start()
+    log.info("✅ Event emitter started")
+
     log.info("🎉 Startup completed successfully!")
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
     log = logging.getLogger("uvicorn")
     log.info("🛑 Shutting down...")
+    await emitter.stop()
+    log.info("✅ Event emitter flushed")
     r: Redis | None = getattr(app.state, "redis", None)
     if r:
         try:
@@ -144,6 +156,16 @@ async def health() -> Dict[str, Any]:
     
     return status
 
+# -----------------------------------------------------------------------------
+# Metrics (por proceso)
+# -----------------------------------------------------------------------------
+@app.get("/metrics")
+async def metrics() -> Dict[str, Any]:
+    """
+    Métricas internas del worker actual (cola del emisor de eventos, etc.).
+    """
+    return {"event_emitter": emitter.metrics()}
+
 # -----------------------------------------------------------------------------
 # Root endpoint
 # -----------------------------------------------------------------------------
@@ -13,12 +13,22 @@ from .payment import Payment
 from .dispute import Dispute
 from .review import Review
 from .price_suggestion import PriceSuggestion
+from .price_quantile import PriceQuantile
 from .feature import Feature, FeatureFlag
-from .event import Event
+from .event import Event, EventClientKey
+from .catalog_change import CatalogChange
+from .screen_dwell import ScreenDwellDaily, ScreenDwellState
+from .analytics_rollup import (
+    RollupDay, RollupListingsDaily, RollupEscrowStepDaily, RollupEventTypeDaily, RollupClickDaily,
+    RollupActivityDaily, RollupOrderStatusDaily, RollupGmvDaily, RollupQuickViewDaily,
+)
 
 __all__ = [
     "User", "Device", "Category", "Brand", "Listing", "ListingPhoto",
     "Chat", "ChatParticipant", "Message", "Order", "OrderStatusHistory",
     "Escrow", "EscrowEvent", "Payment", "Dispute", "Review",
-    "PriceSuggestion", "Feature", "FeatureFlag", "Event"
+    "PriceSuggestion", "PriceQuantile", "Feature", "FeatureFlag", "Event", "EventClientKey",
+    "RollupDay", "RollupListingsDaily", "RollupEscrowStepDaily", "RollupEventTypeDaily", "RollupClickDaily",
+    "RollupActivityDaily", "RollupOrderStatusDaily", "RollupGmvDaily", "RollupQuickViewDaily",
+    "ScreenDwellDaily", "ScreenDwellState", "CatalogChange",
 ]
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from datetime import date, datetime
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+# Agregados diarios (día UTC) de las preguntas de negocio, mantenidos por `jobs.analytics_rollup`.
+# Las dimensiones forman parte de la PK, así que un valor NULL se guarda como '' (NO_DIM).
+NO_DIM = ""
+
+class RollupDay(Base):
+    """Días cerrados ya materializados; `computed_at` = inicio de la corrida que los calculó (watermark)."""
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    computed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class RollupListingsDaily(Base):  # BQ 1.1
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    category_id: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    n: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupEscrowStepDaily(Base):  # BQ 1.2
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    step: Mapped[str] = mapped_column(sa.String(40), primary_key=True)
+    total: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    cancelled: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupEventTypeDaily(Base):  # BQ 2.1
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    event_type: Mapped[str] = mapped_column(sa.String(80), primary_key=True)
+    n: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupClickDaily(Base):  # BQ 2.2
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    button: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    n: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupActivityDaily(Base):  # BQ 3.1 / 3.2
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    dau: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    sessions: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupOrderStatusDaily(Base):  # BQ 4.1
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    status: Mapped[str] = mapped_column(sa.String(40), primary_key=True)
+    n: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupGmvDaily(Base):  # BQ 4.2
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    gmv_cents: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    orders_paid: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class RollupQuickViewDaily(Base):  # BQ 5.1
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    category_id: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    n: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+sa.Index("ix_rollupday_computed_at", RollupDay.computed_at.desc())
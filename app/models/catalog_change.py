@@ -0,0 +1,23 @@
+from __future__ import annotations
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+CATALOG_VERSION_SEQ = sa.Sequence("catalogchange_version_seq")
+
+class CatalogChange(Base):
+    """
+    Change log compactado del catálogo (category / brand / listing): una fila por entidad con la
+    versión de su último cambio. La llenan triggers diferidos al commit (ver migraciones); `op` = upsert | delete (tombstone).
+    """
+    entity: Mapped[str] = mapped_column(sa.String(20), primary_key=True)
+    entity_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    op: Mapped[str] = mapped_column(sa.String(10), nullable=False)
+    version: Mapped[int] = mapped_column(sa.BigInteger, CATALOG_VERSION_SEQ, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+sa.Index("ix_catalogchange_version", CatalogChange.version, unique=True)
+sa.Index("ix_catalogchange_entity_version", CatalogChange.entity, CatalogChange.version)
@@ -7,6 +7,13 @@ from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Event(Base):
+    """
+    Tabla particionada por rango mensual de `occurred_at` (ver `repositories.event_partition_repo`).
+    La PK y los índices únicos incluyen la clave de partición; los índices declarados aquí se crean
+    en el padre y Postgres los propaga a cada partición.
+    """
+    __table_args__ = {"postgresql_partition_by": "RANGE (occurred_at)"}
+
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
         primary_key=True,
@@ -23,9 +30,19 @@ class Event(Base):
 
     step: Mapped[str | None] = mapped_column(sa.String(40))
 
+    # id generado por el cliente; permite deduplicar reentregas del stream de telemetría
+    client_event_id: Mapped[str | None] = mapped_column(sa.String(64))
+
     properties: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
 
     occurred_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
+    )
+    # momento de escritura (no del cliente); permite a los rollups detectar días tocados por eventos tardíos
+    ingested_at: Mapped[datetime] = mapped_column(
         sa.DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
@@ -33,4 +50,46 @@ class Event(Base):
 
 sa.Index("ix_events_type_time", Event.event_type, Event.occurred_at.desc())
 sa.Index("ix_events_user_time", Event.user_id, Event.occurred_at.desc())
-sa.Index("ix_events_props_gin", Event.properties, postgresql_using="gin")
+# BRIN: rangos de occurred_at sobre datos append-only (pocas páginas, casi sin costo de escritura)
+sa.Index("ix_events_occurred_brin", Event.occurred_at, postgresql_using="brin")
+# índices parciales por expresión sobre las llaves JSONB que agrupan las BQ (en lugar de un GIN de todo el documento)
+sa.Index(
+    "ix_events_listing_created_cat",
+    Event.occurred_at, Event.properties["category_id"].astext,
+    postgresql_where=Event.event_type == "listing.created",
+)
+sa.Index(
+    "ix_events_click_button",
+    Event.occurred_at, Event.properties["button"].astext,
+    postgresql_where=Event.event_type == "ui.click",
+)
+sa.Index(
+    "ix_events_quick_view",
+    Event.occurred_at, Event.listing_id,
+    postgresql_where=sa.and_(Event.event_type == "feature.used", Event.properties["feature_key"].astext == "quick_view"),
+)
+# LEAD() OVER (PARTITION BY session_id ORDER BY occurred_at) de bq_2_4 sin sort
+sa.Index(
+    "ix_events_screen_session",
+    Event.session_id, Event.occurred_at,
+    postgresql_where=Event.event_type == "screen.view",
+)
+sa.Index(
+    "uq_events_client_event_id",
+    Event.client_event_id,
+    Event.occurred_at,
+    unique=True,
+    postgresql_where=Event.client_event_id.isnot(None),
+)
+sa.Index("ix_events_ingested_at_brin", Event.ingested_at, postgresql_using="brin")
+
+class EventClientKey(Base):
+    """
+    Ids de cliente ya ingeridos (tabla chica, no particionada). El índice único de `event` incluye
+    occurred_at, así que un reintento sin occurred_at (el servidor asigna now()) no chocaría ahí;
+    la dedup de telemetría se hace contra esta tabla. Se purga tras TELEMETRY_DEDUP_DAYS.
+    """
+    client_event_id: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    seen_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+sa.Index("ix_eventclientkey_seen_at_brin", EventClientKey.seen_at, postgresql_using="brin")
@@ -18,7 +18,8 @@ class FeatureFlag(Base):
     id: Mapped[str] = mapped_column(UUID(as_uuid=False),
         primary_key=True, server_default=sa.text("gen_random_uuid()"))
     feature_id: Mapped[str] = mapped_column(UUID(as_uuid=False), sa.ForeignKey("feature.id", ondelete="CASCADE"), nullable=False)
-    scope: Mapped[str] = mapped_column(sa.String(20), nullable=False) 
+    scope: Mapped[str] = mapped_column(sa.String(20), nullable=False)  # global | campus | user
+    target: Mapped[str | None] = mapped_column(sa.String(120))  # campus o user_id según scope; NULL en global
     enabled: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, default=True)
     created_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
 
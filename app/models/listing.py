@@ -1,9 +1,22 @@
 from __future__ import annotations
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.sql import func
 from app.db.base import Base
+from app.db.types import Geography
+
+SEARCH_TSV_SQL = (
+    "setweight(to_tsvector('spanish', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+GEOG_SQL = (
+    "CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL "
+    "THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography END"
+)
 
 class Listing(Base):
     id: Mapped[str] = mapped_column(UUID(as_uuid=False),
@@ -21,9 +34,20 @@ class Listing(Base):
 
     latitude: Mapped[float | None] = mapped_column(sa.Float)
     longitude: Mapped[float | None] = mapped_column(sa.Float)
+    # Punto derivado de latitude/longitude (columna generada, GiST) para ST_DWithin y KNN <->
+    geog: Mapped[str | None] = mapped_column(Geography("Point", 4326), sa.Computed(GEOG_SQL, persisted=True), deferred=True)
+
+    # Documento de búsqueda (spanish + simple), columna generada; diferida para no viajar en cada SELECT
+    search_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        sa.Computed(SEARCH_TSV_SQL, persisted=True),
+        deferred=True,
+    )
 
     price_suggestion_used: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, default=False)
     quick_view_enabled: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, default=True)
+    # Borrado lógico: la fila queda como tombstone para el delta sync
+    deleted_at: Mapped[str | None] = mapped_column(sa.DateTime(timezone=True))
 
     created_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -37,3 +61,17 @@ class Listing(Base):
 
 sa.Index("ix_listing_cat_created", Listing.category_id, Listing.created_at.desc())
 sa.Index("ix_listing_geo", Listing.latitude, Listing.longitude)
+sa.Index("ix_listing_geog", Listing.geog, postgresql_using="gist")
+sa.Index("ix_listing_search_tsv", Listing.search_tsv, postgresql_using="gin")
+sa.Index(
+    "ix_listing_title_trgm",
+    Listing.title,
+    postgresql_using="gin",
+    postgresql_ops={"title": "gin_trgm_ops"},
+)
+sa.Index(
+    "ix_listing_active_created_id",
+    Listing.created_at.desc(),
+    Listing.id.desc(),
+    postgresql_where=Listing.is_active.is_(True),
+)
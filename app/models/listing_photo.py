@@ -8,11 +8,13 @@ from app.db.base import Base
 class ListingPhoto(Base):
     id: Mapped[str] = mapped_column(UUID(as_uuid=False),
         primary_key=True, server_default=sa.text("gen_random_uuid()"))
-    listing_id: Mapped[str] = mapped_column(UUID(as_uuid=False), sa.ForeignKey("listing.id", ondelete="CASCADE"), nullable=False)
+    listing_id: Mapped[str] = mapped_column(UUID(as_uuid=False), sa.ForeignKey("listing.id", ondelete="CASCADE"), nullable=False, index=True)
     storage_key: Mapped[str] = mapped_column(sa.Text, nullable=False)
     image_url: Mapped[str | None] = mapped_column(sa.Text)
     width: Mapped[int | None] = mapped_column(sa.Integer)
     height: Mapped[int | None] = mapped_column(sa.Integer)
     created_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # lo mueve cualquier escritura ORM (p. ej. el job de thumbnails al fijar width/height): sello de validadores HTTP
+    updated_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     listing: Mapped["Listing"] = relationship(back_populates="photos")
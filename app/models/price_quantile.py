@@ -0,0 +1,25 @@
+from __future__ import annotations
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+ALL = "*"  # brand_key / condition_key que agrupa todas las marcas / condiciones
+
+class PriceQuantile(Base):
+    """
+    Cuantiles de precio (ventana de 90 días) por (categoría, marca, condición), mantenidos por
+    `jobs.price_quantiles.refresh_price_quantiles`. `computed_at` es la última vez que el job
+    verificó la fila; se usa para decidir si el store está vigente.
+    """
+    category_id: Mapped[str] = mapped_column(UUID(as_uuid=False), sa.ForeignKey("category.id", ondelete="CASCADE"), primary_key=True)
+    brand_key: Mapped[str] = mapped_column(sa.String(36), primary_key=True)
+    condition_key: Mapped[str] = mapped_column(sa.String(40), primary_key=True)
+    p25: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    p50: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    p75: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    n: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    computed_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+sa.Index("ix_pricequantile_computed_at", PriceQuantile.computed_at.desc())
@@ -14,3 +14,5 @@ class PriceSuggestion(Base):
     created_at: Mapped[str] = mapped_column(sa.DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     listing: Mapped["Listing"] = relationship()
+
+sa.Index("ix_pricesuggestion_listing_created", PriceSuggestion.listing_id, PriceSuggestion.created_at.desc())
@@ -0,0 +1,21 @@
+from __future__ import annotations
+from datetime import date, datetime
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class ScreenDwellDaily(Base):
+    """
+    Dwell time por pantalla y día (día del inicio del intervalo), con el cap DWELL_MAX_IDLE_SEC.
+    Lo mantiene `jobs.sessionize.advance_dwell` a medida que los intervalos quedan cerrados.
+    """
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    screen: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    total_seconds: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    views: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+class ScreenDwellState(Base):
+    """Fila única: intervalos que empiezan antes de `finalized_until` ya están sumados en screendwelldaily."""
+    id: Mapped[int] = mapped_column(sa.SmallInteger, primary_key=True, default=1)
+    finalized_until: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+    last_run_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
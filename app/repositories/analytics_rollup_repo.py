@@ -0,0 +1,184 @@
+from __future__ import annotations
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.analytics_rollup import NO_DIM
+
+def day_start(d: date) -> datetime:
+    """Medianoche UTC del día (los rollups agrupan por día UTC, igual que `occurred_at::date`)."""
+    return datetime.combine(d, time.min, tzinfo=timezone.utc)
+
+# Tabla de rollup -> INSERT…SELECT del día [:s, :e) etiquetado como :d
+_REFRESH: dict[str, str] = {
+    "rolluplistingsdaily": """
+        INSERT INTO rolluplistingsdaily (day, category_id, n)
+        SELECT :d, COALESCE(properties->>'category_id', :no_dim), COUNT(*)
+        FROM event
+        WHERE event_type = 'listing.created' AND occurred_at >= :s AND occurred_at < :e
+        GROUP BY 2
+    """,
+    "rollupescrowstepdaily": """
+        INSERT INTO rollupescrowstepdaily (day, step, total, cancelled)
+        SELECT :d, COALESCE(step, :no_dim), COUNT(*), COUNT(*) FILTER (WHERE properties->>'result' = 'cancelled')
+        FROM event
+        WHERE event_type = 'escrow.step' AND occurred_at >= :s AND occurred_at < :e
+        GROUP BY 2
+    """,
+    "rollupeventtypedaily": """
+        INSERT INTO rollupeventtypedaily (day, event_type, n)
+        SELECT :d, event_type, COUNT(*)
+        FROM event
+        WHERE occurred_at >= :s AND occurred_at < :e
+        GROUP BY 2
+    """,
+    "rollupclickdaily": """
+        INSERT INTO rollupclickdaily (day, button, n)
+        SELECT :d, COALESCE(properties->>'button', :no_dim), COUNT(*)
+        FROM event
+        WHERE event_type = 'ui.click' AND occurred_at >= :s AND occurred_at < :e
+        GROUP BY 2
+    """,
+    "rollupactivitydaily": """
+        INSERT INTO rollupactivitydaily (day, dau, sessions)
+        SELECT :d, COUNT(DISTINCT user_id), COUNT(DISTINCT session_id)
+        FROM event
+        WHERE occurred_at >= :s AND occurred_at < :e
+        HAVING COUNT(*) > 0
+    """,
+    "rolluporderstatusdaily": """
+        INSERT INTO rolluporderstatusdaily (day, status, n)
+        SELECT :d, status::text, COUNT(*)
+        FROM "order"
+        WHERE created_at >= :s AND created_at < :e
+        GROUP BY 2
+    """,
+    "rollupgmvdaily": """
+        INSERT INTO rollupgmvdaily (day, gmv_cents, orders_paid)
+        SELECT :d,
+               COALESCE(SUM(CASE WHEN status IN ('paid','completed') THEN total_cents END), 0),
+               COUNT(*) FILTER (WHERE status IN ('paid','completed'))
+        FROM "order"
+        WHERE created_at >= :s AND created_at < :e
+        HAVING COUNT(*) > 0
+    """,
+    "rollupquickviewdaily": """
+        INSERT INTO rollupquickviewdaily (day, category_id, n)
+        SELECT :d, COALESCE(l.category_id::text, :no_dim), COUNT(*)
+        FROM event e
+        JOIN listing l ON l.id = e.listing_id
+        WHERE e.event_type = 'feature.used'
+          AND e.properties->>'feature_key' = 'quick_view'
+          AND e.occurred_at >= :s AND e.occurred_at < :e
+        GROUP BY 2
+    """,
+}
+
+_TOUCHED_SQL = sa.text("""
+    SELECT DISTINCT occurred_at::date FROM event WHERE ingested_at >= :since
+    UNION
+    SELECT DISTINCT created_at::date FROM "order" WHERE updated_at >= :since
+""")
+
+_MISSING_SQL = sa.text("""
+    SELECT g::date
+    FROM generate_series(CAST(:first AS date), CAST(:today AS date) - 1, INTERVAL '1 day') g
+    WHERE NOT EXISTS (SELECT 1 FROM rollupday r WHERE r.day = g::date)
+""")
+
+class AnalyticsRollupRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # --------- Mantenimiento ----------
+    async def now(self) -> datetime:
+        return (await self.session.execute(sa.text("SELECT now()"))).scalar_one()
+
+    async def watermark(self) -> datetime | None:
+        return (await self.session.execute(sa.text("SELECT max(computed_at) FROM rollupday"))).scalar()
+
+    async def days_to_refresh(self, *, since: datetime | None, first: date, today: date) -> list[date]:
+        """
+        Días cerrados (< today) a recalcular: los tocados desde `since` (eventos ingeridos u órdenes
+        modificadas) más los de la ventana [first, today) que aún no están materializados.
+        """
+        days: set[date] = set()
+        if since is not None:
+            days.update(r[0] for r in (await self.session.execute(_TOUCHED_SQL, {"since": since})).all())
+        days.update(r[0] for r in (await self.session.execute(_MISSING_SQL, {"first": first, "today": today})).all())
+        return sorted(d for d in days if d is not None and d < today)
+
+    async def recompute_days(self, days: Iterable[date], *, computed_at: datetime) -> int:
+        """Reemplaza los agregados de cada día y lo marca como materializado."""
+        n = 0
+        for d in days:
+            params = {"d": d, "s": day_start(d), "e": day_start(d + timedelta(days=1)), "no_dim": NO_DIM}
+            for table, insert_sql in _REFRESH.items():
+                await self.session.execute(sa.text(f"DELETE FROM {table} WHERE day = :d"), {"d": d})
+                await self.session.execute(sa.text(insert_sql), params)
+            await self.session.execute(sa.text("""
+                INSERT INTO rollupday (day, computed_at) VALUES (:d, :at)
+                ON CONFLICT (day) DO UPDATE SET computed_at = EXCLUDED.computed_at
+            """), {"d": d, "at": computed_at})
+            n += 1
+        return n
+
+    # --------- Lectura (rango de días [start, end)) ----------
+    async def materialized_days(self, *, start: date, end: date) -> int:
+        stmt = sa.text("SELECT COUNT(*) FROM rollupday WHERE day >= :s AND day < :e")
+        return (await self.session.execute(stmt, {"s": start, "e": end})).scalar_one()
+
+    async def _rows(self, sql: str, start: date, end: date):
+        res = await self.session.execute(sa.text(sql), {"s": start, "e": end, "no_dim": NO_DIM})
+        return res.all()
+
+    async def bq_1_1_listings_per_day_by_category(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, NULLIF(category_id, :no_dim), n FROM rolluplistingsdaily
+            WHERE day >= :s AND day < :e ORDER BY day, NULLIF(category_id, :no_dim)
+        """, start, end)
+
+    async def bq_1_2_escrow_steps(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT NULLIF(step, :no_dim), SUM(total)::bigint, SUM(cancelled)::bigint FROM rollupescrowstepdaily
+            WHERE day >= :s AND day < :e GROUP BY step
+        """, start, end)
+
+    async def bq_2_1_events_per_type_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, event_type, n FROM rollupeventtypedaily
+            WHERE day >= :s AND day < :e ORDER BY day, event_type
+        """, start, end)
+
+    async def bq_2_2_clicks_by_button_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, NULLIF(button, :no_dim), n FROM rollupclickdaily
+            WHERE day >= :s AND day < :e ORDER BY day, NULLIF(button, :no_dim)
+        """, start, end)
+
+    async def bq_3_1_dau(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, dau FROM rollupactivitydaily WHERE day >= :s AND day < :e ORDER BY day
+        """, start, end)
+
+    async def bq_3_2_sessions_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, sessions FROM rollupactivitydaily WHERE day >= :s AND day < :e ORDER BY day
+        """, start, end)
+
+    async def bq_4_1_orders_by_status_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, status, n FROM rolluporderstatusdaily
+            WHERE day >= :s AND day < :e ORDER BY day, status
+        """, start, end)
+
+    async def bq_4_2_gmv_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, gmv_cents, orders_paid FROM rollupgmvdaily WHERE day >= :s AND day < :e ORDER BY day
+        """, start, end)
+
+    async def bq_5_1_quick_view_by_category_by_day(self, *, start: date, end: date):
+        return await self._rows("""
+            SELECT day, NULLIF(category_id, :no_dim), n FROM rollupquickviewdaily
+            WHERE day >= :s AND day < :e ORDER BY day, NULLIF(category_id, :no_dim)
+        """, start, end)
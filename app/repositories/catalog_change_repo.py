@@ -0,0 +1,37 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Sequence
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.catalog_change import CatalogChange
+
+class CatalogChangeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def head(self) -> int:
+        """Versión más reciente del catálogo (0 si no hay cambios)."""
+        return int((await self.session.execute(select(func.coalesce(func.max(CatalogChange.version), 0)))).scalar_one())
+
+    async def entity_head(self, entity: str) -> int:
+        """Última versión de un tipo de entidad (ix_catalogchange_entity_version)."""
+        stmt = select(func.coalesce(func.max(CatalogChange.version), 0)).where(CatalogChange.entity == entity)
+        return int((await self.session.execute(stmt)).scalar_one())
+
+    async def entity_version(self, entity: str, entity_id: str) -> int | None:
+        """Versión de una entidad viva (None si no existe o está borrada)."""
+        stmt = select(CatalogChange.version).where(
+            CatalogChange.entity == entity, CatalogChange.entity_id == entity_id, CatalogChange.op == "upsert",
+        )
+        return (await self.session.execute(stmt)).scalar()
+
+    async def version_before(self, ts: datetime) -> int:
+        """Cursor equivalente a un `since` por timestamp (compatibilidad con clientes viejos)."""
+        stmt = select(func.coalesce(func.max(CatalogChange.version), 0)).where(CatalogChange.changed_at < ts)
+        return int((await self.session.execute(stmt)).scalar_one())
+
+    async def page(self, *, after: int, limit: int) -> tuple[Sequence[CatalogChange], bool]:
+        """Cambios con version > after en orden (ix_catalogchange_version); trae limit+1 para saber si hay más."""
+        stmt = select(CatalogChange).where(CatalogChange.version > after).order_by(CatalogChange.version).limit(limit + 1)
+        rows = (await self.session.execute(stmt)).scalars().all()
+        return rows[:limit], len(rows) > limit
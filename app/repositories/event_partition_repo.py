@@ -0,0 +1,107 @@
+from __future__ import annotations
+import re
+from datetime import date, datetime, timezone
+from typing import AsyncIterator
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARENT = "event"
+DEFAULT_PARTITION = "event_default"
+_NAME_RE = re.compile(r"^event_y(\d{4})m(\d{2})$")
+
+def month_floor(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"event_y{month.year:04d}m{month.month:02d}"
+
+def retention_cutoff(today: date, months: int) -> date:
+    """Primer mes conservado: las particiones que terminan en o antes de esta fecha se retiran."""
+    return add_months(month_floor(today), -months)
+
+def _bound(d: date) -> str:
+    # literal seguro (generado aquí, no viene del usuario); DDL no admite parámetros
+    return f"'{datetime(d.year, d.month, d.day, tzinfo=timezone.utc).isoformat()}'"
+
+class EventPartitionRepository:
+    """Mantenimiento de las particiones mensuales de `event` (una tabla `event_yYYYYmMM` por mes + default)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def monthly_partitions(self) -> list[tuple[date, str]]:
+        res = await self.session.execute(sa.text("""
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+        """), {"parent": PARENT})
+        out = []
+        for (name,) in res.all():
+            m = _NAME_RE.match(name)
+            if m:
+                out.append((date(int(m.group(1)), int(m.group(2)), 1), name))
+        return sorted(out)
+
+    async def ensure_month(self, month: date) -> bool:
+        """
+        Crea la partición del mes si no existe. Si la partición default ya tiene filas de ese rango
+        (eventos con reloj adelantado), se mueven a la tabla nueva antes de adjuntarla.
+        Retorna True si la creó.
+        """
+        name = partition_name(month)
+        exists = (await self.session.execute(sa.text("SELECT to_regclass(:n) IS NOT NULL"), {"n": name})).scalar_one()
+        if exists:
+            return False
+        lo, hi = _bound(month), _bound(add_months(month, 1))
+        has_rows = (await self.session.execute(sa.text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE occurred_at >= {lo} AND occurred_at < {hi})"
+        ))).scalar_one()
+        if not has_rows:
+            await self.session.execute(sa.text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES FROM ({lo}) TO ({hi})"
+            ))
+            return True
+        await self.session.execute(sa.text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+        await self.session.execute(sa.text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE occurred_at >= {lo} AND occurred_at < {hi} RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """))
+        await self.session.execute(sa.text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})"
+        ))
+        return True
+
+    async def detach_and_drop(self, name: str) -> None:
+        await self.session.execute(sa.text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await self.session.execute(sa.text(f"DROP TABLE {name}"))
+
+    async def purge_default_before(self, cutoff: date) -> int:
+        res = await self.session.execute(sa.text(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE occurred_at < {_bound(cutoff)}"
+        ))
+        return res.rowcount or 0
+
+    async def has_default_rows_before(self, cutoff: date) -> bool:
+        return bool((await self.session.execute(sa.text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE occurred_at < {_bound(cutoff)})"
+        ))).scalar_one())
+
+    async def stream_partition(self, name: str, *, before: date | None = None,
+                               batch_size: int = 10_000) -> AsyncIterator[list[tuple]]:
+        """Filas de una partición en lotes (cursor de servidor), con tipos listos para Parquet."""
+        where = f"WHERE occurred_at < {_bound(before)}" if before else ""
+        result = await self.session.stream(
+            sa.text(f"""
+                SELECT id::text, event_type, user_id::text, session_id, listing_id::text, order_id::text,
+                       chat_id::text, step, client_event_id, properties::text, occurred_at, ingested_at
+                FROM {name} {where}
+            """).execution_options(yield_per=batch_size)
+        )
+        async for part in result.partitions(batch_size):
+            yield [tuple(r) for r in part]
@@ -1,110 +1,286 @@
 from __future__ import annotations
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Iterable, Mapping
+from typing import Any, AsyncIterator, Iterable, Mapping
+import orjson
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.event import Event, EventClientKey
+
+# Lotes con al menos este número de eventos se cargan con COPY (asyncpg).
+COPY_THRESHOLD = 1000
+# asyncpg admite como máximo 32767 parámetros por sentencia (11 columnas por fila).
+_MAX_ROWS_PER_STATEMENT = 2000
+
+_COLUMNS = (
+    "id", "event_type", "user_id", "session_id", "listing_id", "order_id",
+    "chat_id", "step", "client_event_id", "properties", "occurred_at",
+)
+
+def _coerce_dt(v: Any) -> datetime:
+    if isinstance(v, datetime):
+        return v
+    if isinstance(v, str):
+        return datetime.fromisoformat(v.replace("Z", "+00:00"))
+    return datetime.now(timezone.utc)
+
+def _to_row(e: Mapping[str, Any]) -> dict:
+    return {
+        "event_type": e["event_type"],
+        "user_id": e.get("user_id"),
+        "session_id": e.get("session_id", "srv"),
+        "listing_id": e.get("listing_id"),
+        "order_id": e.get("order_id"),
+        "chat_id": e.get("chat_id"),
+        "step": e.get("step"),
+        "client_event_id": e.get("client_event_id"),
+        "properties": e.get("properties") or {},
+        "occurred_at": _coerce_dt(e.get("occurred_at")),
+    }
+
+# SQL de cada pregunta de negocio (compartido por las consultas y los exports en streaming)
+BQ_SQL: dict[str, str] = {
+    "bq_1_1": """
+        SELECT occurred_at::date AS day, properties->>'category_id' AS category_id, COUNT(*) AS n
+        FROM event
+        WHERE event_type = 'listing.created'
+          AND occurred_at >= :start AND occurred_at < :end
+        GROUP BY day, category_id
+        ORDER BY day, category_id
+    """,
+    "bq_1_2": """
+        WITH base AS (
+          SELECT step, (properties->>'result') AS result
+          FROM event
+          WHERE event_type = 'escrow.step'
+            AND occurred_at >= :start AND occurred_at < :end
+        ),
+        per_step AS (
+          SELECT step,
+                 COUNT(*) AS total,
+                 COUNT(*) FILTER (WHERE result = 'cancelled') AS cancelled
+          FROM base GROUP BY step
+        )
+        SELECT step, total, cancelled,
+               CASE WHEN total=0 THEN 0 ELSE ROUND(cancelled::numeric*100/total, 2) END AS pct_cancelled
+        FROM per_step
+        ORDER BY step
+    """,
+    "bq_2_1": """
+        SELECT occurred_at::date AS day, event_type, COUNT(*) AS n
+        FROM event
+        WHERE occurred_at >= :start AND occurred_at < :end
+        GROUP BY day, event_type
+        ORDER BY day, event_type
+    """,
+    "bq_2_2": """
+        SELECT occurred_at::date AS day, properties->>'button' AS button, COUNT(*) AS n
+        FROM event
+        WHERE event_type = 'ui.click'
+          AND occurred_at >= :start AND occurred_at < :end
+        GROUP BY day, button
+        ORDER BY day, button
+    """,
+    "bq_2_4": """
+        WITH v AS (
+          SELECT
+            session_id,
+            occurred_at,
+            COALESCE(NULLIF(properties->>'screen',''), '(unknown)') AS screen
+          FROM event
+          WHERE event_type = 'screen.view'
+            AND occurred_at >= :start AND occurred_at < :end
+        ),
+        o AS (
+          SELECT
+            session_id,
+            screen,
+            occurred_at,
+            LEAD(occurred_at) OVER (PARTITION BY session_id ORDER BY occurred_at) AS next_time
+          FROM v
+        ),
+        d AS (
+          SELECT
+            screen,
+            LEAST(:max_idle, GREATEST(0, COALESCE(EXTRACT(EPOCH FROM (next_time - occurred_at)), :max_idle)))::bigint AS seconds
+          FROM o
+        )
+        SELECT
+          screen,
+          SUM(seconds)::bigint AS total_seconds,
+          COUNT(*)::bigint AS views,
+          ROUND(AVG(seconds))::bigint AS avg_seconds
+        FROM d
+        GROUP BY screen
+        ORDER BY total_seconds DESC
+    """,
+    "bq_3_1": """
+        SELECT occurred_at::date AS day,
+               COUNT(DISTINCT user_id) FILTER (WHERE user_id IS NOT NULL) AS dau
+        FROM event
+        WHERE occurred_at >= :start AND occurred_at < :end
+        GROUP BY day
+        ORDER BY day
+    """,
+    "bq_3_2": """
+        SELECT occurred_at::date AS day,
+               COUNT(DISTINCT session_id) AS sessions
+        FROM event
+        WHERE occurred_at >= :start AND occurred_at < :end
+        GROUP BY day
+        ORDER BY day
+    """,
+    "bq_4_1": """
+        SELECT created_at::date AS day, status, COUNT(*) AS n
+        FROM "order"
+        WHERE created_at >= :start AND created_at < :end
+        GROUP BY day, status
+        ORDER BY day, status
+    """,
+    "bq_4_2": """
+        SELECT created_at::date AS day,
+               COALESCE(SUM(CASE WHEN status IN ('paid','completed') THEN total_cents END), 0) AS gmv_cents,
+               COUNT(*) FILTER (WHERE status IN ('paid','completed')) AS orders_paid
+        FROM "order"
+        WHERE created_at >= :start AND created_at < :end
+        GROUP BY day
+        ORDER BY day
+    """,
+    "bq_5_1": """
+        SELECT e.occurred_at::date AS day,
+               l.category_id::text AS category_id,
+               COUNT(*) AS n
+        FROM event e
+        JOIN listing l ON l.id = e.listing_id
+        WHERE e.event_type = 'feature.used'
+          AND e.properties->>'feature_key' = 'quick_view'
+          AND e.occurred_at >= :start AND e.occurred_at < :end
+        GROUP BY day, l.category_id
+        ORDER BY day, l.category_id
+    """,
+}
 
 class EventRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    # --------- Inserción robusta ----------
-    async def insert_batch(self, events: Iterable[Mapping[str, Any]]) -> list[str]:
-        sql = sa.text("""
-            INSERT INTO event (
-                event_type, user_id, session_id, listing_id, order_id, chat_id,
-                step, properties, occurred_at
-            )
-            VALUES (
-                :event_type, :user_id, :session_id, :listing_id, :order_id, :chat_id,
-                :step, :properties, :occurred_at
+    # --------- Inserción en bloque ----------
+    async def insert_batch(
+        self,
+        events: Iterable[Mapping[str, Any]],
+        *,
+        copy_threshold: int | None = COPY_THRESHOLD,
+        skip_duplicates: bool = False,
+    ) -> list[str]:
+        """
+        Inserta el lote completo con el mínimo de round trips y devuelve los ids en el orden de entrada.
+        - Lotes normales: INSERT multi-VALUES con ids generados en cliente (un statement por cada
+          _MAX_ROWS_PER_STATEMENT filas).
+        - Lotes grandes (>= copy_threshold): COPY binario vía asyncpg con ids generados en cliente.
+        - skip_duplicates: descarta los eventos cuyo client_event_id ya está en `eventclientkey`
+          (o se repite dentro del lote) y registra los nuevos en la misma transacción; la dedup no depende
+          de occurred_at. Devuelve solo los ids realmente insertados (sin orden garantizado). No usa COPY.
+        """
+        rows = [_to_row(e) for e in events]
+        if not rows:
+            return []
+        if skip_duplicates:
+            rows = await self._claim_client_ids(rows)
+            inserted: list[str] = []
+            for i in range(0, len(rows), _MAX_ROWS_PER_STATEMENT):
+                stmt = (
+                    pg_insert(Event)
+                    .values(rows[i:i + _MAX_ROWS_PER_STATEMENT])
+                    .on_conflict_do_nothing(
+                        index_elements=[Event.client_event_id, Event.occurred_at],
+                        index_where=Event.client_event_id.isnot(None),
+                    )
+                    .returning(Event.id)
+                )
+                res = await self.session.execute(stmt)
+                inserted.extend(res.scalars().all())
+            return inserted
+        if copy_threshold is not None and len(rows) >= copy_threshold:
+            return await self._copy_rows(rows)
+
+        # ids generados en cliente (como en COPY): un INSERT multi-VALUES por bloque, sin RETURNING.
+        # `id` tiene server_default y la tabla no tiene insert sentinel, así que RETURNING ordenado
+        # haría que SQLAlchemy emitiera un INSERT por fila.
+        ids: list[str] = []
+        for r in rows:
+            r["id"] = str(uuid.uuid4())
+            ids.append(r["id"])
+        for i in range(0, len(rows), _MAX_ROWS_PER_STATEMENT):
+            await self.session.execute(pg_insert(Event).values(rows[i:i + _MAX_ROWS_PER_STATEMENT]))
+        return ids
+
+    async def _claim_client_ids(self, rows: list[dict]) -> list[dict]:
+        """
+        Registra los client_event_id del lote en `eventclientkey` (ON CONFLICT DO NOTHING) y retorna
+        las filas sin id de cliente más la primera aparición de cada id recién registrado. Un consumidor
+        concurrente con el mismo id espera el commit del otro en el índice único y luego lo descarta.
+        """
+        first: dict[str, dict] = {}
+        for r in rows:
+            if r["client_event_id"]:
+                first.setdefault(r["client_event_id"], r)
+        if not first:
+            return rows
+        claimed: set[str] = set()
+        keys = list(first)
+        for i in range(0, len(keys), _MAX_ROWS_PER_STATEMENT):
+            stmt = (
+                pg_insert(EventClientKey)
+                .values([{"client_event_id": k} for k in keys[i:i + _MAX_ROWS_PER_STATEMENT]])
+                .on_conflict_do_nothing(index_elements=[EventClientKey.client_event_id])
+                .returning(EventClientKey.client_event_id)
             )
-            RETURNING id
-        """).bindparams(
-            sa.bindparam("properties", type_=JSONB)
-        )
+            claimed.update((await self.session.execute(stmt)).scalars().all())
+        return [r for r in rows if not r["client_event_id"] or (r["client_event_id"] in claimed
+                                                                and first[r["client_event_id"]] is r)]
 
-        def _coerce_dt(v: Any) -> datetime:
-            if isinstance(v, datetime):
-                return v
-            if isinstance(v, str):
-                return datetime.fromisoformat(v.replace("Z", "+00:00"))
-            return datetime.now(timezone.utc)
+    async def prune_client_keys(self, *, before: datetime) -> int:
+        res = await self.session.execute(sa.delete(EventClientKey).where(EventClientKey.seen_at < before))
+        return res.rowcount or 0
+
+    async def _copy_rows(self, rows: list[dict]) -> list[str]:
+        """COPY dentro de la transacción de la sesión (misma conexión asyncpg)."""
+        conn = await self.session.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
 
         ids: list[str] = []
-        for e in events:
-            ev = {
-                "event_type": e["event_type"],
-                "user_id": e.get("user_id"),
-                "session_id": e.get("session_id", "srv"),
-                "listing_id": e.get("listing_id"),
-                "order_id": e.get("order_id"),
-                "chat_id": e.get("chat_id"),
-                "step": e.get("step"),
-                "properties": e.get("properties", {}),
-                "occurred_at": _coerce_dt(e.get("occurred_at")),
-            }
-            res = await self.session.execute(sql, ev)
-            ids.append(res.scalar_one())
+        records = []
+        for r in rows:
+            id_ = uuid.uuid4()
+            ids.append(str(id_))
+            records.append((
+                id_, r["event_type"], r["user_id"], r["session_id"], r["listing_id"], r["order_id"],
+                r["chat_id"], r["step"], r["client_event_id"], orjson.dumps(r["properties"]).decode(), r["occurred_at"],
+            ))
+        await driver.copy_records_to_table("event", records=records, columns=list(_COLUMNS))
         return ids
 
     # ----------------------- BQ 1.x -----------------------
     async def bq_1_1_listings_per_day_by_category(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT occurred_at::date AS day, properties->>'category_id' AS category_id, COUNT(*) AS n
-            FROM event
-            WHERE event_type = 'listing.created'
-              AND occurred_at >= :start AND occurred_at < :end
-            GROUP BY day, category_id
-            ORDER BY day, category_id
-        """)
+        stmt = sa.text(BQ_SQL["bq_1_1"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     async def bq_1_2_escrow_cancel_rate(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            WITH base AS (
-              SELECT step, (properties->>'result') AS result
-              FROM event
-              WHERE event_type = 'escrow.step'
-                AND occurred_at >= :start AND occurred_at < :end
-            ),
-            per_step AS (
-              SELECT step,
-                     COUNT(*) AS total,
-                     COUNT(*) FILTER (WHERE result = 'cancelled') AS cancelled
-              FROM base GROUP BY step
-            )
-            SELECT step, total, cancelled,
-                   CASE WHEN total=0 THEN 0 ELSE ROUND(cancelled::numeric*100/total, 2) END AS pct_cancelled
-            FROM per_step
-            ORDER BY step
-        """)
+        stmt = sa.text(BQ_SQL["bq_1_2"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     # ----------------------- BQ 2.x -----------------------
     async def bq_2_1_events_per_type_by_day(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT occurred_at::date AS day, event_type, COUNT(*) AS n
-            FROM event
-            WHERE occurred_at >= :start AND occurred_at < :end
-            GROUP BY day, event_type
-            ORDER BY day, event_type
-        """)
+        stmt = sa.text(BQ_SQL["bq_2_1"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     async def bq_2_2_clicks_by_button_by_day(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT occurred_at::date AS day, properties->>'button' AS button, COUNT(*) AS n
-            FROM event
-            WHERE event_type = 'ui.click'
-              AND occurred_at >= :start AND occurred_at < :end
-            GROUP BY day, button
-            ORDER BY day, button
-        """)
+        stmt = sa.text(BQ_SQL["bq_2_2"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
@@ -115,39 +291,7 @@ class EventRepository:
         - Si no hay siguiente vista, capea a `max_idle_sec` (por defecto 5 min).
         Devuelve: [(screen, total_seconds, views, avg_seconds)]
         """
-        stmt = sa.text("""
-            WITH v AS (
-              SELECT
-                session_id,
-                occurred_at,
-                COALESCE(NULLIF(properties->>'screen',''), '(unknown)') AS screen
-              FROM event
-              WHERE event_type = 'screen.view'
-                AND occurred_at >= :start AND occurred_at < :end
-            ),
-            o AS (
-              SELECT
-                session_id,
-                screen,
-                occurred_at,
-                LEAD(occurred_at) OVER (PARTITION BY session_id ORDER BY occurred_at) AS next_time
-              FROM v
-            ),
-            d AS (
-              SELECT
-                screen,
-                LEAST(:max_idle, GREATEST(0, COALESCE(EXTRACT(EPOCH FROM (next_time - occurred_at)), :max_idle)))::bigint AS seconds
-              FROM o
-            )
-            SELECT
-              screen,
-              SUM(seconds)::bigint AS total_seconds,
-              COUNT(*)::bigint AS views,
-              ROUND(AVG(seconds))::bigint AS avg_seconds
-            FROM d
-            GROUP BY screen
-            ORDER BY total_seconds DESC
-        """)
+        stmt = sa.text(BQ_SQL["bq_2_4"])
         res = await self.session.execute(stmt, {
             "start": start,
             "end": end,
@@ -157,67 +301,133 @@ class EventRepository:
 
     # ----------------------- BQ 3.x -----------------------
     async def bq_3_1_dau(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT occurred_at::date AS day,
-                   COUNT(DISTINCT user_id) FILTER (WHERE user_id IS NOT NULL) AS dau
-            FROM event
-            WHERE occurred_at >= :start AND occurred_at < :end
-            GROUP BY day
-            ORDER BY day
-        """)
+        stmt = sa.text(BQ_SQL["bq_3_1"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     async def bq_3_2_sessions_by_day(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT occurred_at::date AS day,
-                   COUNT(DISTINCT session_id) AS sessions
-            FROM event
-            WHERE occurred_at >= :start AND occurred_at < :end
-            GROUP BY day
-            ORDER BY day
-        """)
+        stmt = sa.text(BQ_SQL["bq_3_2"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     # ----------------------- BQ 4.x -----------------------
     async def bq_4_1_orders_by_status_by_day(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT created_at::date AS day, status, COUNT(*) AS n
-            FROM "order"
-            WHERE created_at >= :start AND created_at < :end
-            GROUP BY day, status
-            ORDER BY day, status
-        """)
+        stmt = sa.text(BQ_SQL["bq_4_1"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     async def bq_4_2_gmv_by_day(self, *, start: datetime, end: datetime):
-        stmt = sa.text("""
-            SELECT created_at::date AS day,
-                   COALESCE(SUM(CASE WHEN status IN ('paid','completed') THEN total_cents END), 0) AS gmv_cents,
-                   COUNT(*) FILTER (WHERE status IN ('paid','completed')) AS orders_paid
-            FROM "order"
-            WHERE created_at >= :start AND created_at < :end
-            GROUP BY day
-            ORDER BY day
-        """)
+        stmt = sa.text(BQ_SQL["bq_4_2"])
         res = await self.session.execute(stmt, {"start": start, "end": end})
         return res.all()
 
     # ----------------------- BQ 5.x -----------------------
     async def bq_5_1_quick_view_by_category_by_day(self, *, start: datetime, end: datetime):
+        stmt = sa.text(BQ_SQL["bq_5_1"])
+        res = await self.session.execute(stmt, {"start": start, "end": end})
+        return res.all()
+
+    # ----------------------- Usuarios/sesiones activos -----------------------
+    async def distinct_by_period(self, *, unit: str, column: str, start: datetime, end: datetime):
+        """COUNT(DISTINCT) exacto por semana/mes (date_trunc en UTC): [(inicio del periodo, n)]."""
+        if unit not in ("day", "week", "month") or column not in ("user_id", "session_id"):
+            raise ValueError(f"invalid unit/column: {unit}/{column}")
+        stmt = sa.text(f"""
+            SELECT date_trunc(:unit, occurred_at AT TIME ZONE 'UTC')::date AS period,
+                   COUNT(DISTINCT {column}) AS n
+            FROM event
+            WHERE occurred_at >= :start AND occurred_at < :end
+            GROUP BY period
+            ORDER BY period
+        """)
+        res = await self.session.execute(stmt, {"unit": unit, "start": start, "end": end})
+        return res.all()
+
+    # ----------------------- Streaming -----------------------
+    EXPORT_COLUMNS = (
+        "id", "event_type", "user_id", "session_id", "listing_id", "order_id", "chat_id",
+        "step", "client_event_id", "properties", "occurred_at", "ingested_at",
+    )
+
+    async def _stream(self, stmt: sa.TextClause, params: dict, batch_size: int) -> AsyncIterator[list[tuple]]:
+        """Cursor de servidor (asyncpg) en lotes de `batch_size`: memoria constante."""
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size), params)
+        async for part in result.partitions(batch_size):
+            yield [tuple(r) for r in part]
+
+    def stream_bq(self, name: str, *, batch_size: int = 5_000, **params) -> AsyncIterator[list[tuple]]:
+        """Mismas filas que el método bq_* correspondiente, en lotes."""
+        if name == "bq_2_4":
+            params.setdefault("max_idle", 300)
+        return self._stream(sa.text(BQ_SQL[name]), params, batch_size)
+
+    def stream_events(
+        self, *, start: datetime, end: datetime, event_type: str | None = None, batch_size: int = 5_000,
+    ) -> AsyncIterator[list[tuple]]:
+        """Eventos crudos del rango (ordenados por occurred_at) para export offline."""
+        stmt = sa.text(f"""
+            SELECT id::text, event_type, user_id::text, session_id, listing_id::text, order_id::text,
+                   chat_id::text, step, client_event_id, properties::text, occurred_at, ingested_at
+            FROM event
+            WHERE occurred_at >= :start AND occurred_at < :end
+              {"AND event_type = :event_type" if event_type else ""}
+            ORDER BY occurred_at
+        """)
+        params = {"start": start, "end": end}
+        if event_type:
+            params["event_type"] = event_type
+        return self._stream(stmt, params, batch_size)
+
+    # ----------------------- Dashboard -----------------------
+    async def dashboard_daily(self, *, start: datetime, end: datetime) -> dict[str, list[tuple]]:
+        """
+        Un solo scan del rango con GROUPING SETS para las BQ diarias basadas en eventos.
+        Devuelve las mismas filas que bq_1_1, bq_2_1, bq_2_2, bq_3_1, bq_3_2 y bq_5_1.
+        GROUPING(event_type, created_cat, button, qv_cat) identifica el conjunto de cada fila.
+        """
         stmt = sa.text("""
-            SELECT e.occurred_at::date AS day,
-                   l.category_id::text AS category_id,
-                   COUNT(*) AS n
-            FROM event e
-            JOIN listing l ON l.id = e.listing_id
-            WHERE e.event_type = 'feature.used'
-              AND e.properties->>'feature_key' = 'quick_view'
-              AND e.occurred_at >= :start AND e.occurred_at < :end
-            GROUP BY day, l.category_id
-            ORDER BY day, l.category_id
+            WITH e AS (
+              SELECT e.occurred_at::date AS day,
+                     e.event_type,
+                     e.user_id,
+                     e.session_id,
+                     CASE WHEN e.event_type = 'listing.created' THEN e.properties->>'category_id' END AS created_cat,
+                     CASE WHEN e.event_type = 'ui.click' THEN e.properties->>'button' END AS button,
+                     l.category_id::text AS qv_cat,
+                     l.id IS NOT NULL AS is_qv
+              FROM event e
+              LEFT JOIN listing l
+                     ON l.id = e.listing_id
+                    AND e.event_type = 'feature.used'
+                    AND e.properties->>'feature_key' = 'quick_view'
+              WHERE e.occurred_at >= :start AND e.occurred_at < :end
+            )
+            SELECT GROUPING(event_type, created_cat, button, qv_cat) AS g,
+                   day, event_type, created_cat, button, qv_cat,
+                   COUNT(*) AS n_all,
+                   COUNT(*) FILTER (WHERE event_type = 'listing.created') AS n_created,
+                   COUNT(*) FILTER (WHERE event_type = 'ui.click') AS n_click,
+                   COUNT(*) FILTER (WHERE is_qv) AS n_qv,
+                   COUNT(DISTINCT user_id) AS dau,
+                   COUNT(DISTINCT session_id) AS sessions
+            FROM e
+            GROUP BY GROUPING SETS ((day, event_type), (day, created_cat), (day, button), (day, qv_cat), (day))
         """)
         res = await self.session.execute(stmt, {"start": start, "end": end})
-        return res.all()
+
+        out: dict[str, list[tuple]] = {k: [] for k in ("bq_1_1", "bq_2_1", "bq_2_2", "bq_3_1", "bq_3_2", "bq_5_1")}
+        for g, day, event_type, created_cat, button, qv_cat, n_all, n_created, n_click, n_qv, dau, sessions in res.all():
+            if g == 0b0111:
+                out["bq_2_1"].append((day, event_type, n_all))
+            elif g == 0b1011 and n_created:
+                out["bq_1_1"].append((day, created_cat, n_created))
+            elif g == 0b1101 and n_click:
+                out["bq_2_2"].append((day, button, n_click))
+            elif g == 0b1110 and n_qv:
+                out["bq_5_1"].append((day, qv_cat, n_qv))
+            elif g == 0b1111:
+                out["bq_3_1"].append((day, dau))
+                out["bq_3_2"].append((day, sessions))
+        for rows in out.values():
+            rows.sort(key=lambda r: (r[0], r[1] is None, r[1] if len(r) > 2 and r[1] is not None else ""))
+        return out
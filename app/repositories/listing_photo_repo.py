@@ -1,4 +1,5 @@
 from __future__ import annotations
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.listing_photo import ListingPhoto
 from .base import BaseRepository
@@ -24,3 +25,9 @@ class ListingPhotoRepository(BaseRepository[ListingPhoto]):
             height=height,
         )
         return await self.add(photo)
+
+    async def photos_stamp(self, listing_id: str) -> str:
+        """Sello barato de las fotos de un listing (cantidad + última alta/modificación) para validadores HTTP."""
+        stmt = select(func.count(), func.max(ListingPhoto.updated_at)).where(ListingPhoto.listing_id == listing_id)
+        n, last = (await self.session.execute(stmt)).one()
+        return f"{n}:{last.isoformat() if last else ''}"
@@ -1,11 +1,23 @@
 from __future__ import annotations
+from datetime import datetime
 from typing import Sequence
+import orjson
 import sqlalchemy as sa
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.types import Geography
 from app.models.listing import Listing
+from app.utils.cursor import decode_cursor, encode_cursor
 from .base import BaseRepository
 
+# configuraciones de text search como constantes SQL (no parámetros REGCONFIG): se pueden compilar
+# con o sin literal_binds y el planner las ve como constantes
+_TS_SPANISH = sa.literal_column("'spanish'::regconfig")
+_TS_SIMPLE = sa.literal_column("'simple'::regconfig")
+
+def geog_point(lat: float, lon: float) -> sa.ColumnElement:
+    return sa.cast(sa.func.ST_SetSRID(sa.func.ST_MakePoint(lon, lat), 4326), Geography("Point", 4326))
+
 class ListingRepository(BaseRepository[Listing]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, Listing)
@@ -55,7 +67,23 @@ class ListingRepository(BaseRepository[Listing]):
         await self.session.flush()
         return listing
 
-    async def search(
+    async def get_live(self, id_: str) -> Listing | None:
+        """Como get() pero ignora listings con borrado lógico."""
+        obj = await self.get(id_)
+        return obj if obj is not None and obj.deleted_at is None else None
+
+    async def soft_delete(self, id_: str) -> int:
+        """Borrado lógico: el trigger del change log deja el tombstone para el delta sync."""
+        stmt = (
+            sa.update(Listing)
+            .where(Listing.id == id_, Listing.deleted_at.is_(None))
+            .values(deleted_at=func.now(), is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount or 0
+
+    def _search_stmt(
         self,
         *,
         q: str | None = None,
@@ -66,9 +94,11 @@ class ListingRepository(BaseRepository[Listing]):
         near_lat: float | None = None,
         near_lon: float | None = None,
         radius_km: float | None = None,
-        page: int = 1,
-        page_size: int = 20,
-    ) -> tuple[Sequence[Listing], int]:
+    ) -> tuple[sa.Select, sa.ColumnElement | None, sa.ColumnElement | None]:
+        """
+        SELECT filtrado (sin orden ni paginación) + expresión de distancia (búsqueda geo)
+        + expresión de relevancia (búsqueda de texto).
+        """
         where = [Listing.is_active.is_(True)]
         if category_id:
             where.append(Listing.category_id == category_id)
@@ -78,30 +108,137 @@ class ListingRepository(BaseRepository[Listing]):
             where.append(Listing.price_cents >= min_price)
         if max_price is not None:
             where.append(Listing.price_cents <= max_price)
+
+        rank_expr = None
+        q = (q or "").strip()
         if q:
-            like = f"%{q.strip()}%"
-            where.append(or_(Listing.title.ilike(like), Listing.description.ilike(like)))
+            # tsvector (spanish + simple, GIN) y trigramas sobre el título (pg_trgm, GIN):
+            # el ILIKE y el operador % usan ix_listing_title_trgm para subcadenas y errores de tipeo.
+            tsq = sa.func.websearch_to_tsquery(_TS_SPANISH, q).op("||")(sa.func.websearch_to_tsquery(_TS_SIMPLE, q))
+            where.append(or_(
+                Listing.search_tsv.op("@@")(tsq),
+                Listing.title.ilike(f"%{q}%"),
+                Listing.title.op("%")(q),
+            ))
+            rank_expr = sa.cast(
+                sa.func.ts_rank(Listing.search_tsv, tsq) + sa.func.similarity(Listing.title, q),
+                sa.Float,
+            )
 
         stmt = select(Listing)
-        if where:
-            for cond in where:
-                stmt = stmt.where(cond)
+        for cond in where:
+            stmt = stmt.where(cond)
 
+        dist_expr = None
         if near_lat is not None and near_lon is not None and radius_km:
-            radius_m = radius_km * 1000.0
-            dist_expr = sa.func.ST_DistanceSphere(
-                sa.func.ST_MakePoint(Listing.longitude, Listing.latitude),
-                sa.func.ST_MakePoint(near_lon, near_lat),
-            )
-            stmt = stmt.where(dist_expr <= radius_m).order_by(dist_expr.asc(), Listing.created_at.desc())
+            origin = geog_point(near_lat, near_lon)
+            # ST_DWithin usa ix_listing_geog (GiST); <-> ordena por KNN sobre el mismo índice
+            stmt = stmt.where(sa.func.ST_DWithin(Listing.geog, origin, radius_km * 1000.0))
+            dist_expr = Listing.geog.op("<->", return_type=sa.Float)(origin)
+        return stmt, dist_expr, rank_expr
+
+    async def search_page(
+        self,
+        *,
+        page: int = 1,
+        page_size: int = 20,
+        **filters,
+    ) -> tuple[Sequence[Listing], bool]:
+        """Paginación por OFFSET sin conteo: trae page_size+1 filas para saber si hay siguiente página."""
+        stmt, dist_expr, rank_expr = self._search_stmt(**filters)
+        if dist_expr is not None:
+            stmt = stmt.order_by(dist_expr.asc(), Listing.created_at.desc())
+        elif rank_expr is not None:
+            stmt = stmt.order_by(rank_expr.desc(), Listing.created_at.desc())
         else:
             stmt = stmt.order_by(Listing.created_at.desc())
 
-        subq = stmt.subquery()
-        total_q = select(func.count()).select_from(subq)
-        total = int((await self.session.execute(total_q)).scalar_one())
+        stmt = stmt.limit(page_size + 1).offset((page - 1) * page_size)
+        items = (await self.session.execute(stmt)).scalars().all()
+        return items[:page_size], len(items) > page_size
 
-        stmt = stmt.limit(page_size).offset((page - 1) * page_size)
-        res = await self.session.execute(stmt)
-        items = res.scalars().all()
+    async def count_exact(self, **filters) -> int:
+        stmt, _, _ = self._search_stmt(**filters)
+        total_q = select(func.count()).select_from(stmt.with_only_columns(Listing.id).subquery())
+        return int((await self.session.execute(total_q)).scalar_one())
+
+    async def count_capped(self, *, cap: int, **filters) -> int:
+        """Cuenta como máximo cap+1 filas; un resultado > cap significa "cap+"."""
+        stmt, _, _ = self._search_stmt(**filters)
+        total_q = select(func.count()).select_from(stmt.with_only_columns(Listing.id).limit(cap + 1).subquery())
+        return int((await self.session.execute(total_q)).scalar_one())
+
+    async def count_estimate(self, **filters) -> int:
+        """
+        Estimación del planner (EXPLAIN, sin ejecutar la consulta). La sentencia se compila con parámetros
+        ligados y se envía tal cual al driver: el texto del usuario nunca se incrusta en el SQL.
+        """
+        stmt, _, _ = self._search_stmt(**filters)
+        conn = await self.session.connection()
+        compiled = stmt.with_only_columns(Listing.id).compile(dialect=conn.dialect)
+        params = compiled.construct_params()
+        args = tuple(params[k] for k in compiled.positiontup) if compiled.positional else params
+        res = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", args)
+        plan = res.scalar_one()
+        if isinstance(plan, str):
+            plan = orjson.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def search(
+        self,
+        *,
+        page: int = 1,
+        page_size: int = 20,
+        **filters,
+    ) -> tuple[Sequence[Listing], int]:
+        """Paginación por OFFSET con total exacto (contrato page/page_size original)."""
+        total = await self.count_exact(**filters)
+        items, _ = await self.search_page(page=page, page_size=page_size, **filters)
         return items, total
+
+    async def search_keyset(
+        self,
+        *,
+        cursor: str | None = None,
+        page_size: int = 20,
+        **filters,
+    ) -> tuple[Sequence[Listing], str | None]:
+        """
+        Keyset pagination. Orden según el tipo de búsqueda:
+        geo (distancia ASC, id ASC), texto (relevancia DESC, id DESC), resto (created_at DESC, id DESC).
+        Costo constante sin importar la profundidad. Retorna (items, next_cursor).
+        Lanza ValueError si el cursor es inválido.
+        """
+        stmt, dist_expr, rank_expr = self._search_stmt(**filters)
+        if dist_expr is not None:
+            stmt = stmt.add_columns(dist_expr.label("sort_key")).order_by(dist_expr.asc(), Listing.id.asc())
+            if cursor:
+                dist, last_id = decode_cursor(cursor, kind="d")
+                stmt = stmt.where(sa.tuple_(dist_expr, Listing.id) > (float(dist), last_id))
+        elif rank_expr is not None:
+            stmt = stmt.add_columns(rank_expr.label("sort_key")).order_by(rank_expr.desc(), Listing.id.desc())
+            if cursor:
+                rank, last_id = decode_cursor(cursor, kind="r")
+                stmt = stmt.where(sa.tuple_(rank_expr, Listing.id) < (float(rank), last_id))
+        else:
+            stmt = stmt.order_by(Listing.created_at.desc(), Listing.id.desc())
+            if cursor:
+                created, last_id = decode_cursor(cursor, kind="t")
+                created_dt = datetime.fromisoformat(created)
+                stmt = stmt.where(sa.tuple_(Listing.created_at, Listing.id) < (created_dt, last_id))
+
+        rows = (await self.session.execute(stmt.limit(page_size + 1))).all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        items = [r[0] for r in rows]
+
+        next_cursor = None
+        if has_next and rows:
+            last = rows[-1]
+            if dist_expr is not None:
+                next_cursor = encode_cursor("d", float(last.sort_key), last[0].id)
+            elif rank_expr is not None:
+                next_cursor = encode_cursor("r", float(last.sort_key), last[0].id)
+            else:
+                next_cursor = encode_cursor("t", last[0].created_at.isoformat(), last[0].id)
+        return items, next_cursor
@@ -0,0 +1,91 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Sequence
+import sqlalchemy as sa
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.price_quantile import ALL, PriceQuantile
+
+_AFFECTED_SQL = sa.text("""
+    SELECT DISTINCT category_id
+    FROM listing
+    WHERE updated_at >= :since
+       OR (created_at >= :since - INTERVAL '90 days' AND created_at < now() - INTERVAL '90 days')
+""")
+
+_DELETE_SQL = sa.text("""
+    DELETE FROM pricequantile WHERE :all_cats OR category_id = ANY(:cats)
+""").bindparams(sa.bindparam("cats", type_=ARRAY(UUID(as_uuid=False))))
+
+_REFRESH_SQL = sa.text("""
+    INSERT INTO pricequantile (category_id, brand_key, condition_key, p25, p50, p75, n, computed_at)
+    SELECT category_id,
+           CASE WHEN GROUPING(brand) = 1 THEN :all_key ELSE brand END,
+           CASE WHEN GROUPING(condition) = 1 THEN :all_key ELSE condition END,
+           floor(percentile_cont(0.25) WITHIN GROUP (ORDER BY price_cents))::bigint,
+           floor(percentile_cont(0.50) WITHIN GROUP (ORDER BY price_cents))::bigint,
+           floor(percentile_cont(0.75) WITHIN GROUP (ORDER BY price_cents))::bigint,
+           COUNT(*),
+           now()
+    FROM (
+        SELECT category_id, brand_id::text AS brand, condition, price_cents
+        FROM listing
+        WHERE is_active
+          AND created_at >= now() - INTERVAL '90 days'
+          AND (:all_cats OR category_id = ANY(:cats))
+    ) src
+    GROUP BY GROUPING SETS (
+        (category_id), (category_id, brand), (category_id, condition), (category_id, brand, condition)
+    )
+    HAVING NOT (GROUPING(brand) = 0 AND brand IS NULL)
+       AND NOT (GROUPING(condition) = 0 AND condition IS NULL)
+""").bindparams(sa.bindparam("cats", type_=ARRAY(UUID(as_uuid=False))))
+
+class PriceQuantileRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def lookup(
+        self, *, category_id: str, brand_id: str | None, condition: str | None
+    ) -> tuple[Sequence[PriceQuantile], datetime | None]:
+        """
+        Una sola consulta indexada: filas candidatas (con y sin condición) + última verificación del store.
+        """
+        last_refresh = select(func.max(PriceQuantile.computed_at)).scalar_subquery()
+        conds = [ALL] + ([condition] if condition else [])
+        stmt = select(PriceQuantile, last_refresh).where(
+            PriceQuantile.category_id == category_id,
+            PriceQuantile.brand_key == (brand_id or ALL),
+            PriceQuantile.condition_key.in_(conds),
+        )
+        rows = (await self.session.execute(stmt)).all()
+        if rows:
+            return [r[0] for r in rows], rows[0][1]
+        return [], (await self.session.execute(select(last_refresh))).scalar()
+
+    async def last_refresh(self) -> datetime | None:
+        return (await self.session.execute(select(func.max(PriceQuantile.computed_at)))).scalar()
+
+    async def affected_categories(self, since: datetime) -> list[str]:
+        res = await self.session.execute(_AFFECTED_SQL, {"since": since})
+        return [str(r[0]) for r in res.all()]
+
+    async def refresh(self, category_ids: list[str] | None = None) -> int:
+        """
+        Recalcula los cuantiles (todas las categorías si category_ids es None) con un único
+        GROUPING SETS y marca como verificadas las filas del resto. Retorna filas escritas.
+        Las corridas (incremental cada 10 min y completa diaria) se serializan con un advisory lock de
+        transacción: sin él, el DELETE de una no ve lo que la otra acaba de confirmar y su INSERT choca con la PK.
+        """
+        await self.session.execute(sa.text("SELECT pg_advisory_xact_lock(hashtext('pricequantile'))"))
+        params = {"all_cats": category_ids is None, "cats": category_ids or [], "all_key": ALL}
+        await self.session.execute(_DELETE_SQL, params)
+        res = await self.session.execute(_REFRESH_SQL, params)
+        if category_ids is not None:
+            await self.session.execute(
+                sa.update(PriceQuantile)
+                .where(PriceQuantile.category_id.not_in(category_ids) if category_ids else sa.true())
+                .values(computed_at=func.now())
+            )
+        return res.rowcount or 0
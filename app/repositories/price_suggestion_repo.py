@@ -1,10 +1,44 @@
 from __future__ import annotations
 from typing import List
+import sqlalchemy as sa
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.price_quantile import ALL
 from app.models.price_suggestion import PriceSuggestion
 from .base import BaseRepository
 
+# Un chunk del catálogo (keyset por id) unido a los cuantiles (marca -> categoría) e insertado en bloque.
+# Se omiten listings con una sugerencia posterior a su última edición y más nueva que :fresh_hours.
+_BULK_CHUNK_SQL = sa.text("""
+    WITH chunk AS (
+        SELECT id, category_id, brand_id, updated_at
+        FROM listing
+        WHERE is_active AND (CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid))
+        ORDER BY id
+        LIMIT :limit
+    ),
+    ins AS (
+        INSERT INTO pricesuggestion (listing_id, suggested_price_cents, algorithm)
+        SELECT c.id,
+               (round(COALESCE(qb.p50, qc.p50) / CAST(:quantum AS numeric)) * :quantum)::int,
+               :algorithm
+        FROM chunk c
+        LEFT JOIN pricequantile qb
+               ON qb.category_id = c.category_id AND qb.brand_key = c.brand_id::text AND qb.condition_key = :all_key
+        LEFT JOIN pricequantile qc
+               ON qc.category_id = c.category_id AND qc.brand_key = :all_key AND qc.condition_key = :all_key
+        WHERE COALESCE(qb.p50, qc.p50) IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM pricesuggestion ps
+              WHERE ps.listing_id = c.id
+                AND ps.algorithm = :algorithm
+                AND ps.created_at >= GREATEST(c.updated_at, now() - make_interval(hours => :fresh_hours))
+          )
+        RETURNING 1
+    )
+    SELECT (SELECT id::text FROM chunk ORDER BY id DESC LIMIT 1), (SELECT count(*) FROM chunk), (SELECT count(*) FROM ins)
+""")
+
 class PriceSuggestionRepository(BaseRepository[PriceSuggestion]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session, PriceSuggestion)
@@ -17,3 +51,23 @@ class PriceSuggestionRepository(BaseRepository[PriceSuggestion]):
         stmt = select(PriceSuggestion).where(PriceSuggestion.listing_id == listing_id).order_by(PriceSuggestion.created_at.desc()).limit(limit)
         res = await self.session.execute(stmt)
         return res.scalars().all()
+
+    async def bulk_suggest_chunk(
+        self,
+        *,
+        after_id: str | None,
+        limit: int,
+        fresh_hours: int,
+        algorithm: str = "p50",
+        quantum: int = 100,
+    ) -> tuple[str | None, int, int]:
+        """
+        Sugiere precio (p50 del store pricequantile) para el siguiente chunk de listings activos.
+        Retorna (último id escaneado, escaneados, insertados); último id None = fin del catálogo.
+        """
+        res = await self.session.execute(_BULK_CHUNK_SQL, {
+            "after": after_id, "limit": limit, "fresh_hours": fresh_hours,
+            "algorithm": algorithm, "quantum": quantum, "all_key": ALL,
+        })
+        last_id, scanned, inserted = res.one()
+        return last_id, int(scanned), int(inserted)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.analytics_rollup_repo import day_start
+
+# Intervalos (screen.view -> siguiente vista de la sesión) que EMPIEZAN en [:start, :end), por día de inicio.
+# El LEAD() mira hasta :end + :max_idle: más allá el intervalo queda capeado de todas formas, así que
+# el resultado de cada tramo es definitivo una vez ingeridos los eventos hasta ese límite.
+_INTERVALS = """
+    WITH v AS (
+      SELECT session_id, occurred_at, COALESCE(NULLIF(properties->>'screen',''), '(unknown)') AS screen
+      FROM event
+      WHERE event_type = 'screen.view'
+        AND occurred_at >= :start AND occurred_at < :end + make_interval(secs => :max_idle)
+    ),
+    o AS (
+      SELECT screen, occurred_at,
+             LEAD(occurred_at) OVER (PARTITION BY session_id ORDER BY occurred_at) AS next_time
+      FROM v
+    ),
+    d AS (
+      SELECT occurred_at::date AS day, screen,
+             LEAST(:max_idle, GREATEST(0, COALESCE(EXTRACT(EPOCH FROM (next_time - occurred_at)), :max_idle)))::bigint AS seconds
+      FROM o
+      WHERE occurred_at >= :start AND occurred_at < :end
+    )
+"""
+
+_ACCUMULATE_SQL = sa.text(_INTERVALS + """
+    INSERT INTO screendwelldaily (day, screen, total_seconds, views)
+    SELECT day, screen, SUM(seconds), COUNT(*) FROM d GROUP BY day, screen
+    ON CONFLICT (day, screen) DO UPDATE SET
+      total_seconds = screendwelldaily.total_seconds + EXCLUDED.total_seconds,
+      views = screendwelldaily.views + EXCLUDED.views
+""")
+
+_LIVE_SQL = sa.text(_INTERVALS + """
+    SELECT screen, SUM(seconds)::bigint, COUNT(*)::bigint FROM d GROUP BY screen
+""")
+
+# Días cuyos intervalos ya cerrados cambian por vistas que llegaron tarde: el día de la vista y el del
+# intervalo previo de la sesión (que pudo empezar hasta max_idle antes, p. ej. justo antes de medianoche).
+_LATE_DAYS_SQL = sa.text("""
+    SELECT DISTINCT d FROM event,
+      LATERAL (VALUES (occurred_at::date), ((occurred_at - make_interval(secs => :max_idle))::date)) AS x(d)
+    WHERE event_type = 'screen.view' AND ingested_at >= :since AND occurred_at < :before
+""")
+
+class ScreenDwellRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # --------- Estado ----------
+    async def lock(self) -> None:
+        """Serializa las corridas de la sesionización (lock transaccional; se libera en commit/rollback)."""
+        await self.session.execute(sa.text("SELECT pg_advisory_xact_lock(hashtext('screendwell'))"))
+
+    async def state(self) -> tuple[datetime, datetime] | None:
+        """(finalized_until, last_run_at) o None si la sesionización no ha corrido."""
+        row = (await self.session.execute(
+            sa.text("SELECT finalized_until, last_run_at FROM screendwellstate WHERE id = 1")
+        )).first()
+        return (row[0], row[1]) if row else None
+
+    async def save_state(self, *, finalized_until: datetime, last_run_at: datetime) -> None:
+        await self.session.execute(sa.text("""
+            INSERT INTO screendwellstate (id, finalized_until, last_run_at) VALUES (1, :f, :r)
+            ON CONFLICT (id) DO UPDATE SET finalized_until = EXCLUDED.finalized_until, last_run_at = EXCLUDED.last_run_at
+        """), {"f": finalized_until, "r": last_run_at})
+
+    # --------- Mantenimiento ----------
+    async def accumulate(self, *, start: datetime, end: datetime, max_idle: int) -> None:
+        """Suma a screendwelldaily los intervalos que empiezan en [start, end)."""
+        await self.session.execute(_ACCUMULATE_SQL, {"start": start, "end": end, "max_idle": max_idle})
+
+    async def late_days(self, *, since: datetime, before: datetime, max_idle: int) -> list[date]:
+        """Días con intervalos cerrados afectados por vistas ingeridas desde `since` con occurred_at < before."""
+        res = await self.session.execute(_LATE_DAYS_SQL, {"since": since, "before": before, "max_idle": max_idle})
+        return sorted(r[0] for r in res.all())
+
+    async def recompute_day(self, d: date, *, until: datetime, max_idle: int) -> None:
+        """Reemplaza el día con los intervalos que empiezan en él y antes de `until` (lo ya cerrado)."""
+        start, end = day_start(d), min(day_start(d + timedelta(days=1)), until)
+        await self.session.execute(sa.text("DELETE FROM screendwelldaily WHERE day = :d"), {"d": d})
+        if start < end:
+            await self.accumulate(start=start, end=end, max_idle=max_idle)
+
+    # --------- Lectura ----------
+    async def totals(self, *, start: date, end: date):
+        """[(screen, total_seconds, views)] de los días [start, end)."""
+        res = await self.session.execute(sa.text("""
+            SELECT screen, SUM(total_seconds)::bigint, SUM(views)::bigint FROM screendwelldaily
+            WHERE day >= :s AND day < :e GROUP BY screen
+        """), {"s": start, "e": end})
+        return res.all()
+
+    async def live_totals(self, *, start: datetime, end: datetime, max_idle: int):
+        """Igual que `totals` pero calculado desde `event` (extremos parciales y tramo aún abierto)."""
+        res = await self.session.execute(_LIVE_SQL, {"start": start, "end": end, "max_idle": max_idle})
+        return res.all()
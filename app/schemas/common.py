@@ -13,10 +13,12 @@ class Pagination(BaseModel):
 
 class Page(ORMModel, Generic[T]):
     items: List[T]
-    total: int
+    total: int | None  # None en modo cursor o total_mode=none
+    total_approx: bool = False  # total estimado o acotado ("1000+")
     page: int
     page_size: int
     has_next: bool
+    next_cursor: str | None = None
 
 class Location(BaseModel):
     latitude: float = Field(..., description="WGS84 latitude")
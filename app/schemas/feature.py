@@ -10,7 +10,8 @@ class FeatureCreate(BaseModel):
 
 class FeatureFlagCreate(BaseModel):
     feature_id: str
-    scope: str = Field(..., pattern="^(global|user|segment)$")
+    scope: str = Field(..., pattern="^(global|user|campus|segment)$")
+    target: str | None = Field(None, max_length=120)
     enabled: bool = True
 
 class FeatureOut(IdOut):
@@ -21,6 +22,7 @@ class FeatureOut(IdOut):
 class FeatureFlagOut(IdOut):
     feature_id: str
     scope: str
+    target: str | None = None
     enabled: bool
     created_at: datetime
 
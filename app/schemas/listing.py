@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, List
 from app.schemas.common import ORMModel, IdOut, Location
 from app.schemas.photo import ListingPhotoOut
 
@@ -50,3 +50,40 @@ class ListingOut(IdOut):
     created_at: datetime
     updated_at: datetime
     photos: List[ListingPhotoOut] = []
+
+def listing_payload(l: Any) -> dict[str, Any]:
+    """
+    ORM -> dict con la forma de ListingOut sin pasar por Pydantic (datos de la DB, ya confiables).
+    Para rutas calientes que devuelven la respuesta directamente y se saltan la validación.
+    """
+    return {
+        "id": l.id,
+        "seller_id": l.seller_id,
+        "title": l.title,
+        "description": l.description,
+        "category_id": l.category_id,
+        "brand_id": l.brand_id,
+        "price_cents": l.price_cents,
+        "currency": l.currency,
+        "condition": l.condition,
+        "quantity": l.quantity,
+        "is_active": l.is_active,
+        "latitude": l.latitude,
+        "longitude": l.longitude,
+        "price_suggestion_used": l.price_suggestion_used,
+        "quick_view_enabled": l.quick_view_enabled,
+        "created_at": l.created_at,
+        "updated_at": l.updated_at,
+        "photos": [
+            {
+                "id": p.id,
+                "listing_id": p.listing_id,
+                "storage_key": p.storage_key,
+                "image_url": p.image_url,
+                "width": p.width,
+                "height": p.height,
+                "created_at": p.created_at,
+            }
+            for p in l.photos
+        ],
+    }
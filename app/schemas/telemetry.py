@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from app.schemas.common import IdOut
 
 class TelemetryEventIn(BaseModel):
+    event_id: str | None = Field(None, min_length=8, max_length=64)  # id del cliente, para deduplicar reintentos
     event_type: str = Field(..., min_length=2, max_length=80)
     session_id: str = Field(..., min_length=6, max_length=64)
     user_id: str | None = None
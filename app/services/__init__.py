@@ -1,6 +1,8 @@
 from .auth_service import *
+from .principal_cache import *
 from .image_service import *
 from .telemetry_sink import *
+from .event_emitter import *
 from .search_service import *
 from .price_suggestion import *
 from .geospatial import *
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Literal, Mapping
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from app.core.config import settings
+
+Metric = Literal["users", "sessions"]
+Window = Literal["day", "week", "month"]
+
+# Sketches HyperLogLog por día UTC: hll:users:2025-11-14 / hll:sessions:2025-11-14.
+# PFADD es idempotente, así que las reentregas del stream no inflan los conteos.
+def day_key(metric: Metric, d: date) -> str:
+    return f"hll:{metric}:{d.isoformat()}"
+
+def _day_of(occurred_at: Any) -> date:
+    if isinstance(occurred_at, str):
+        occurred_at = datetime.fromisoformat(occurred_at.replace("Z", "+00:00"))
+    if isinstance(occurred_at, datetime):
+        if occurred_at.tzinfo is not None:
+            occurred_at = occurred_at.astimezone(timezone.utc)
+        return occurred_at.date()
+    return datetime.now(timezone.utc).date()
+
+def add_activity(pipe: Pipeline, events: Iterable[Mapping[str, Any]]) -> None:
+    """Encola en `pipe` los PFADD (+ EXPIRE) de usuarios y sesiones por día del lote."""
+    members: dict[str, set[str]] = defaultdict(set)
+    for e in events:
+        d = _day_of(e.get("occurred_at"))
+        if e.get("user_id"):
+            members[day_key("users", d)].add(str(e["user_id"]))
+        if e.get("session_id"):
+            members[day_key("sessions", d)].add(str(e["session_id"]))
+    ttl = settings.activity_sketch_ttl_days * 86_400
+    for key, values in members.items():
+        pipe.pfadd(key, *values)
+        pipe.expire(key, ttl)
+
+async def record_activity(redis: Redis, events: Iterable[Mapping[str, Any]]) -> None:
+    pipe = redis.pipeline(transaction=False)
+    add_activity(pipe, events)
+    await pipe.execute()
+
+def buckets(start: date, end: date, window: Window) -> list[tuple[date, date]]:
+    """Periodos [inicio, fin) del rango de días [start, end): días, semanas ISO o meses, recortados al rango."""
+    out: list[tuple[date, date]] = []
+    cur = start
+    while cur < end:
+        if window == "day":
+            nxt = cur + timedelta(days=1)
+        elif window == "week":
+            nxt = cur - timedelta(days=cur.weekday()) + timedelta(days=7)
+        else:
+            nxt = date(cur.year + cur.month // 12, cur.month % 12 + 1, 1)
+        nxt = min(nxt, end)
+        out.append((cur, nxt))
+        cur = nxt
+    return out
+
+async def approx_counts(redis: Redis, *, metric: Metric, window: Window,
+                        start: date, end: date) -> list[tuple[date, date, int]]:
+    """PFCOUNT sobre la unión de los sketches diarios de cada periodo (un round trip para todos)."""
+    periods = buckets(start, end, window)
+    pipe = redis.pipeline(transaction=False)
+    for p_start, p_end in periods:
+        pipe.pfcount(*[day_key(metric, p_start + timedelta(days=i)) for i in range((p_end - p_start).days)])
+    counts = await pipe.execute() if periods else []
+    return [(s, e, int(n)) for (s, e), n in zip(periods, counts)]
@@ -1,43 +1,227 @@
 from __future__ import annotations
-from datetime import datetime
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+from app.services.active_users import Metric, Window, approx_counts, buckets
 from app.repositories.events_repo import EventRepository
+from app.repositories.analytics_rollup_repo import AnalyticsRollupRepository, day_start
+from app.repositories.screen_dwell_repo import ScreenDwellRepository
+from app.core.config import settings
+
+# BQ diarias -> método del repositorio (mismo nombre en EventRepository y AnalyticsRollupRepository)
+_DAILY_METHODS = {
+    "bq_1_1": "bq_1_1_listings_per_day_by_category",
+    "bq_2_1": "bq_2_1_events_per_type_by_day",
+    "bq_2_2": "bq_2_2_clicks_by_button_by_day",
+    "bq_3_1": "bq_3_1_dau",
+    "bq_3_2": "bq_3_2_sessions_by_day",
+    "bq_4_1": "bq_4_1_orders_by_status_by_day",
+    "bq_4_2": "bq_4_2_gmv_by_day",
+    "bq_5_1": "bq_5_1_quick_view_by_category_by_day",
+}
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
 
 class AnalyticsService:
+    """
+    Las BQ por día se responden desde los rollups diarios para los días cerrados (UTC, anteriores a hoy)
+    y desde `event`/`order` solo para los extremos parciales del rango y el día en curso.
+    Si algún día cerrado del rango aún no está materializado, se consulta todo en crudo.
+    """
     def __init__(self, db: AsyncSession):
         self.events = EventRepository(db)
+        self.rollups = AnalyticsRollupRepository(db)
+        self.dwell = ScreenDwellRepository(db)
+
+    async def _closed_span(self, start: datetime, end: datetime) -> tuple[date, date] | None:
+        first = start.date() if start == day_start(start.date()) else start.date() + timedelta(days=1)
+        last = min(end.date(), datetime.now(timezone.utc).date())
+        if first >= last:
+            return None
+        if await self.rollups.materialized_days(start=first, end=last) < (last - first).days:
+            return None
+        return first, last
+
+    async def _segments(self, start: datetime, end: datetime) -> list[tuple[str, tuple]]:
+        """
+        Tramos en orden cronológico: ("raw", (datetime, datetime)) para extremos parciales y hoy,
+        ("rollup", (date, date)) para los días cerrados materializados.
+        """
+        span = await self._closed_span(start, end)
+        if span is None:
+            return [("raw", (start, end))]
+        head_end, tail_start = day_start(span[0]), day_start(span[1])
+        segments = [("raw", (start, head_end)), ("rollup", span), ("raw", (tail_start, end))]
+        return [(kind, r) for kind, r in segments if kind == "rollup" or r[0] < r[1]]
+
+    async def _daily(self, raw: Callable[..., Awaitable[list]], rollup: Callable[..., Awaitable[list]],
+                     start: datetime, end: datetime) -> list:
+        rows = []
+        for kind, (s, e) in await self._segments(_as_utc(start), _as_utc(end)):
+            rows += await (raw if kind == "raw" else rollup)(start=s, end=e)
+        return rows
 
     # 1.x
     async def bq_1_1_listings_per_day_by_category(self, *, start: datetime, end: datetime):
-        return await self.events.bq_1_1_listings_per_day_by_category(start=start, end=end)
+        return await self._daily(self.events.bq_1_1_listings_per_day_by_category,
+                                 self.rollups.bq_1_1_listings_per_day_by_category, start, end)
 
     async def bq_1_2_escrow_cancel_rate(self, *, start: datetime, end: datetime):
-        return await self.events.bq_1_2_escrow_cancel_rate(start=start, end=end)
+        segments = await self._segments(_as_utc(start), _as_utc(end))
+        if len(segments) == 1 and segments[0][0] == "raw":
+            s, e = segments[0][1]
+            return await self.events.bq_1_2_escrow_cancel_rate(start=s, end=e)
+
+        # combinar (step, total, cancelled) de rollups y extremos crudos, y recalcular el porcentaje
+        totals: dict[str | None, list[int]] = {}
+        for kind, (s, e) in segments:
+            read = self.events.bq_1_2_escrow_cancel_rate if kind == "raw" else self.rollups.bq_1_2_escrow_steps
+            for r in await read(start=s, end=e):
+                acc = totals.setdefault(r[0], [0, 0])
+                acc[0] += int(r[1])
+                acc[1] += int(r[2])
+
+        return [
+            (step, total, cancelled, round(cancelled * 100 / total, 2) if total else 0)
+            for step, (total, cancelled) in sorted(totals.items(), key=lambda kv: (kv[0] is None, kv[0] or ""))
+        ]
 
     # 2.x
     async def bq_2_1_events_per_type_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_2_1_events_per_type_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_2_1_events_per_type_by_day,
+                                 self.rollups.bq_2_1_events_per_type_by_day, start, end)
 
     async def bq_2_2_clicks_by_button_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_2_2_clicks_by_button_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_2_2_clicks_by_button_by_day,
+                                 self.rollups.bq_2_2_clicks_by_button_by_day, start, end)
 
     async def bq_2_4_time_by_screen(self, *, start: datetime, end: datetime, max_idle_sec: int = 300):
-        return await self.events.bq_2_4_time_by_screen(start=start, end=end, max_idle_sec=max_idle_sec)
+        """
+        Con el cap de los agregados persistidos (DWELL_MAX_IDLE_SEC), los días completos ya sesionizados
+        se suman desde screendwelldaily y solo los extremos parciales / el tramo abierto usan LEAD().
+        Con otro cap se calcula todo en crudo.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        state = await self.dwell.state() if max_idle_sec == settings.dwell_max_idle_sec else None
+        first = start.date() if start == day_start(start.date()) else start.date() + timedelta(days=1)
+        last = min(end.date(), state[0].astimezone(timezone.utc).date()) if state else first
+        if first >= last:
+            return await self.events.bq_2_4_time_by_screen(start=start, end=end, max_idle_sec=max_idle_sec)
+
+        totals: dict[str, list[int]] = {}
+        parts = [await self.dwell.totals(start=first, end=last)]
+        for s, e in ((start, day_start(first)), (day_start(last), end)):
+            if s < e:
+                parts.append(await self.dwell.live_totals(start=s, end=e, max_idle=max_idle_sec))
+        for rows in parts:
+            for screen, seconds, views in rows:
+                acc = totals.setdefault(screen, [0, 0])
+                acc[0] += int(seconds)
+                acc[1] += int(views)
+        return sorted(
+            ((screen, total, views, (2 * total + views) // (2 * views) if views else 0) for screen, (total, views) in totals.items()),
+            key=lambda r: r[1], reverse=True,
+        )
 
     # 3.x
     async def bq_3_1_dau(self, *, start: datetime, end: datetime):
-        return await self.events.bq_3_1_dau(start=start, end=end)
+        return await self._daily(self.events.bq_3_1_dau, self.rollups.bq_3_1_dau, start, end)
 
     async def bq_3_2_sessions_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_3_2_sessions_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_3_2_sessions_by_day, self.rollups.bq_3_2_sessions_by_day, start, end)
 
     # 4.x
     async def bq_4_1_orders_by_status_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_4_1_orders_by_status_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_4_1_orders_by_status_by_day,
+                                 self.rollups.bq_4_1_orders_by_status_by_day, start, end)
 
     async def bq_4_2_gmv_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_4_2_gmv_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_4_2_gmv_by_day, self.rollups.bq_4_2_gmv_by_day, start, end)
 
     # 5.x
     async def bq_5_1_quick_view_by_category_by_day(self, *, start: datetime, end: datetime):
-        return await self.events.bq_5_1_quick_view_by_category_by_day(start=start, end=end)
+        return await self._daily(self.events.bq_5_1_quick_view_by_category_by_day,
+                                 self.rollups.bq_5_1_quick_view_by_category_by_day, start, end)
+
+    # Dashboard
+    async def _dashboard_events(self, start: datetime, end: datetime) -> dict[str, list]:
+        """BQ diarias de eventos: un scan por rango crudo + lecturas de rollups para los días cerrados."""
+        out: dict[str, list] = {k: [] for k in ("bq_1_1", "bq_2_1", "bq_2_2", "bq_3_1", "bq_3_2", "bq_5_1")}
+        for kind, (s, e) in await self._segments(start, end):
+            if kind == "raw":
+                part = await self.events.dashboard_daily(start=s, end=e)
+                for k in out:
+                    out[k] += part[k]
+            else:
+                for k in out:
+                    out[k] += await getattr(self.rollups, _DAILY_METHODS[k])(start=s, end=e)
+        return out
+
+    @staticmethod
+    async def _in_own_session(method: str, **kwargs):
+        async with AsyncSessionLocal() as db:
+            return await getattr(AnalyticsService(db), method)(**kwargs)
+
+    async def dashboard(self, *, start: datetime, end: datetime, max_idle_sec: int = 300) -> dict[str, list]:
+        """
+        Todas las BQ en una respuesta: las diarias de eventos en un solo scan sobre esta sesión y el resto
+        (órdenes, escrow, dwell time) en paralelo, cada una en su propia sesión del pool.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        events, bq_1_2, bq_2_4, bq_4_1, bq_4_2 = await asyncio.gather(
+            self._dashboard_events(start, end),
+            self._in_own_session("bq_1_2_escrow_cancel_rate", start=start, end=end),
+            self._in_own_session("bq_2_4_time_by_screen", start=start, end=end, max_idle_sec=max_idle_sec),
+            self._in_own_session("bq_4_1_orders_by_status_by_day", start=start, end=end),
+            self._in_own_session("bq_4_2_gmv_by_day", start=start, end=end),
+        )
+        return {**events, "bq_1_2": bq_1_2, "bq_2_4": bq_2_4, "bq_4_1": bq_4_1, "bq_4_2": bq_4_2}
+
+    # Usuarios / sesiones activos (DAU/WAU/MAU)
+    async def active(self, redis: Redis, *, metric: Metric, window: Window, start: date, end: date,
+                     exact: bool = False) -> list[tuple[date, date, int, bool]]:
+        """
+        Por defecto une los sketches HLL diarios de Redis (error ~0.8%, microsegundos).
+        exact=True usa COUNT(DISTINCT): las BQ 3.1/3.2 para días, date_trunc para semanas/meses.
+        """
+        if not exact:
+            return [(s, e, n, True) for s, e, n in await approx_counts(redis, metric=metric, window=window, start=start, end=end)]
+
+        s_dt, e_dt = day_start(start), day_start(end)
+        if window == "day":
+            rows = await (self.bq_3_1_dau if metric == "users" else self.bq_3_2_sessions_by_day)(start=s_dt, end=e_dt)
+        else:
+            column = "user_id" if metric == "users" else "session_id"
+            rows = await self.events.distinct_by_period(unit=window, column=column, start=s_dt, end=e_dt)
+        by_period = {r[0]: int(r[1]) for r in rows}
+
+        def _trunc(d: date) -> date:
+            if window == "week":
+                return d - timedelta(days=d.weekday())
+            return d.replace(day=1) if window == "month" else d
+        return [(s, e, by_period.get(_trunc(s), 0), False) for s, e in buckets(start, end, window)]
+
+    # Export en streaming
+    async def stream_bq(self, name: str, *, start: datetime, end: datetime,
+                        max_idle_sec: int = 300) -> AsyncIterator[list]:
+        """
+        Filas de la BQ en lotes: los tramos crudos salen de un cursor de servidor; los tramos de rollup
+        (acotados por días x dimensiones) en un solo lote. 1.2 y 2.4 se agregan y salen en un lote.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        if name == "bq_2_4":
+            yield list(await self.bq_2_4_time_by_screen(start=start, end=end, max_idle_sec=max_idle_sec))
+            return
+        if name == "bq_1_2":
+            yield list(await self.bq_1_2_escrow_cancel_rate(start=start, end=end))
+            return
+        for kind, (s, e) in await self._segments(start, end):
+            if kind == "raw":
+                async for batch in self.events.stream_bq(name, start=s, end=e):
+                    yield batch
+            else:
+                yield list(await getattr(self.rollups, _DAILY_METHODS[name])(start=s, end=e))
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import time
+import typing
+from datetime import datetime, time as dtime, timezone
+from typing import Any, Awaitable, Callable
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.services import cache
+from app.services.http_cache import make_etag
+
+log = logging.getLogger(__name__)
+
+_KEY_PREFIX = "analytics:resp:v2:"  # v2: el cuerpo se guarda ya serializado
+_LOCK_TTL = 30          # segundos; cota del cálculo de una respuesta
+_WAIT_TIMEOUT = 10.0    # cuánto espera un proceso a que otro llene la caché antes de calcular él mismo
+_WAIT_STEP = 0.05
+
+# single-flight dentro del proceso: key -> cálculo en curso
+_inflight: dict[str, asyncio.Task] = {}
+
+def _normalize_dt(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def _cache_params(name: str, kwargs: dict) -> tuple[str, int] | None:
+    """
+    Clave (endpoint + rango normalizado + demás parámetros simples) y TTL según si el rango
+    ya cerró (termina antes de hoy UTC) o incluye hoy. None si el rango no es válido
+    (el handler responde el 400 de siempre).
+    """
+    try:
+        start, end = _normalize_dt(kwargs["start"]), _normalize_dt(kwargs["end"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    params = {k: v for k, v in kwargs.items() if isinstance(v, (str, int, float, bool)) and k not in ("start", "end")}
+    params["start"], params["end"] = start.isoformat(), end.isoformat()
+    digest = hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    today = datetime.combine(datetime.now(timezone.utc).date(), dtime.min, tzinfo=timezone.utc)
+    ttl = settings.analytics_cache_ttl_closed if end <= today else settings.analytics_cache_ttl_open
+    return f"{_KEY_PREFIX}{name}:{digest}", ttl
+
+async def _fill(key: str, ttl: int, compute: Callable[[], Awaitable[Any]]) -> dict:
+    """
+    Lee la caché y, si falta, calcula una sola vez entre procesos: quien obtiene el lock calcula
+    y guarda; el resto espera el valor (con timeout). Sin Redis, calcula directamente.
+    """
+    async def _build() -> dict:
+        # orjson serializa dicts/listas/fechas nativamente; jsonable_encoder solo para lo que no conoce
+        raw = orjson.dumps(await compute(), default=jsonable_encoder, option=orjson.OPT_UTC_Z)
+        return {"etag": make_etag(raw), "body": raw.decode()}
+
+    try:
+        hit = await cache.get_json(key)
+        if hit is not None:
+            return hit
+        lock = f"{key}:lock"
+        if await cache.set_if_absent(lock, 1, _LOCK_TTL):
+            try:
+                entry = await _build()
+                await cache.set_json(key, entry, ttl)
+                return entry
+            finally:
+                await cache.delete(lock)
+        deadline = time.monotonic() + _WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(_WAIT_STEP)
+            hit = await cache.get_json(key)
+            if hit is not None:
+                return hit
+    except RedisError as e:
+        log.warning("analytics cache unavailable: %s", e)
+    return await _build()
+
+def _not_modified(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = {t.strip().removeprefix("W/").strip('"') for t in inm.split(",")}
+    return etag in tags or "*" in tags
+
+def cached_analytics(name: str):
+    """
+    Decorador para handlers `/analytics/*` que reciben `start`/`end` ISO:
+    - caché en Redis por endpoint + rango normalizado (TTL largo para rangos cerrados, corto si incluyen hoy);
+    - single-flight: peticiones concurrentes con la misma clave comparten un solo cálculo;
+    - ETag (make_etag del cuerpo) y 304 con If-None-Match.
+    Inyecta el Request en la firma que ve FastAPI; el handler no necesita declararlo.
+    """
+    def deco(fn: Callable[..., Awaitable[Any]]):
+        hints = typing.get_type_hints(fn, include_extras=True)
+        sig = inspect.signature(fn)
+        params = [p.replace(annotation=hints.get(p.name, p.annotation)) for p in sig.parameters.values()]
+        params.append(inspect.Parameter("_analytics_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, _analytics_request: Request, **kwargs):
+            keyed = _cache_params(name, kwargs)
+            if keyed is None or kwargs.get("fmt", "json") != "json":  # exports en streaming: sin caché
+                return await fn(*args, **kwargs)
+            key, ttl = keyed
+
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(_fill(key, ttl, lambda: fn(*args, **kwargs)))
+                _inflight[key] = task
+                task.add_done_callback(lambda _t: _inflight.pop(key, None))
+            entry = await asyncio.shield(task)
+
+            headers = {"ETag": f'"{entry["etag"]}"', "Cache-Control": f"private, max-age={ttl}"}
+            if _not_modified(_analytics_request, entry["etag"]):
+                return Response(status_code=304, headers=headers)
+            return Response(entry["body"], media_type="application/json", headers=headers)
+
+        wrapper.__signature__ = sig.replace(parameters=params, return_annotation=inspect.Signature.empty)
+        return wrapper
+    return deco
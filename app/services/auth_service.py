@@ -34,6 +34,17 @@ def make_token_pair(user: User) -> dict:
 def decode_token(token: str) -> dict:
     return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
 
+def access_token_subject(token: str | None) -> str | None:
+    """`sub` de un access token válido; None si no hay token o no es válido."""
+    if not token:
+        return None
+    try:
+        payload = decode_token(token)
+    except Exception:
+        return None
+    sub = payload.get("sub") if payload.get("typ") == "access" else None
+    return str(sub) if sub else None
+
 async def register_user(db: AsyncSession, *, name: str, email: str, password: str, campus: str | None) -> User:
     repo = UserRepository(db)
     existing = await repo.get_by_email(email)
@@ -22,6 +22,10 @@ def _dumps(obj: Any) -> bytes:
 def _loads(data: bytes) -> Any:
     return orjson.loads(data)
 
+async def client() -> Redis:
+    """Cliente compartido (bytes) para pipelines de otros servicios."""
+    return await _get_client()
+
 async def get_json(key: str) -> Any | None:
     r = await _get_client()
     val = await r.get(key)
@@ -35,6 +39,20 @@ async def set_json(key: str, value: Any, ttl_seconds: int | None = None) -> None
     else:
         await r.set(key, data)
 
+async def incr(key: str) -> int:
+    r = await _get_client()
+    return int(await r.incr(key))
+
+async def get_int(key: str) -> int:
+    r = await _get_client()
+    val = await r.get(key)
+    return int(val) if val is not None else 0
+
+async def set_if_absent(key: str, value: Any, ttl_seconds: int) -> bool:
+    """SET NX con TTL (locks cortos); True si la clave se creó."""
+    r = await _get_client()
+    return bool(await r.set(key, _dumps(value), ex=ttl_seconds, nx=True))
+
 async def delete(key: str) -> None:
     r = await _get_client()
     await r.delete(key)
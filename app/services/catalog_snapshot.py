@@ -0,0 +1,114 @@
+from __future__ import annotations
+import zlib
+from typing import Iterable
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.listing import Listing
+from app.repositories.catalog_change_repo import CatalogChangeRepository
+from app.services.sync_service import brand_out, category_out, listing_out
+
+try:  # opcional: variante zstd del snapshot
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Snapshot completo del catálogo por versión del change log:
+#   {"version": V, "categories": [...], "brands": [...], "listings": [...]}
+# comprimido una vez (gzip y, si está instalado, zstd). El cliente lo descarga en el arranque en frío
+# y sigue con /sync/delta?cursor=V.
+LATEST_KEY = "sync:snapshot:latest"
+S3_PREFIX = "sync/snapshots/"
+_EXT = {"gzip": "gz", "zstd": "zst"}
+_BATCH = 1_000
+
+def encodings() -> list[str]:
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+def snapshot_key(version: int, encoding: str) -> str:
+    return f"sync:snapshot:{version}:{encoding}"
+
+def s3_key(version: int, encoding: str) -> str:
+    return f"{S3_PREFIX}catalog-{version}.json.{_EXT[encoding]}"
+
+class _Compressors:
+    """Comprime en streaming a todas las codificaciones a la vez (sin armar el JSON completo en memoria)."""
+    def __init__(self) -> None:
+        self._parts: dict[str, list[bytes]] = {enc: [] for enc in encodings()}
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+        self._zstd = zstandard.ZstdCompressor(level=10).compressobj() if zstandard is not None else None
+
+    def feed(self, data: bytes) -> None:
+        self._parts["gzip"].append(self._gzip.compress(data))
+        if self._zstd is not None:
+            self._parts["zstd"].append(self._zstd.compress(data))
+
+    def finish(self) -> dict[str, bytes]:
+        self._parts["gzip"].append(self._gzip.flush())
+        if self._zstd is not None:
+            self._parts["zstd"].append(self._zstd.flush())
+        return {enc: b"".join(parts) for enc, parts in self._parts.items()}
+
+def _array(out: _Compressors, rows: Iterable[dict], first: bool) -> bool:
+    chunk = b",".join(orjson.dumps(r) for r in rows)
+    if chunk:
+        out.feed(chunk if first else b"," + chunk)
+        return False
+    return first
+
+async def build(db: AsyncSession) -> tuple[int, dict[str, bytes]]:
+    """
+    Lee la versión antes que los datos: el snapshot puede traer cambios posteriores a V (el delta
+    los vuelve a aplicar, son upserts idempotentes) pero nunca un estado anterior a V.
+    """
+    version = await CatalogChangeRepository(db).head()
+    out = _Compressors()
+
+    cats = (await db.execute(select(Category).order_by(Category.name))).scalars().all()
+    brands = (await db.execute(select(Brand).order_by(Brand.name))).scalars().all()
+    out.feed(b'{"version":%d,"categories":' % version)
+    out.feed(orjson.dumps([category_out(c) for c in cats]))
+    out.feed(b',"brands":')
+    out.feed(orjson.dumps([brand_out(b) for b in brands]))
+
+    out.feed(b',"listings":[')
+    stmt = (
+        select(Listing)
+        .where(Listing.deleted_at.is_(None))
+        .order_by(Listing.id)
+        .execution_options(yield_per=_BATCH)
+    )
+    first = True
+    result = await db.stream_scalars(stmt)
+    async for part in result.partitions():
+        first = _array(out, (listing_out(l) for l in part), first)
+    out.feed(b"]}")
+    return version, out.finish()
+
+async def store(redis: Redis, version: int, blobs: dict[str, bytes]) -> None:
+    """Guarda las variantes y mueve el puntero `latest` al final (los lectores nunca ven uno a medias)."""
+    ttl = settings.sync_snapshot_ttl_s
+    pipe = redis.pipeline(transaction=False)
+    for enc, body in blobs.items():
+        pipe.set(snapshot_key(version, enc), body, ex=ttl)
+    pipe.set(LATEST_KEY, version, ex=ttl)
+    await pipe.execute()
+
+async def latest(redis: Redis) -> int | None:
+    val = await redis.get(LATEST_KEY)
+    return int(val) if val is not None else None
+
+async def load(redis: Redis, version: int, encoding: str) -> bytes | None:
+    return await redis.get(snapshot_key(version, encoding))
+
+def pick_encoding(accept_encoding: str | None) -> str | None:
+    """zstd si el cliente la acepta y existe, si no gzip; None si no acepta ninguna."""
+    accepted = {t.split(";")[0].strip().lower() for t in (accept_encoding or "").split(",")}
+    for enc in encodings():
+        if enc in accepted or "*" in accepted:
+            return enc
+    return None
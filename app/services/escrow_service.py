@@ -2,7 +2,7 @@ from __future__ import annotations
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.enums import EscrowStatus
 from app.repositories.escrow_repo import EscrowRepository
-from app.repositories.events_repo import EventRepository  
+from app.services.event_emitter import emitter
 from typing import Optional
 
 async def create_escrow(db: AsyncSession, *, order_id: str, provider: str = "mock") -> str:
@@ -28,13 +28,12 @@ async def emit_escrow_step_event(db: AsyncSession, *, escrow_id: str, step: str,
     if not e:
         return
     await escrows.add_event(escrow_id=escrow_id, step=step, result=result)
-    repo = EventRepository(db)
-    await repo.insert_batch([{
+    emitter.emit_after_commit(db, {
         "event_type": "escrow.step",
-        "session_id": "srv",  
+        "session_id": "srv",
         "user_id": None,
         "order_id": e.order_id,
         "step": step,
         "properties": {},
-    }])
+    })
     await db.flush()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Any, Mapping
+from sqlalchemy import event as sa_event
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.db.session import AsyncSessionLocal
+from app.repositories.events_repo import EventRepository
+from app.services.live_counters import record_events
+
+log = logging.getLogger(__name__)
+
+class EventEmitter:
+    """
+    Emisor de eventos de servidor fuera de la transacción del request.
+    - `emit()` es síncrono y no bloquea: encola en una cola acotada (si está llena, descarta y cuenta).
+    - Un flusher en background escribe en bloque cuando se acumulan `flush_size` eventos
+      o cada `flush_interval` segundos, en su propia sesión.
+    - `emit_after_commit()` difiere el evento hasta que la transacción de la sesión confirme
+      (si hace rollback, se descarta).
+    Las métricas son por proceso (cada worker de uvicorn tiene su emisor).
+    """
+
+    def __init__(self, *, max_queue: int = 10_000, flush_size: int = 500, flush_interval: float = 1.0) -> None:
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[dict] | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.emitted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    # ---------------- API ----------------
+    def emit(self, event: Mapping[str, Any]) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(dict(event))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.emitted += 1
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def emit_after_commit(self, db: AsyncSession, event: Mapping[str, Any]) -> None:
+        db.sync_session.info.setdefault(_PENDING_KEY, []).append(dict(event))
+
+    def emit_many(self, events: list[Mapping[str, Any]]) -> int:
+        return sum(1 for e in events if self.emit(e))
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_max": self.max_queue,
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Pide al flusher que vacíe la cola y termine (shutdown); no interrumpe un flush en curso."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._stopping = False
+
+    # ---------------- internos ----------------
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while not self._queue.empty():
+                await self._flush()
+                if self._queue.qsize() < self.flush_size and not self._stopping:
+                    break
+        while not self._queue.empty():
+            await self._flush()
+
+    async def _insert(self, batch: list[dict]) -> list[dict]:
+        """
+        Escribe el lote; ante un error permanente de datos (FK inválida, valor fuera de tipo) lo parte
+        en mitades hasta aislar las filas malas, que se descartan. Retorna los eventos escritos.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await EventRepository(db).insert_batch(batch)
+                await db.commit()
+            return batch
+        except (IntegrityError, DataError) as e:
+            if len(batch) == 1:
+                self.dropped += 1
+                log.warning("event emitter dropped invalid event %s: %s", batch[0].get("event_type"), e.orig)
+                return []
+            mid = len(batch) // 2
+            return await self._insert(batch[:mid]) + await self._insert(batch[mid:])
+
+    async def _flush(self) -> None:
+        batch: list[dict] = []
+        while len(batch) < self.flush_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if not batch:
+            return
+
+        t0 = time.perf_counter()
+        try:
+            written = await self._insert(batch)
+            self.flushed += len(written)
+        except Exception:
+            self.flush_errors += 1
+            self.dropped += len(batch)
+            log.exception("event emitter flush failed (%d events dropped)", len(batch))
+        else:
+            if written:
+                await record_events(None, written)
+        finally:
+            self.last_flush_ms = (time.perf_counter() - t0) * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+emitter = EventEmitter()
+
+# eventos diferidos por emit_after_commit: viven en Session.info hasta el commit/rollback de la sesión
+_PENDING_KEY = "emitter_pending"
+
+@sa_event.listens_for(Session, "after_commit")
+def _emit_pending(session: Session) -> None:
+    emitter.emit_many(session.info.pop(_PENDING_KEY, []))
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,27 +1,116 @@
 from __future__ import annotations
-from typing import Dict
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+from sqlalchemy import event as sa_event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from sqlalchemy import select
 from app.models.feature import Feature, FeatureFlag
-from app.repositories.feature_repo import FeatureRepository, FeatureFlagRepository
-from app.repositories.events_repo import EventRepository
+from app.services import cache
+from app.services.event_emitter import emitter
 
-async def get_feature_flags(db: AsyncSession) -> Dict[str, bool]:
-    fr = FeatureRepository(db)
-    flags = (await db.execute(select(Feature))).scalars().all()
+log = logging.getLogger(__name__)
+
+FLAGS_VERSION_KEY = "features:version"
+_VERSION_CHECK_SEC = 2.0   # cada cuánto se consulta el version stamp en Redis
+FLAGS_MAX_AGE_SEC = 60.0        # recarga forzada aunque nadie haya bumpeado la versión
+
+# Snapshot por proceso: {feature_key: {"global": bool|None, "campus": {campus: bool}, "user": {user_id: bool}}}
+_snapshot: Dict[str, Dict[str, Any]] | None = None
+_snapshot_version: int | None = None
+_loaded_at = 0.0
+_checked_at = 0.0
+
+async def _load_snapshot(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    """Una sola consulta: features LEFT JOIN flags habilitados/deshabilitados de todos los scopes."""
+    stmt = (
+        select(Feature.key, FeatureFlag.scope, FeatureFlag.target, FeatureFlag.enabled)
+        .outerjoin(FeatureFlag, FeatureFlag.feature_id == Feature.id)
+        .order_by(Feature.key, FeatureFlag.created_at)
+    )
+    snap: Dict[str, Dict[str, Any]] = {}
+    for key, scope, target, enabled in (await db.execute(stmt)).all():
+        entry = snap.setdefault(key, {"global": None, "campus": {}, "user": {}})
+        if scope == "global":
+            # varias filas global: gana cualquiera habilitada (mismo criterio que antes)
+            entry["global"] = bool(entry["global"]) or bool(enabled)
+        elif scope in ("campus", "user") and target:
+            entry[scope][target] = bool(enabled)
+    return snap
+
+async def _current_version() -> int | None:
+    try:
+        return await cache.get_int(FLAGS_VERSION_KEY)
+    except Exception as e:
+        log.warning("feature flags version unavailable: %s", e)
+        return None
+
+async def get_flags_snapshot(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    global _snapshot, _snapshot_version, _loaded_at, _checked_at
+    now = time.monotonic()
+    if _snapshot is not None and now - _checked_at < _VERSION_CHECK_SEC:
+        return _snapshot
+
+    _checked_at = now
+    version = await _current_version()
+    stale = _snapshot is None or now - _loaded_at > FLAGS_MAX_AGE_SEC or (version is not None and version != _snapshot_version)
+    if stale:
+        _snapshot = await _load_snapshot(db)
+        _snapshot_version = version
+        _loaded_at = now
+    return _snapshot
+
+async def bump_flags_version() -> None:
+    """Llamar tras crear/modificar flags: todos los workers recargan en <= _VERSION_CHECK_SEC."""
+    try:
+        await cache.incr(FLAGS_VERSION_KEY)
+    except Exception as e:
+        log.warning("could not bump feature flags version: %s", e)
+
+# Cualquier escritura ORM de Feature/FeatureFlag bumpea la versión al confirmar la transacción,
+# así ningún camino de escritura depende solo de FLAGS_MAX_AGE_SEC (que queda para ediciones por SQL).
+_DIRTY_KEY = "feature_flags_dirty"
+_bump_tasks: set[asyncio.Task] = set()
+
+@sa_event.listens_for(Session, "after_flush")
+def _mark_flags_dirty(session: Session, _ctx) -> None:
+    if any(isinstance(o, (Feature, FeatureFlag)) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+@sa_event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        task = asyncio.get_running_loop().create_task(bump_flags_version())
+        _bump_tasks.add(task)
+        task.add_done_callback(_bump_tasks.discard)
+
+@sa_event.listens_for(Session, "after_rollback")
+def _clear_flags_dirty(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+
+def evaluate_flags(
+    snapshot: Dict[str, Dict[str, Any]], *, user_id: str | None = None, campus: str | None = None
+) -> Dict[str, bool]:
+    """Precedencia: user > campus > global. Sin flag => deshabilitado."""
     out: Dict[str, bool] = {}
-    for f in flags:
-        q = select(FeatureFlag).where(FeatureFlag.feature_id == f.id, FeatureFlag.scope == "global", FeatureFlag.enabled.is_(True))
-        enabled = (await db.execute(q)).scalars().first() is not None
-        out[f.key] = enabled
+    for key, entry in snapshot.items():
+        if user_id and user_id in entry["user"]:
+            out[key] = entry["user"][user_id]
+        elif campus and campus in entry["campus"]:
+            out[key] = entry["campus"][campus]
+        else:
+            out[key] = bool(entry["global"])
     return out
 
+async def get_feature_flags(db: AsyncSession, *, user_id: str | None = None, campus: str | None = None) -> Dict[str, bool]:
+    return evaluate_flags(await get_flags_snapshot(db), user_id=user_id, campus=campus)
+
 async def register_feature_use(db: AsyncSession, *, user_id: str | None, feature_key: str) -> None:
-    ev = EventRepository(db)
-    await ev.insert_batch([{
+    emitter.emit({
         "event_type": "feature.used",
         "session_id": "srv",
         "user_id": user_id,
         "properties": {"feature_key": feature_key},
-    }])
-    await db.flush()
+    })
@@ -3,20 +3,17 @@ import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Sequence, Tuple
 from app.models.listing import Listing
+from app.repositories.listing_repo import geog_point
 
 async def listings_within_radius(
     db: AsyncSession, *, lat: float, lon: float, radius_km: float, limit: int = 50
 ) -> Sequence[Listing]:
-    radius_m = radius_km * 1000.0
-    dist = sa.func.ST_DistanceSphere(
-        sa.func.ST_MakePoint(Listing.longitude, Listing.latitude),
-        sa.func.ST_MakePoint(lon, lat),
-    )
+    origin = geog_point(lat, lon)
     stmt = (
         sa.select(Listing)
         .where(Listing.is_active.is_(True))
-        .where(dist <= radius_m)
-        .order_by(dist.asc(), Listing.created_at.desc())
+        .where(sa.func.ST_DWithin(Listing.geog, origin, radius_km * 1000.0))
+        .order_by(Listing.geog.op("<->", return_type=sa.Float)(origin), Listing.created_at.desc())
         .limit(limit)
     )
     res = await db.execute(stmt)
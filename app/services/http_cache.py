@@ -1,7 +1,18 @@
 from __future__ import annotations
 import hashlib
+import time
 from datetime import datetime, timezone
-from typing import Any, Tuple
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from uuid import UUID
+from starlette.requests import Request
+from app.db.session import AsyncSessionLocal
+from app.repositories.catalog_change_repo import CatalogChangeRepository
+from app.repositories.listing_photo_repo import ListingPhotoRepository
+from app.services import cache
+from app.services.auth_service import access_token_subject
+from app.services.principal_cache import get_principal
+from app.services.feature_service import FLAGS_MAX_AGE_SEC, FLAGS_VERSION_KEY
+from app.services.sync_service import resolve_cursor
 
 def make_etag(payload: Any) -> str:
     if isinstance(payload, (bytes, bytearray)):
@@ -18,3 +29,59 @@ def last_modified_now() -> str:
 
 def etag_headers(payload: Any) -> dict:
     return {"ETag": make_etag(payload), "Last-Modified": last_modified_now()}
+
+# ---------------- Validadores por ruta (ConditionalRequestMiddleware) ----------------
+# Cada validador devuelve un token de versión barato (o None = sin validación) ANTES de que corra
+# la ruta; el middleware deriva el ETag del token y responde 304 sin ejecutar el handler.
+Validator = Callable[[Request], Awaitable[Optional[str]]]
+
+def catalog_entity_validator(entity: str) -> Validator:
+    """Listados de categorías / marcas: última versión del tipo en el change log."""
+    async def _validator(request: Request) -> str | None:
+        async with AsyncSessionLocal() as db:
+            return f"{entity}:{await CatalogChangeRepository(db).entity_head(entity)}"
+    return _validator
+
+async def listing_validator(request: Request) -> str | None:
+    """Detalle de listing: versión del listing en el change log + sello de sus fotos."""
+    listing_id = request.path_params.get("listing_id", "")
+    try:
+        UUID(listing_id)
+    except ValueError:
+        return None
+    async with AsyncSessionLocal() as db:
+        version = await CatalogChangeRepository(db).entity_version("listing", listing_id)
+        if version is None:  # inexistente o borrado: que la ruta responda el 404
+            return None
+        return f"{version}:{await ListingPhotoRepository(db).photos_stamp(listing_id)}"
+
+async def flags_validator(request: Request) -> str | None:
+    """
+    Feature flags: principal (usuario + campus, o anónimo) + version stamp de Redis + ventana de recarga
+    forzada del snapshot por proceso.
+    """
+    auth = request.headers.get("authorization", "")
+    user_id = access_token_subject(auth[7:].strip()) if auth.lower().startswith("bearer ") else None
+    try:
+        version = await cache.get_int(FLAGS_VERSION_KEY)
+        campus = None
+        if user_id:
+            async with AsyncSessionLocal() as db:  # sesión perezosa: con hit del principal no abre conexión
+                user = await get_principal(db, user_id)
+            campus = user.campus if user else None
+            user_id = user_id if user else None
+    except Exception:
+        return None
+    return f"{user_id or '-'}:{campus or '-'}:{version}:{int(time.time() // FLAGS_MAX_AGE_SEC)}"
+
+async def sync_delta_validator(request: Request) -> str | None:
+    """Delta sync: el contenido de la página queda fijado por (cursor, limit, versión del catálogo)."""
+    q = request.query_params
+    try:
+        cursor = int(q["cursor"]) if q.get("cursor") else None
+        since = datetime.fromisoformat(q["since"].replace("Z", "+00:00")) if q.get("since") else None
+    except ValueError:
+        return None
+    async with AsyncSessionLocal() as db:
+        start = await resolve_cursor(db, cursor=cursor, since=since)
+        return f"{start}:{await CatalogChangeRepository(db).head()}"
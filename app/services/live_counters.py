@@ -0,0 +1,113 @@
+from __future__ import annotations
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Iterable, Literal, Mapping
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.services import cache
+
+log = logging.getLogger(__name__)
+
+Resolution = Literal["minute", "hour"]
+
+# Un HASH por bucket: live:minute:<epoch inicio> / live:hour:<epoch inicio>, campos "<grupo>:<valor>".
+# El TTL de cada bucket es su ventana de retención, así que los viejos desaparecen solos.
+_STEP: dict[Resolution, int] = {"minute": 60, "hour": 3600}
+GROUPS = {"event": "event_types", "click": "clicks", "listing": "listings_by_category", "order": "orders_by_status"}
+_UNKNOWN = "(unknown)"
+
+def retention(res: Resolution) -> int:
+    """Buckets que se conservan por resolución."""
+    return settings.live_minute_buckets if res == "minute" else settings.live_hour_buckets
+
+def bucket_start(res: Resolution, ts: float) -> int:
+    return int(ts) - int(ts) % _STEP[res]
+
+def bucket_key(res: Resolution, start: int) -> str:
+    return f"live:{res}:{start}"
+
+def _ts(occurred_at: Any) -> float:
+    # Contadores "en vivo": eventos con occurred_at muy atrasado cuentan en el bucket de llegada
+    now = time.time()
+    if isinstance(occurred_at, str):
+        occurred_at = datetime.fromisoformat(occurred_at.replace("Z", "+00:00"))
+    if isinstance(occurred_at, datetime):
+        if occurred_at.tzinfo is None:
+            occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+        ts = occurred_at.timestamp()
+        return ts if now - _STEP["hour"] <= ts <= now else now
+    return now
+
+def _fields(e: Mapping[str, Any]) -> list[str]:
+    et = e.get("event_type") or _UNKNOWN
+    props = e.get("properties") or {}
+    out = [f"event:{et}"]
+    if et == "ui.click":
+        out.append(f"click:{props.get('button') or _UNKNOWN}")
+    elif et == "listing.created":
+        out.append(f"listing:{props.get('category_id') or _UNKNOWN}")
+    return out
+
+def _add(pipe: Pipeline, counts: Mapping[tuple[float, str], int]) -> None:
+    per_key: dict[str, Counter] = {}
+    for res in _STEP:
+        for (ts, field), n in counts.items():
+            per_key.setdefault(bucket_key(res, bucket_start(res, ts)), Counter())[field] += n
+    for key, fields in per_key.items():
+        res = key.split(":")[1]
+        for field, n in fields.items():
+            pipe.hincrby(key, field, n)
+        pipe.expire(key, (retention(res) + 1) * _STEP[res])
+
+def add_events(pipe: Pipeline, events: Iterable[Mapping[str, Any]]) -> None:
+    """Encola en `pipe` los HINCRBY (+ EXPIRE) de tipo de evento, botón y categoría del lote."""
+    counts: Counter = Counter()
+    for e in events:
+        ts = _ts(e.get("occurred_at"))
+        for field in _fields(e):
+            counts[(ts, field)] += 1
+    _add(pipe, counts)
+
+async def record_events(redis: Redis | None, events: Iterable[Mapping[str, Any]]) -> None:
+    """Best-effort: un fallo de Redis no debe tumbar la ingesta."""
+    try:
+        redis = redis or await cache.client()
+        pipe = redis.pipeline(transaction=False)
+        add_events(pipe, events)
+        await pipe.execute()
+    except RedisError as e:
+        log.warning("could not update live counters: %s", e)
+
+async def record_order_status(status: Any) -> None:
+    """Cuenta una orden que entró a `status` (llamar después del commit)."""
+    value = getattr(status, "value", status)
+    try:
+        pipe = (await cache.client()).pipeline(transaction=False)
+        _add(pipe, {(time.time(), f"order:{value}"): 1})
+        await pipe.execute()
+    except RedisError as e:
+        log.warning("could not update live counters: %s", e)
+
+def _decode(v: Any) -> str:
+    return v.decode() if isinstance(v, bytes) else v
+
+async def read(redis: Redis, *, res: Resolution, last: int) -> list[tuple[int, dict[str, dict[str, int]]]]:
+    """Los últimos `last` buckets (incluido el actual), del más viejo al más nuevo, en un round trip."""
+    current = bucket_start(res, time.time())
+    starts = [current - i * _STEP[res] for i in range(last - 1, -1, -1)]
+    pipe = redis.pipeline(transaction=False)
+    for s in starts:
+        pipe.hgetall(bucket_key(res, s))
+    out = []
+    for s, raw in zip(starts, await pipe.execute()):
+        groups: dict[str, dict[str, int]] = {name: {} for name in GROUPS.values()}
+        for field, n in raw.items():
+            prefix, _, value = _decode(field).partition(":")
+            if prefix in GROUPS:
+                groups[GROUPS[prefix]][value] = int(n)
+        out.append((s, groups))
+    return out
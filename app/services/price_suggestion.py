@@ -1,9 +1,13 @@
 from __future__ import annotations
 from typing import Optional, Dict, Any, Tuple
 import os, json
+from datetime import datetime, timedelta, timezone
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.models.listing import Listing
+from app.models.price_quantile import ALL
+from app.repositories.price_quantile_repo import PriceQuantileRepository
 
 # ---------- Priors en memoria / archivo (sin DB) ----------
 _DEFAULT_PRIORS = {
@@ -83,6 +87,47 @@ async def _get_sample_quantiles(
         return None, None, None, n
     return int(p25), int(p50), int(p75), n
 
+_MIN_CONDITION_N = 5  # mínimo de muestra para preferir la fila por condición
+
+async def _get_stored_quantiles(
+    db: AsyncSession,
+    *,
+    category_id: str,
+    brand_id: Optional[str],
+    condition: Optional[str],
+) -> Optional[Tuple[Optional[int], Optional[int], Optional[int], int]]:
+    """
+    Cuantiles desde la tabla pricequantile (una lectura indexada).
+    Retorna None si el store está vacío o desactualizado (el llamador recalcula en vivo).
+    """
+    rows, last_refresh = await PriceQuantileRepository(db).lookup(
+        category_id=category_id, brand_id=brand_id, condition=condition
+    )
+    max_age = timedelta(minutes=settings.price_quantile_max_age_min)
+    if last_refresh is None or datetime.now(timezone.utc) - last_refresh > max_age:
+        return None
+    by_cond = {r.condition_key: r for r in rows}
+    row = by_cond.get(condition) if condition else None
+    if row is None or row.n < _MIN_CONDITION_N:
+        row = by_cond.get(ALL)
+    if row is None:
+        # store vigente sin fila: no hay listings activos en la ventana
+        return None, None, None, 0
+    return row.p25, row.p50, row.p75, row.n
+
+async def _get_live_quantiles(
+    db: AsyncSession,
+    where: list,
+    *,
+    condition: Optional[str],
+) -> Tuple[Optional[int], Optional[int], Optional[int], int]:
+    """Cálculo en vivo con el mismo criterio que el store: por condición si hay >= _MIN_CONDITION_N, si no todas."""
+    if condition:
+        by_cond = await _get_sample_quantiles(db, where + [Listing.condition == condition])
+        if by_cond[3] >= _MIN_CONDITION_N:
+            return by_cond
+    return await _get_sample_quantiles(db, where)
+
 async def suggest_price_cents(
     db: AsyncSession,
     *,
@@ -108,9 +153,13 @@ async def suggest_price_cents(
     if brand_id:
         where.append(Listing.brand_id == brand_id)
 
-    # 1) Muestra local
+    # 1) Muestra local: store precalculado y, si no está vigente, cálculo en vivo
     try:
-        p25_loc, p50_loc, p75_loc, n = await _get_sample_quantiles(db, where)
+        stored = await _get_stored_quantiles(db, category_id=category_id, brand_id=brand_id, condition=condition)
+        if stored is not None:
+            p25_loc, p50_loc, p75_loc, n = stored
+        else:
+            p25_loc, p50_loc, p75_loc, n = await _get_live_quantiles(db, where, condition=condition)
     except Exception:
         # por si el dialecto no soporta ordered-set
         p25_loc, p50_loc, p75_loc, n = None, None, None, 0
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.repositories.user_repo import UserRepository
+from app.services import cache
+
+log = logging.getLogger(__name__)
+
+_FIELDS = ("id", "name", "email", "campus", "created_at", "last_login_at")
+_DT_FIELDS = ("created_at", "last_login_at")
+KEY_FMT = "principal:{user_id}"
+
+LOCAL_TTL_SEC = 30.0     # L1 por proceso; acota cuánto puede quedar viejo en otros workers
+LOCAL_MAX_SIZE = 10_000
+REDIS_TTL_SEC = 300      # L2 compartido
+
+_local: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def _to_cache(user: User) -> Dict[str, Any]:
+    # sin hashed_password: el principal cacheado solo sirve para lectura
+    return {f: getattr(user, f) for f in _FIELDS}
+
+def _to_user(data: Dict[str, Any]) -> User:
+    """User transitorio (no ligado a la sesión) con los campos del principal."""
+    d = dict(data)
+    for f in _DT_FIELDS:
+        if isinstance(d.get(f), str):
+            d[f] = datetime.fromisoformat(d[f])
+    return User(**d)
+
+def _local_get(user_id: str) -> Dict[str, Any] | None:
+    hit = _local.get(user_id)
+    if hit is None:
+        return None
+    expires, data = hit
+    if expires < time.monotonic():
+        _local.pop(user_id, None)
+        return None
+    _local.move_to_end(user_id)
+    return data
+
+def _local_set(user_id: str, data: Dict[str, Any]) -> None:
+    _local[user_id] = (time.monotonic() + LOCAL_TTL_SEC, data)
+    _local.move_to_end(user_id)
+    while len(_local) > LOCAL_MAX_SIZE:
+        _local.popitem(last=False)
+
+async def get_principal(db: AsyncSession, user_id: str) -> User | None:
+    """LRU local -> Redis -> DB. Retorna None si el usuario no existe."""
+    data = _local_get(user_id)
+    if data is not None:
+        return _to_user(data)
+
+    key = KEY_FMT.format(user_id=user_id)
+    try:
+        data = await cache.get_json(key)
+    except Exception as e:
+        log.warning("principal cache unavailable: %s", e)
+        data = None
+    if data is not None:
+        _local_set(user_id, data)
+        return _to_user(data)
+
+    user = await UserRepository(db).get(user_id)
+    if not user:
+        return None
+    data = _to_cache(user)
+    _local_set(user_id, data)
+    try:
+        await cache.set_json(key, data, ttl_seconds=REDIS_TTL_SEC)
+    except Exception:
+        pass
+    return user
+
+async def invalidate_principal(user_id: str) -> None:
+    """Llamar tras modificar un usuario. Otros workers expiran su L1 en <= LOCAL_TTL_SEC."""
+    _local.pop(user_id, None)
+    try:
+        await cache.delete(KEY_FMT.format(user_id=user_id))
+    except Exception as e:
+        log.warning("could not invalidate principal %s: %s", user_id, e)
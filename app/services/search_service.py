@@ -1,9 +1,70 @@
 from __future__ import annotations
+import hashlib
+import logging
 import time
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Literal, NamedTuple
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.repositories.listing_repo import ListingRepository
-from app.repositories.events_repo import EventRepository
+from app.services import cache
+from app.services.event_emitter import emitter
+
+log = logging.getLogger(__name__)
+
+TotalMode = Literal["exact", "capped", "estimate", "cached", "none"]
+
+_COUNT_VERSION_KEY = "listings:count:version"
+
+class SearchPage(NamedTuple):
+    items: list
+    total: int | None        # None en modo cursor o total_mode="none"
+    total_approx: bool       # True si total es una estimación o una cota ("1000+")
+    has_next: bool
+    next_cursor: str | None
+
+def _filters_key(filters: Dict[str, Any]) -> str:
+    norm = {k: v for k, v in filters.items() if v is not None}
+    if "q" in norm:
+        norm["q"] = norm["q"].strip().lower()
+    return hashlib.sha1(orjson.dumps(norm, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+async def invalidate_listing_totals() -> None:
+    """Invalida todos los conteos cacheados (se llama tras crear/editar/borrar listings)."""
+    try:
+        await cache.incr(_COUNT_VERSION_KEY)
+    except Exception as e:
+        log.warning("could not invalidate cached listing totals: %s", e)
+
+async def _cached_total(repo: ListingRepository, filters: Dict[str, Any]) -> int:
+    try:
+        version = await cache.get_int(_COUNT_VERSION_KEY)
+        key = f"listings:count:{version}:{_filters_key(filters)}"
+        hit = await cache.get_json(key)
+        if hit is not None:
+            return int(hit)
+    except Exception as e:
+        log.warning("listing count cache unavailable: %s", e)
+        return await repo.count_exact(**filters)
+
+    total = await repo.count_exact(**filters)
+    try:
+        await cache.set_json(key, total, ttl_seconds=settings.listing_count_ttl)
+    except Exception:
+        pass
+    return total
+
+async def _total(repo: ListingRepository, mode: TotalMode, filters: Dict[str, Any]) -> tuple[int | None, bool]:
+    if mode == "exact":
+        return await repo.count_exact(**filters), False
+    if mode == "capped":
+        n = await repo.count_capped(cap=settings.listing_count_cap, **filters)
+        return min(n, settings.listing_count_cap), n > settings.listing_count_cap
+    if mode == "estimate":
+        return await repo.count_estimate(**filters), True
+    if mode == "cached":
+        return await _cached_total(repo, filters), False
+    return None, False
 
 async def search_with_telemetry(
     db: AsyncSession,
@@ -20,23 +81,37 @@ async def search_with_telemetry(
     radius_km: float | None = None,
     page: int = 1,
     page_size: int = 20,
-) -> Tuple[list, int]:
-    """Busca y registra telemetría: search.performed + search.filter.used (para BQ 2.2 y 5.1)."""
+    use_cursor: bool = False,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
+) -> SearchPage:
+    """
+    Busca y registra telemetría: search.performed + search.filter.used (para BQ 2.2 y 5.1).
+    - Con `use_cursor` pagina por keyset y no cuenta el total.
+    - En modo página, `has_next` sale de traer page_size+1 filas; el total se calcula según
+      `total_mode` (exact | capped | estimate | cached | none; por defecto LISTING_TOTAL_MODE).
+    """
     repo = ListingRepository(db)
-    t0 = time.monotonic()
-    items, total = await repo.search(
+    filters = dict(
         q=q, category_id=category_id, brand_id=brand_id,
         min_price=min_price, max_price=max_price,
         near_lat=near_lat, near_lon=near_lon, radius_km=radius_km,
-        page=page, page_size=page_size,
     )
+    t0 = time.monotonic()
+    if use_cursor:
+        items, next_cursor = await repo.search_keyset(cursor=cursor, page_size=page_size, **filters)
+        result = SearchPage(list(items), None, False, next_cursor is not None, next_cursor)
+    else:
+        items, has_next = await repo.search_page(page=page, page_size=page_size, **filters)
+        total, approx = await _total(repo, total_mode or settings.listing_total_mode, filters)
+        result = SearchPage(list(items), total, approx, has_next, None)
     duration_ms = int((time.monotonic() - t0) * 1000)
 
-    ev_repo = EventRepository(db)
     events: List[Dict[str, Any]] = [{
         "event_type": "search.performed",
         "user_id": user_id, "session_id": session_id,
-        "properties": {"q": q or "", "duration_ms": duration_ms, "page": page, "page_size": page_size, "total": total},
+        "properties": {"q": q or "", "duration_ms": duration_ms, "page": page, "page_size": page_size,
+                       "total": result.total, "cursor": use_cursor},
     }]
 
     if category_id: events.append({"event_type": "search.filter.used","user_id": user_id,"session_id": session_id,
@@ -50,6 +125,5 @@ async def search_with_telemetry(
         events.append({"event_type":"search.filter.used","user_id":user_id,"session_id":session_id,
                        "properties":{"filter_type":"availability","near":[near_lat,near_lon],"radius_km":radius_km}})
 
-    await ev_repo.insert_batch(events)
-    await db.commit()
-    return items, total
+    emitter.emit_many(events)
+    return result
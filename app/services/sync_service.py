@@ -1,54 +1,28 @@
 from __future__ import annotations
-import hashlib
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
-import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from app.models.category import Category
 from app.models.brand import Brand
 from app.models.listing import Listing
+from app.repositories.catalog_change_repo import CatalogChangeRepository
 
 ISO8601 = "%Y-%m-%dT%H:%M:%S.%fZ"
 
+ENTITIES = {"category": "categories", "brand": "brands", "listing": "listings"}
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
-async def _max_updated_at(db: AsyncSession) -> Optional[datetime]:
-    cat_max = func.max(func.coalesce(getattr(Category, "updated_at", None) or func.now(), func.now()))
-    br_max  = func.max(func.coalesce(getattr(Brand, "updated_at", None) or func.now(), func.now()))
-    li_max  = func.max(Listing.updated_at)
-    stmt = select(func.greatest(cat_max, br_max, li_max))
-    res = await db.execute(stmt)
-    val = res.scalar()
-    return val if isinstance(val, datetime) else None
-
-def _etag_from_payload(payload: Dict[str, Any]) -> str:
-    h = hashlib.sha256()
-    h.update(repr(payload).encode("utf-8"))
-    return h.hexdigest()
-
-async def get_catalog_delta(
-    db: AsyncSession,
-    *,
-    since: Optional[datetime] = None,
-    limit: int = 200,
-) -> Tuple[Dict[str, Any], str, datetime]:
-    
-    data: Dict[str, Any] = {}
-
-    cats = (await db.execute(select(Category).order_by(Category.name))).scalars().all()
-    data["categories"] = [{"id": c.id, "slug": c.slug, "name": c.name} for c in cats]
-
+def category_out(c: Category) -> Dict[str, Any]:
+    return {"id": c.id, "slug": c.slug, "name": c.name}
 
-    brands = (await db.execute(select(Brand).order_by(Brand.name))).scalars().all()
-    data["brands"] = [{"id": b.id, "name": b.name, "slug": b.slug, "category_id": b.category_id} for b in brands]
+def brand_out(b: Brand) -> Dict[str, Any]:
+    return {"id": b.id, "name": b.name, "slug": b.slug, "category_id": b.category_id}
 
-    q = select(Listing).order_by(Listing.updated_at.desc()).limit(limit)
-    if since:
-        q = q.where(Listing.updated_at >= since)
-    listings = (await db.execute(q)).scalars().all()
-    data["listings"] = [{
+def listing_out(l: Listing) -> Dict[str, Any]:
+    return {
         "id": l.id,
         "seller_id": l.seller_id,
         "title": l.title,
@@ -66,18 +40,63 @@ async def get_catalog_delta(
         "quick_view_enabled": l.quick_view_enabled,
         "created_at": l.created_at.isoformat() if hasattr(l, "created_at") else None,
         "updated_at": l.updated_at.isoformat() if hasattr(l, "updated_at") else None,
-    } for l in listings]
+    }
+
+async def _load(db: AsyncSession, entity: str, ids: List[str]) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    if entity == "category":
+        rows = (await db.execute(select(Category).where(Category.id.in_(ids)))).scalars().all()
+        return [category_out(c) for c in rows]
+    if entity == "brand":
+        rows = (await db.execute(select(Brand).where(Brand.id.in_(ids)))).scalars().all()
+        return [brand_out(b) for b in rows]
+    rows = (await db.execute(
+        select(Listing).where(Listing.id.in_(ids), Listing.deleted_at.is_(None))
+    )).scalars().all()
+    return [listing_out(l) for l in rows]
+
+async def resolve_cursor(db: AsyncSession, *, cursor: Optional[int], since: Optional[datetime]) -> int:
+    """`cursor` (versión) manda; `since` (ISO) se traduce a versión para clientes viejos; sin ambos: desde 0."""
+    if cursor is not None:
+        return cursor
+    if since is not None:
+        return await CatalogChangeRepository(db).version_before(since)
+    return 0
+
+async def get_catalog_delta(
+    db: AsyncSession,
+    *,
+    cursor: int = 0,
+    limit: int = 500,
+) -> Tuple[Dict[str, Any], datetime]:
+    """
+    Una página del change log a partir de `cursor` (versión exclusiva): estado actual de las entidades
+    cambiadas, agrupado por tipo, más tombstones (`deleted`) de las borradas. El cliente guarda `cursor`
+    y repite mientras `has_more`. Cursor 0 = snapshot completo paginado.
+    Retorna (payload, last_modified); el ETag lo pone ConditionalRequestMiddleware (sync_delta_validator).
+    """
+    changes, has_more = await CatalogChangeRepository(db).page(after=cursor, limit=limit)
+
+    upserts: Dict[str, List[str]] = {e: [] for e in ENTITIES}
+    deleted: Dict[str, List[str]] = {name: [] for name in ENTITIES.values()}
+    for ch in changes:
+        if ch.op == "delete":
+            deleted[ENTITIES[ch.entity]].append(ch.entity_id)
+        else:
+            upserts[ch.entity].append(ch.entity_id)
+
+    data: Dict[str, Any] = {}
+    for entity, name in ENTITIES.items():
+        data[name] = await _load(db, entity, upserts[entity])
+        # borrada entre el change log y la lectura: tombstone
+        found = {row["id"] for row in data[name]}
+        deleted[name] += [i for i in upserts[entity] if i not in found]
+    data["deleted"] = deleted
 
-    last_modified = await _max_updated_at(db) or _utcnow()
-    etag = _etag_from_payload({
-        "counts": {
-            "categories": len(data["categories"]),
-            "brands": len(data["brands"]),
-            "listings": len(data["listings"]),
-        },
-        "last_modified": last_modified.isoformat(),
-    })
-    return data, etag, last_modified
+    next_cursor = changes[-1].version if changes else cursor
+    data["cursor"] = next_cursor
+    data["has_more"] = has_more
 
-def not_modified(etag_client: Optional[str], etag_server: str) -> bool:
-    return bool(etag_client) and etag_client == etag_server
+    last_modified = max((ch.changed_at for ch in changes), default=None) or _utcnow()
+    return data, last_modified
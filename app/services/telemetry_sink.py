@@ -1,13 +1,27 @@
 # app/services/telemetry.py  (o donde tengas ingest_batch)
 from __future__ import annotations
+import logging
 from datetime import datetime, timezone
 from typing import Iterable, Mapping, Any
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.repositories.events_repo import EventRepository
+from app.services.active_users import add_activity, record_activity
+from app.services.live_counters import add_events, record_events
+
+log = logging.getLogger(__name__)
+
+class TelemetryBackpressure(Exception):
+    """El stream de telemetría superó el backlog máximo; el cliente debe reintentar."""
 
 def _normalize_event(ev: Mapping[str, Any]) -> dict:
     d = dict(ev)
     d.setdefault("properties", {})
+    if "event_id" in d:
+        d["client_event_id"] = d.pop("event_id")
     occ = d.get("occurred_at")
     if isinstance(occ, str):
         d["occurred_at"] = datetime.fromisoformat(occ.replace("Z", "+00:00"))
@@ -15,9 +29,39 @@ def _normalize_event(ev: Mapping[str, Any]) -> dict:
         d["occurred_at"] = datetime.now(timezone.utc)
     return d
 
-async def ingest_batch(db: AsyncSession, events: Iterable[Mapping[str, Any]]) -> list[str]:
+async def ingest_batch(db: AsyncSession, events: Iterable[Mapping[str, Any]], *, redis: Redis | None = None) -> list[str]:
     repo = EventRepository(db)
     norm = [_normalize_event(e) for e in events]
-    ids = await repo.insert_batch(norm)
+    ids = await repo.insert_batch(norm, skip_duplicates=True)
     await db.commit()
+    if redis is not None:
+        try:
+            await record_activity(redis, norm)
+        except RedisError as e:
+            log.warning("could not update activity sketches: %s", e)
+        await record_events(redis, norm)
     return ids
+
+async def enqueue_batch(redis: Redis, events: Iterable[Mapping[str, Any]]) -> str:
+    """
+    Encola el lote en el stream de Redis (una entrada por lote) y retorna el id de la entrada.
+    El worker `jobs.telemetry_ingest` lo persiste en bloque. Lanza TelemetryBackpressure
+    si el backlog pendiente supera TELEMETRY_STREAM_MAX_BACKLOG.
+    """
+    norm = [_normalize_event(e) for e in events]
+    backlog = await redis.xlen(settings.telemetry_stream)
+    if backlog >= settings.telemetry_stream_max_backlog:
+        raise TelemetryBackpressure(backlog)
+    # XADD + sketches HLL de DAU/sesiones + contadores en vivo en un solo round trip. Solo el XADD es
+    # crítico: si falla algo posterior el lote ya está encolado y no debe caer al ingest inline (duplicaría).
+    pipe = redis.pipeline(transaction=False)
+    pipe.xadd(settings.telemetry_stream, {"events": orjson.dumps(norm)})
+    add_activity(pipe, norm)
+    add_events(pipe, norm)
+    entry_id, *rest = await pipe.execute(raise_on_error=False)
+    if isinstance(entry_id, Exception):
+        raise entry_id
+    errors = [r for r in rest if isinstance(r, Exception)]
+    if errors:
+        log.warning("could not update activity sketches / live counters (%d errors): %s", len(errors), errors[0])
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
@@ -0,0 +1,24 @@
+from __future__ import annotations
+import base64
+from typing import Any
+import orjson
+
+def encode_cursor(kind: str, value: Any, id_: str) -> str:
+    """
+    Cursor opaco para keyset pagination: base64url de {k, v, id}.
+    `kind` identifica el orden con el que se generó ("t" = created_at, "d" = distancia).
+    """
+    raw = orjson.dumps({"k": kind, "v": value, "id": id_})
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str, *, kind: str) -> tuple[Any, str]:
+    """Retorna (valor, id). Lanza ValueError si el cursor es inválido o de otro tipo de orden."""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        data = orjson.loads(base64.urlsafe_b64decode(cursor + pad))
+        k, v, id_ = data["k"], data["v"], data["id"]
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if k != kind:
+        raise ValueError("cursor does not match the requested ordering")
+    return v, str(id_)
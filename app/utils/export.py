@@ -0,0 +1,98 @@
+from __future__ import annotations
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Literal, Sequence
+from uuid import UUID
+import orjson
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+
+ExportFormat = Literal["json", "ndjson", "csv", "arrow"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+Batches = AsyncIterator[Sequence[Sequence[Any]]]
+
+def _plain(v: Any) -> Any:
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, UUID):
+        return str(v)
+    return v
+
+async def _ndjson(columns: Sequence[str], batches: Batches) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(
+            orjson.dumps(dict(zip(columns, map(_plain, row))), option=orjson.OPT_APPEND_NEWLINE)
+            for row in batch
+        )
+
+async def _csv(columns: Sequence[str], batches: Batches) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    async for batch in batches:
+        writer.writerows(
+            [v.isoformat() if isinstance(v, (date, datetime)) else _plain(v) for v in row] for row in batch
+        )
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def _arrow_type(values: list) -> "pa.DataType":
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, bool):
+        return pa.bool_()
+    if isinstance(sample, int):
+        return pa.int64()
+    if isinstance(sample, (float, Decimal)):
+        return pa.float64()
+    if isinstance(sample, datetime):
+        return pa.timestamp("us", tz="UTC") if sample.tzinfo else pa.timestamp("us")
+    if isinstance(sample, date):
+        return pa.date32()
+    return pa.string()
+
+async def _arrow(columns: Sequence[str], batches: Batches) -> AsyncIterator[bytes]:
+    """Arrow IPC stream: el esquema se fija con el primer lote; cada lote es un RecordBatch."""
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+    async for batch in batches:
+        if not batch:
+            continue
+        cols = [list(c) for c in zip(*batch)]
+        if schema is None:
+            schema = pa.schema([(name, _arrow_type(c)) for name, c in zip(columns, cols)])
+            writer = pa.ipc.new_stream(sink, schema)
+        arrays = [
+            pa.array([None if v is None else (str(v) if f.type == pa.string() else _plain(v)) for v in c], type=f.type)
+            for c, f in zip(cols, schema)
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is None:  # rango vacío: esquema de strings
+        writer = pa.ipc.new_stream(sink, pa.schema([(c, pa.string()) for c in columns]))
+    writer.close()
+    yield sink.getvalue()
+
+_WRITERS = {"ndjson": _ndjson, "csv": _csv, "arrow": _arrow}
+
+def export_response(fmt: ExportFormat, columns: Sequence[str], batches: Batches, *, filename: str) -> StreamingResponse:
+    """StreamingResponse que serializa los lotes a medida que llegan del cursor de servidor."""
+    ext = "arrows" if fmt == "arrow" else fmt
+    return StreamingResponse(
+        _WRITERS[fmt](columns, batches),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{ext}"'},
+    )
@@ -20,7 +20,13 @@ celery_app.conf.update(
     task_routes={
         "jobs.thumbnails.*": {"queue": "thumbnails"},
         "jobs.price_precompute.*": {"queue": "analytics"},
+        "jobs.price_quantiles.*": {"queue": "analytics"},
         "jobs.cleanup.*": {"queue": "maintenance"},
+        "jobs.telemetry_ingest.*": {"queue": "analytics"},
+        "jobs.analytics_rollup.*": {"queue": "analytics"},
+        "jobs.sessionize.*": {"queue": "analytics"},
+        "jobs.event_partitions.*": {"queue": "maintenance"},
+        "jobs.catalog_snapshot.*": {"queue": "maintenance"},
     },
     beat_schedule={
         "price-precompute-hourly": {
@@ -28,6 +34,41 @@ celery_app.conf.update(
             "schedule": timedelta(hours=1),
             "args": [],
         },
+        "price-quantiles-incremental": {
+            "task": "jobs.price_quantiles.refresh_price_quantiles",
+            "schedule": timedelta(minutes=10),
+            "args": [],
+        },
+        "price-quantiles-full-daily": {
+            "task": "jobs.price_quantiles.refresh_price_quantiles",
+            "schedule": timedelta(days=1),
+            "kwargs": {"full": True},
+        },
+        "analytics-rollup": {
+            "task": "jobs.analytics_rollup.refresh_rollups",
+            "schedule": timedelta(minutes=15),
+            "args": [],
+        },
+        "sessionize-dwell": {
+            "task": "jobs.sessionize.advance_dwell",
+            "schedule": timedelta(minutes=5),
+            "args": [],
+        },
+        "telemetry-drain": {
+            "task": "jobs.telemetry_ingest.drain_stream",
+            "schedule": timedelta(seconds=30),
+            "args": [],
+        },
+        "event-partitions-daily": {
+            "task": "jobs.event_partitions.maintain_event_partitions",
+            "schedule": timedelta(days=1),
+            "args": [],
+        },
+        "catalog-snapshot": {
+            "task": "jobs.catalog_snapshot.build_catalog_snapshot",
+            "schedule": timedelta(minutes=5),
+            "args": [],
+        },
         "cleanup-orphans-weekly": {
             "task": "jobs.cleanup.cleanup_orphan_objects",
             "schedule": timedelta(days=7),
@@ -1,8 +1,11 @@
 from __future__ import annotations
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
-_engine = create_async_engine(settings.database_url, future=True)
+# Cada tarea corre en su propio asyncio.run(); las conexiones asyncpg no pueden
+# reutilizarse entre event loops, así que no se mantienen en pool.
+_engine = create_async_engine(settings.database_url, future=True, poolclass=NullPool)
 _Session = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
 
 class session_scope:
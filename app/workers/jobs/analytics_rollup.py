@@ -0,0 +1,38 @@
+from __future__ import annotations
+import asyncio
+from datetime import timedelta, timezone
+from app.core.config import settings
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.analytics_rollup_repo import AnalyticsRollupRepository
+from app.repositories.event_partition_repo import retention_cutoff
+
+_DAYS_PER_TX = 7  # días recalculados por transacción
+
+@celery_app.task(name="jobs.analytics_rollup.refresh_rollups", max_retries=2, default_retry_delay=30)
+def refresh_rollups() -> dict:
+    """
+    Recalcula los rollups diarios de las BQ solo para los días cerrados tocados desde el último
+    watermark (eventos ingeridos / órdenes modificadas) y los que falten en la ventana de backfill.
+    """
+    async def _run():
+        async with session_scope() as db:
+            repo = AnalyticsRollupRepository(db)
+            run_started = await repo.now()
+            watermark = await repo.watermark()
+            today = run_started.astimezone(timezone.utc).date()
+            since = watermark - timedelta(minutes=settings.analytics_rollup_lateness_min) if watermark else None
+            days = await repo.days_to_refresh(
+                since=since,
+                first=today - timedelta(days=settings.analytics_rollup_backfill_days),
+                today=today,
+            )
+            # días fuera de la retención del event store: el rollup es la única copia, no recalcular
+            kept_from = retention_cutoff(today, settings.event_retention_months)
+            days = [d for d in days if d >= kept_from]
+
+        for i in range(0, len(days), _DAYS_PER_TX):
+            async with session_scope() as db:
+                await AnalyticsRollupRepository(db).recompute_days(days[i:i + _DAYS_PER_TX], computed_at=run_started)
+        return {"days": len(days), "first": str(days[0]) if days else None, "last": str(days[-1]) if days else None}
+    return asyncio.run(_run())
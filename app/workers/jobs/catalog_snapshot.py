@@ -0,0 +1,61 @@
+from __future__ import annotations
+import asyncio
+import logging
+import boto3
+from botocore.config import Config
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.catalog_change_repo import CatalogChangeRepository
+from app.services import catalog_snapshot
+
+log = logging.getLogger(__name__)
+
+_KEEP_S3 = 2  # versiones conservadas en S3 (la anterior sigue sirviendo URLs prefirmadas ya entregadas)
+
+_s3 = boto3.client(
+    "s3",
+    endpoint_url=settings.s3_endpoint,
+    aws_access_key_id=settings.s3_access_key,
+    aws_secret_access_key=settings.s3_secret_key,
+    region_name=settings.s3_region,
+    config=Config(signature_version="s3v4"),
+)
+
+def _upload(version: int, blobs: dict[str, bytes]) -> None:
+    for enc, body in blobs.items():
+        _s3.put_object(
+            Bucket=settings.s3_bucket, Key=catalog_snapshot.s3_key(version, enc), Body=body,
+            ContentType="application/json", ContentEncoding=enc,
+        )
+    resp = _s3.list_objects_v2(Bucket=settings.s3_bucket, Prefix=catalog_snapshot.S3_PREFIX)
+    objs = sorted(resp.get("Contents", []), key=lambda o: o["LastModified"], reverse=True)
+    stale = objs[_KEEP_S3 * len(blobs):]
+    if stale:
+        _s3.delete_objects(Bucket=settings.s3_bucket, Delete={"Objects": [{"Key": o["Key"]} for o in stale]})
+
+@celery_app.task(name="jobs.catalog_snapshot.build_catalog_snapshot", max_retries=2, default_retry_delay=30)
+def build_catalog_snapshot(force: bool = False) -> dict:
+    """
+    Serializa el catálogo completo una vez por versión del change log (orjson + gzip/zstd) y lo deja en
+    Redis (y en S3 si SYNC_SNAPSHOT_TO_S3) para el arranque en frío de /sync/snapshot.
+    No hace nada si la versión no cambió desde el último snapshot.
+    """
+    async def _run():
+        r = Redis.from_url(settings.redis_url, decode_responses=False)
+        try:
+            async with session_scope() as db:
+                head = await CatalogChangeRepository(db).head()
+                current = await catalog_snapshot.latest(r)
+                if not force and current == head:
+                    return {"version": head, "built": False}
+                version, blobs = await catalog_snapshot.build(db)
+            if settings.sync_snapshot_to_s3:
+                await asyncio.to_thread(_upload, version, blobs)
+            await catalog_snapshot.store(r, version, blobs)
+            log.info("catalog snapshot v%d: %s", version, {k: len(v) for k, v in blobs.items()})
+            return {"version": version, "built": True, "bytes": {k: len(v) for k, v in blobs.items()}}
+        finally:
+            await r.close()
+    return asyncio.run(_run())
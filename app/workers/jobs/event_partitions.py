@@ -0,0 +1,120 @@
+from __future__ import annotations
+import asyncio
+import logging
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+import boto3
+from botocore.config import Config
+from app.core.config import settings
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.events_repo import EventRepository
+from app.repositories.event_partition_repo import (
+    DEFAULT_PARTITION, EventPartitionRepository, add_months, month_floor, retention_cutoff,
+)
+
+try:  # en requirements.txt; se importa con guarda para que el resto del mantenimiento corra sin él
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "archive/events/"
+
+_s3 = boto3.client(
+    "s3",
+    endpoint_url=settings.s3_endpoint,
+    aws_access_key_id=settings.s3_access_key,
+    aws_secret_access_key=settings.s3_secret_key,
+    region_name=settings.s3_region,
+    config=Config(signature_version="s3v4"),
+)
+
+def _parquet_schema():
+    ts = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("id", pa.string()), ("event_type", pa.string()), ("user_id", pa.string()), ("session_id", pa.string()),
+        ("listing_id", pa.string()), ("order_id", pa.string()), ("chat_id", pa.string()), ("step", pa.string()),
+        ("client_event_id", pa.string()), ("properties", pa.string()), ("occurred_at", ts), ("ingested_at", ts),
+    ])
+
+async def _archive(repo: EventPartitionRepository, name: str, *, before: date | None = None,
+                   key: str | None = None) -> str:
+    """Exporta la partición (o sus filas anteriores a `before`) a Parquet por lotes y la sube a S3; retorna la key."""
+    schema = _parquet_schema()
+    key = key or f"{ARCHIVE_PREFIX}{name}.parquet"
+    with tempfile.NamedTemporaryFile(suffix=".parquet") as tmp:
+        with pq.ParquetWriter(tmp.name, schema, compression="zstd") as writer:
+            async for rows in repo.stream_partition(name, before=before):
+                cols = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+        await asyncio.to_thread(_s3.upload_file, tmp.name, settings.s3_bucket, key)
+    return key
+
+@celery_app.task(name="jobs.event_partitions.maintain_event_partitions", max_retries=2, default_retry_delay=60)
+def maintain_event_partitions() -> dict:
+    """
+    - Crea las particiones mensuales del mes actual y de los EVENT_PARTITION_PREMAKE_MONTHS siguientes.
+    - Retención: las particiones anteriores a EVENT_RETENTION_MONTHS se archivan (si EVENT_ARCHIVE_TO_S3),
+      se desadjuntan y se eliminan; las filas vencidas de la partición default se archivan (mismo criterio)
+      y se purgan.
+    - Purga los ids de cliente de `eventclientkey` más viejos que TELEMETRY_DEDUP_DAYS.
+    Cada partición se procesa en su propia transacción.
+    """
+    async def _run():
+        today = datetime.now(timezone.utc).date()
+        current = month_floor(today)
+        created, dropped, archived, skipped = [], [], [], []
+
+        for i in range(settings.event_partition_premake_months + 1):
+            async with session_scope() as db:
+                if await EventPartitionRepository(db).ensure_month(add_months(current, i)):
+                    created.append(str(add_months(current, i)))
+
+        cutoff = retention_cutoff(today, settings.event_retention_months)
+        async with session_scope() as db:
+            expired = [name for m, name in await EventPartitionRepository(db).monthly_partitions()
+                       if add_months(m, 1) <= cutoff]
+
+        for name in expired:
+            if settings.event_archive_to_s3 and pa is None:
+                # sin pyarrow no se puede archivar: conservar la partición antes que perder datos
+                log.error("EVENT_ARCHIVE_TO_S3 is set but pyarrow is not installed "
+                          "(pip install -r requirements.txt); keeping expired partition %s", name)
+                skipped.append(name)
+                continue
+            async with session_scope() as db:
+                repo = EventPartitionRepository(db)
+                if settings.event_archive_to_s3:
+                    archived.append(await _archive(repo, name))
+                await repo.detach_and_drop(name)
+            dropped.append(name)
+
+        # la partición default guarda la historia anterior a las particiones mensuales (migración d4b8):
+        # con archivo activo se exporta lo vencido antes de borrarlo, igual que las mensuales
+        purged = 0
+        async with session_scope() as db:
+            repo = EventPartitionRepository(db)
+            if settings.event_archive_to_s3 and pa is None:
+                log.error("EVENT_ARCHIVE_TO_S3 is set but pyarrow is not installed; keeping expired rows in %s",
+                          DEFAULT_PARTITION)
+                skipped.append(DEFAULT_PARTITION)
+            elif await repo.has_default_rows_before(cutoff):
+                if settings.event_archive_to_s3:
+                    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+                    archived.append(await _archive(
+                        repo, DEFAULT_PARTITION, before=cutoff,
+                        key=f"{ARCHIVE_PREFIX}{DEFAULT_PARTITION}-before-{cutoff.isoformat()}-{stamp}.parquet",
+                    ))
+                purged = await repo.purge_default_before(cutoff)
+
+        async with session_scope() as db:
+            keys = await EventRepository(db).prune_client_keys(
+                before=datetime.now(timezone.utc) - timedelta(days=settings.telemetry_dedup_days)
+            )
+
+        return {"created": created, "dropped": dropped, "archived": archived,
+                "skipped": skipped, "purged_default": purged, "pruned_client_keys": keys}
+    return asyncio.run(_run())
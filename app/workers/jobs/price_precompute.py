@@ -1,27 +1,56 @@
 from __future__ import annotations
 import asyncio
+import time
 from datetime import datetime, timedelta, timezone
+from redis.asyncio import Redis
+from app.core.config import settings
 from app.workers.celery_app import celery_app
 from ._session import session_scope
-from app.repositories.listing_repo import ListingRepository
+from app.repositories.price_quantile_repo import PriceQuantileRepository
 from app.repositories.price_suggestion_repo import PriceSuggestionRepository
-from app.services.price_suggestion import suggest_price_cents
+
+CURSOR_KEY = "price_precompute:cursor"  # último listing.id procesado de la pasada en curso
 
 @celery_app.task(name="jobs.price_precompute.precompute_recent_prices", max_retries=2, default_retry_delay=10)
 def precompute_recent_prices() -> dict:
     """
-    Recorre los listings recientes y genera una sugerencia de precio (mediana 90 días).
+    Genera sugerencias de precio (p50 90 días) para todo el catálogo activo, por chunks:
+    cada chunk es un único INSERT…SELECT unido a la tabla pricequantile y se confirma por separado.
+    El cursor queda en Redis, así que una corrida cortada por tiempo o error continúa donde quedó.
     """
     async def _run():
-        async with session_scope() as db:
-            repo = ListingRepository(db)
-            items, _ = await repo.search(page=1, page_size=200)
-            ps_repo = PriceSuggestionRepository(db)
-            n = 0
-            for l in items:
-                suggested = await suggest_price_cents(db, category_id=l.category_id, brand_id=l.brand_id)
-                if suggested is not None:
-                    await ps_repo.create_for_listing(listing_id=l.id, suggested_price_cents=suggested, algorithm="p50")
-                    n += 1
-            return {"suggested_for": n}
+        r = Redis.from_url(settings.redis_url, decode_responses=True)
+        deadline = time.monotonic() + settings.price_precompute_budget_s
+        scanned = inserted = chunks = 0
+        done = False
+        try:
+            after = await r.get(CURSOR_KEY)
+            if after is None:
+                # nueva pasada: asegurar que los cuantiles estén vigentes
+                async with session_scope() as db:
+                    repo = PriceQuantileRepository(db)
+                    last = await repo.last_refresh()
+                    max_age = timedelta(minutes=settings.price_quantile_max_age_min)
+                    if last is None or datetime.now(timezone.utc) - last > max_age:
+                        await repo.refresh()
+
+            while time.monotonic() < deadline:
+                async with session_scope() as db:
+                    last_id, n_scanned, n_inserted = await PriceSuggestionRepository(db).bulk_suggest_chunk(
+                        after_id=after,
+                        limit=settings.price_precompute_chunk,
+                        fresh_hours=settings.price_precompute_fresh_hours,
+                    )
+                chunks += 1
+                scanned += n_scanned
+                inserted += n_inserted
+                if last_id is None or n_scanned < settings.price_precompute_chunk:
+                    await r.delete(CURSOR_KEY)
+                    done = True
+                    break
+                after = last_id
+                await r.set(CURSOR_KEY, after)
+        finally:
+            await r.close()
+        return {"chunks": chunks, "scanned": scanned, "suggested_for": inserted, "pass_complete": done}
     return asyncio.run(_run())
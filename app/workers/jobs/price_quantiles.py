@@ -0,0 +1,23 @@
+from __future__ import annotations
+import asyncio
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.price_quantile_repo import PriceQuantileRepository
+
+@celery_app.task(name="jobs.price_quantiles.refresh_price_quantiles", max_retries=2, default_retry_delay=10)
+def refresh_price_quantiles(full: bool = False) -> dict:
+    """
+    Mantiene la tabla pricequantile. Incremental: solo recalcula categorías con listings
+    modificados (o que salieron de la ventana de 90 días) desde la última corrida.
+    """
+    async def _run():
+        async with session_scope() as db:
+            repo = PriceQuantileRepository(db)
+            since = None if full else await repo.last_refresh()
+            if since is None:
+                rows = await repo.refresh()
+                return {"mode": "full", "rows": rows}
+            cats = await repo.affected_categories(since)
+            rows = await repo.refresh(cats)
+            return {"mode": "incremental", "categories": len(cats), "rows": rows}
+    return asyncio.run(_run())
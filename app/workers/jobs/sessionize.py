@@ -0,0 +1,65 @@
+from __future__ import annotations
+import asyncio
+from datetime import timedelta, timezone
+import sqlalchemy as sa
+from app.core.config import settings
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.analytics_rollup_repo import day_start
+from app.repositories.event_partition_repo import retention_cutoff
+from app.repositories.screen_dwell_repo import ScreenDwellRepository
+
+_SLAB = timedelta(days=1)  # máximo de eventos ordenados por transacción al avanzar
+
+@celery_app.task(name="jobs.sessionize.advance_dwell", max_retries=2, default_retry_delay=30)
+def advance_dwell() -> dict:
+    """
+    Sesionización incremental de `screen.view` para bq_2_4:
+    - recalcula los días ya cerrados que recibieron vistas tardías desde la corrida anterior;
+    - avanza el horizonte hasta now - lateness - max_idle sumando solo los intervalos nuevos.
+    Cada tramo se suma en la misma transacción que mueve el horizonte (sin doble conteo si falla), bajo
+    un advisory lock y solo si el horizonte sigue donde esta corrida lo dejó: dos corridas solapadas
+    (p. ej. el backfill inicial más largo que el intervalo del beat) no suman el mismo tramo dos veces.
+    """
+    max_idle = settings.dwell_max_idle_sec
+
+    async def _run():
+        async with session_scope() as db:
+            repo = ScreenDwellRepository(db)
+            await repo.lock()
+            run_started = (await db.execute(sa.text("SELECT now()"))).scalar_one()
+            state = await repo.state()
+            today = run_started.astimezone(timezone.utc).date()
+            target = run_started - timedelta(minutes=settings.dwell_lateness_min, seconds=max_idle)
+
+            if state is None:
+                horizon = day_start(today - timedelta(days=settings.analytics_rollup_backfill_days))
+                late = []
+            else:
+                horizon, last_run = state
+                kept_from = retention_cutoff(today, settings.event_retention_months)
+                # una vista tardía hasta max_idle después del horizonte cambia el intervalo previo ya cerrado;
+                # margen de lateness sobre last_run para filas que confirmaron alrededor de run_started
+                before = horizon + timedelta(seconds=max_idle)
+                since = last_run - timedelta(minutes=settings.dwell_lateness_min)
+                late = [d for d in await repo.late_days(since=since, before=before, max_idle=max_idle)
+                        if d >= kept_from]
+                for d in late:
+                    await repo.recompute_day(d, until=horizon, max_idle=max_idle)
+            await repo.save_state(finalized_until=horizon, last_run_at=run_started)
+
+        start = horizon
+        while start < target:
+            end = min(start + _SLAB, target)
+            async with session_scope() as db:
+                repo = ScreenDwellRepository(db)
+                await repo.lock()
+                current = await repo.state()
+                if current is None or current[0] != start:
+                    # otra corrida movió el horizonte mientras tanto: ella sigue desde ahí
+                    return {"late_days": len(late), "finalized_until": current[0].isoformat() if current else None}
+                await repo.accumulate(start=start, end=end, max_idle=max_idle)
+                await repo.save_state(finalized_until=end, last_run_at=run_started)
+            start = end
+        return {"late_days": len(late), "finalized_until": max(horizon, target).isoformat()}
+    return asyncio.run(_run())
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import socket
+from typing import Any
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from sqlalchemy.exc import DataError, IntegrityError
+from app.core.config import settings
+from app.workers.celery_app import celery_app
+from ._session import session_scope
+from app.repositories.events_repo import EventRepository
+
+log = logging.getLogger(__name__)
+
+STREAM = settings.telemetry_stream
+DEAD_STREAM = f"{STREAM}:dead"
+GROUP = "telemetry-ingest"
+RECLAIM_IDLE_MS = 60_000  # entradas sin ACK por más de 1 min se reasignan
+
+Entry = tuple[str, list[dict[str, Any]]]
+
+def _consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+async def _ensure_group(r: Redis) -> None:
+    try:
+        await r.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def _decode(messages) -> list[Entry]:
+    out: list[Entry] = []
+    for entry_id, fields in messages:
+        eid = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        raw = fields.get(b"events") or fields.get("events") or b"[]"
+        try:
+            out.append((eid, orjson.loads(raw)))
+        except orjson.JSONDecodeError:
+            out.append((eid, []))
+    return out
+
+async def _dead_letter(r: Redis, entry_id: str, events: list[dict], error: str) -> None:
+    await r.xadd(DEAD_STREAM, {"source_id": entry_id, "events": orjson.dumps(events), "error": error[:500]})
+
+async def _ack(r: Redis, entry_ids: list[str]) -> None:
+    if not entry_ids:
+        return
+    pipe = r.pipeline(transaction=False)
+    pipe.xack(STREAM, GROUP, *entry_ids)
+    pipe.xdel(STREAM, *entry_ids)  # el XLEN del stream refleja solo el backlog pendiente
+    await pipe.execute()
+
+# errores permanentes de una fila (FK inválida, valor fuera de tipo): reintentarlos no sirve
+_PERMANENT_ERRORS = (IntegrityError, DataError)
+
+async def _persist(r: Redis, entries: list[Entry]) -> int:
+    """
+    Inserta todas las entradas en una sola transacción. Si falla por un error permanente de datos
+    (p.ej. FK inválida en un evento), reintenta entrada por entrada y manda al dead-letter stream
+    solo las que sigan fallando así. Cualquier otro error (Postgres caído, conexión) se propaga sin
+    ACK: las entradas quedan pendientes y el stream las reentrega (at-least-once; la dedup por
+    client_event_id absorbe las reentregas y TELEMETRY_MAX_DELIVERIES acota los reintentos).
+    """
+    events = [ev for _, evs in entries for ev in evs]
+    try:
+        async with session_scope() as db:
+            inserted = await EventRepository(db).insert_batch(events, skip_duplicates=True)
+        await _ack(r, [eid for eid, _ in entries])
+        return len(inserted)
+    except _PERMANENT_ERRORS:
+        log.exception("telemetry batch insert failed, retrying per entry")
+
+    n = 0
+    for eid, evs in entries:
+        try:
+            async with session_scope() as db:
+                n += len(await EventRepository(db).insert_batch(evs, skip_duplicates=True))
+        except _PERMANENT_ERRORS as e:
+            await _dead_letter(r, eid, evs, repr(e))
+        await _ack(r, [eid])
+    return n
+
+async def _reclaim(r: Redis, consumer: str) -> list[Entry]:
+    """Reasigna entradas huérfanas; las que superan TELEMETRY_MAX_DELIVERIES van a dead-letter."""
+    _, messages, _ = await r.xautoclaim(STREAM, GROUP, consumer, min_idle_time=RECLAIM_IDLE_MS, count=settings.telemetry_ingest_batch)
+    entries = _decode(messages)
+    if not entries:
+        return []
+
+    pending = await r.xpending_range(STREAM, GROUP, min=entries[0][0], max=entries[-1][0], count=len(entries))
+    deliveries = {
+        (p["message_id"].decode() if isinstance(p["message_id"], bytes) else p["message_id"]): p["times_delivered"]
+        for p in pending
+    }
+    keep: list[Entry] = []
+    for eid, evs in entries:
+        if deliveries.get(eid, 0) > settings.telemetry_max_deliveries:
+            await _dead_letter(r, eid, evs, "max deliveries exceeded")
+            await _ack(r, [eid])
+        else:
+            keep.append((eid, evs))
+    return keep
+
+async def drain(r: Redis, consumer: str, *, block_ms: int | None = None) -> tuple[int, int]:
+    """
+    Un ciclo de consumo: reclama pendientes, lee hasta TELEMETRY_INGEST_BATCH entradas y persiste.
+    Retorna (entradas consumidas, eventos insertados).
+    """
+    entries = await _reclaim(r, consumer)
+    resp = await r.xreadgroup(GROUP, consumer, {STREAM: ">"}, count=settings.telemetry_ingest_batch, block=block_ms)
+    for _, messages in resp or []:
+        entries.extend(_decode(messages))
+    if not entries:
+        return 0, 0
+    return len(entries), await _persist(r, entries)
+
+async def run_forever(block_ms: int = 2000) -> None:
+    """Consumidor standalone: `python -m app.workers.jobs.telemetry_ingest`."""
+    r = Redis.from_url(settings.redis_url, decode_responses=False)
+    consumer = _consumer_name()
+    await _ensure_group(r)
+    log.info("telemetry consumer %s listening on %s", consumer, STREAM)
+    try:
+        while True:
+            try:
+                await drain(r, consumer, block_ms=block_ms)
+            except Exception:
+                log.exception("telemetry drain failed")
+                await asyncio.sleep(1)
+    finally:
+        await r.close()
+
+@celery_app.task(name="jobs.telemetry_ingest.drain_stream")
+def drain_stream(max_rounds: int = 50) -> dict:
+    """
+    Vacía el stream de telemetría por lotes (respaldo del consumidor standalone vía beat).
+    """
+    async def _run():
+        r = Redis.from_url(settings.redis_url, decode_responses=False)
+        try:
+            await _ensure_group(r)
+            consumer = _consumer_name()
+            consumed = inserted = 0
+            for _ in range(max_rounds):
+                c, n = await drain(r, consumer)
+                if c == 0:
+                    break
+                consumed += c
+                inserted += n
+            return {"entries": consumed, "inserted": inserted}
+        finally:
+            await r.close()
+    return asyncio.run(_run())
+
+if __name__ == "__main__":
+    from app.core.logging import setup_logging
+    setup_logging()
+    asyncio.run(run_forever())
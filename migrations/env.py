@@ -6,13 +6,17 @@ from alembic import context
 from sqlalchemy import create_engine
 
 from app.db.base import Base
+from app.models.analytics_rollup import (
+    RollupDay, RollupListingsDaily, RollupEscrowStepDaily, RollupEventTypeDaily, RollupClickDaily,
+    RollupActivityDaily, RollupOrderStatusDaily, RollupGmvDaily, RollupQuickViewDaily,
+)
 from app.models.brand import Brand
 from app.models.category import Category
 from app.models.chat import Chat, ChatParticipant
 from app.models.device import Device
 from app.models.dispute import Dispute
 from app.models.escrow import Escrow, EscrowEvent
-from app.models.event import Event
+from app.models.event import Event, EventClientKey
 from app.models.feature import Feature, FeatureFlag
 from app.models.listing_photo import ListingPhoto
 from app.models.listing import Listing
@@ -21,7 +25,10 @@ from app.models.order import Order
 from app.models.order_status import OrderStatusHistory
 from app.models.payment import Payment
 from app.models.price_suggestion import PriceSuggestion
+from app.models.price_quantile import PriceQuantile
 from app.models.review import Review
+from app.models.catalog_change import CatalogChange
+from app.models.screen_dwell import ScreenDwellDaily, ScreenDwellState
 from app.models.user import User
 from alembic import context
 
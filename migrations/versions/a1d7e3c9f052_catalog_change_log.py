@@ -0,0 +1,96 @@
+"""catalog change log with sync versions and listing soft delete
+
+Revision ID: a1d7e3c9f052
+Revises: f8a2c6e1d394
+Create Date: 2025-11-18 15:02:44.318902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d7e3c9f052'
+down_revision: Union[str, Sequence[str], None] = 'f8a2c6e1d394'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ("category", "brand", "listing")
+
+# Un cambio por fila (INSERT / UPDATE real / DELETE) reemplaza la fila de la entidad en catalogchange
+# con una versión nueva. El advisory lock de transacción serializa a los escritores del catálogo hasta
+# el commit, así las versiones se hacen visibles en orden y un cursor `version > N` no salta cambios.
+_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION catalog_change_log() RETURNS trigger AS $$
+DECLARE
+  change_op text := 'upsert';
+  rid uuid;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('catalogchange'));
+  IF TG_OP = 'DELETE' THEN
+    rid := OLD.id;
+    change_op := 'delete';
+  ELSE
+    rid := NEW.id;
+    IF TG_TABLE_NAME = 'listing' THEN
+      IF NEW.deleted_at IS NOT NULL THEN
+        change_op := 'delete';
+      END IF;
+    END IF;
+  END IF;
+  INSERT INTO catalogchange (entity, entity_id, op, version, changed_at)
+  VALUES (TG_TABLE_NAME, rid, change_op, nextval('catalogchange_version_seq'), now())
+  ON CONFLICT (entity, entity_id) DO UPDATE
+    SET op = EXCLUDED.op, version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('listing', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("CREATE SEQUENCE catalogchange_version_seq")
+    op.create_table('catalogchange',
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'entity_id', name=op.f('pk_catalogchange'))
+    )
+    op.create_index('ix_catalogchange_version', 'catalogchange', ['version'], unique=True)
+
+    # estado inicial: todo el catálogo actual como upserts
+    for table in _TABLES:
+        op.execute(f"""
+            INSERT INTO catalogchange (entity, entity_id, op, version)
+            SELECT '{table}', id, 'upsert', nextval('catalogchange_version_seq') FROM "{table}"
+        """)
+
+    op.execute(_TRIGGER_FN)
+    for table in _TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_ins_del AFTER INSERT OR DELETE ON "{table}"
+            FOR EACH ROW EXECUTE FUNCTION catalog_change_log()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_upd AFTER UPDATE ON "{table}"
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION catalog_change_log()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_change_log_upd ON "{table}"')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_change_log_ins_del ON "{table}"')
+    op.execute("DROP FUNCTION IF EXISTS catalog_change_log()")
+    op.drop_index('ix_catalogchange_version', table_name='catalogchange')
+    op.drop_table('catalogchange')
+    op.execute("DROP SEQUENCE catalogchange_version_seq")
+    # los listings con borrado lógico quedan como inactivos (is_active = false)
+    op.drop_column('listing', 'deleted_at')
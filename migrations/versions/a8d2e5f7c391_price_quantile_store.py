@@ -0,0 +1,41 @@
+"""price quantile store
+
+Revision ID: a8d2e5f7c391
+Revises: f1c9e3a7b526
+Create Date: 2025-11-12 08:55:19.640278
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2e5f7c391'
+down_revision: Union[str, Sequence[str], None] = 'f1c9e3a7b526'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pricequantile',
+    sa.Column('category_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('brand_key', sa.String(length=36), nullable=False),
+    sa.Column('condition_key', sa.String(length=40), nullable=False),
+    sa.Column('p25', sa.BigInteger(), nullable=False),
+    sa.Column('p50', sa.BigInteger(), nullable=False),
+    sa.Column('p75', sa.BigInteger(), nullable=False),
+    sa.Column('n', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], name=op.f('fk_pricequantile_category_id_category'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('category_id', 'brand_key', 'condition_key', name=op.f('pk_pricequantile'))
+    )
+    op.create_index('ix_pricequantile_computed_at', 'pricequantile', [sa.literal_column('computed_at DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pricequantile_computed_at', table_name='pricequantile')
+    op.drop_table('pricequantile')
@@ -0,0 +1,28 @@
+"""pricesuggestion listing index
+
+Revision ID: b3f6d9a2c714
+Revises: a8d2e5f7c391
+Create Date: 2025-11-12 10:21:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6d9a2c714'
+down_revision: Union[str, Sequence[str], None] = 'a8d2e5f7c391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_pricesuggestion_listing_created', 'pricesuggestion', ['listing_id', sa.literal_column('created_at DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pricesuggestion_listing_created', table_name='pricesuggestion')
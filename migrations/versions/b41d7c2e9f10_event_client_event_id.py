@@ -0,0 +1,33 @@
+"""event client_event_id for telemetry dedup
+
+Revision ID: b41d7c2e9f10
+Revises: 6a080625362a
+Create Date: 2025-11-03 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d7c2e9f10'
+down_revision: Union[str, Sequence[str], None] = '6a080625362a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('event', sa.Column('client_event_id', sa.String(length=64), nullable=True))
+    op.create_index(
+        'uq_events_client_event_id', 'event', ['client_event_id'],
+        unique=True, postgresql_where=sa.text('client_event_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_events_client_event_id', table_name='event')
+    op.drop_column('event', 'client_event_id')
@@ -0,0 +1,30 @@
+"""catalogchange (entity, version) and listingphoto listing_id indexes for HTTP validators
+
+Revision ID: b5f2d8e4a716
+Revises: a1d7e3c9f052
+Create Date: 2025-11-19 11:47:09.662310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5f2d8e4a716'
+down_revision: Union[str, Sequence[str], None] = 'a1d7e3c9f052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_catalogchange_entity_version', 'catalogchange', ['entity', 'version'], unique=False)
+    op.create_index(op.f('ix_listingphoto_listing_id'), 'listingphoto', ['listing_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_listingphoto_listing_id'), table_name='listingphoto')
+    op.drop_index('ix_catalogchange_entity_version', table_name='catalogchange')
@@ -0,0 +1,42 @@
+"""eventclientkey: telemetry dedup by client_event_id independent of occurred_at
+
+Revision ID: c3a9e5f1b208
+Revises: b5f2d8e4a716
+Create Date: 2025-11-20 09:12:41.308514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e5f1b208'
+down_revision: Union[str, Sequence[str], None] = 'b5f2d8e4a716'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('eventclientkey',
+    sa.Column('client_event_id', sa.String(length=64), nullable=False),
+    sa.Column('seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('client_event_id', name=op.f('pk_eventclientkey'))
+    )
+    op.create_index('ix_eventclientkey_seen_at_brin', 'eventclientkey', ['seen_at'], unique=False,
+                    postgresql_using='brin')
+    # ids ya ingeridos dentro de la ventana de dedup por defecto (TELEMETRY_DEDUP_DAYS=7)
+    op.execute("""
+        INSERT INTO eventclientkey (client_event_id, seen_at)
+        SELECT client_event_id, MIN(ingested_at) FROM event
+        WHERE client_event_id IS NOT NULL AND ingested_at >= now() - interval '7 days'
+        GROUP BY client_event_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_eventclientkey_seen_at_brin', table_name='eventclientkey', postgresql_using='brin')
+    op.drop_table('eventclientkey')
@@ -0,0 +1,32 @@
+"""listing keyset pagination index
+
+Revision ID: c5e8a1f3d207
+Revises: b41d7c2e9f10
+Create Date: 2025-11-04 16:40:02.531877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1f3d207'
+down_revision: Union[str, Sequence[str], None] = 'b41d7c2e9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_listing_active_created_id', 'listing',
+        [sa.literal_column('created_at DESC'), sa.literal_column('id DESC')],
+        unique=False, postgresql_where=sa.text('is_active IS true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_active_created_id', table_name='listing')
@@ -0,0 +1,76 @@
+"""analytics daily rollups
+
+Revision ID: c9e4a7d1f285
+Revises: b3f6d9a2c714
+Create Date: 2025-11-13 09:04:11.532817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a7d1f285'
+down_revision: Union[str, Sequence[str], None] = 'b3f6d9a2c714'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _daily(name: str, *cols: sa.Column, pk: tuple[str, ...]) -> None:
+    op.create_table(name,
+    sa.Column('day', sa.Date(), nullable=False),
+    *cols,
+    sa.PrimaryKeyConstraint('day', *pk, name=op.f(f'pk_{name}'))
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('event', sa.Column('ingested_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_events_ingested_at_brin', 'event', ['ingested_at'], unique=False, postgresql_using='brin')
+
+    op.create_table('rollupday',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('day', name=op.f('pk_rollupday'))
+    )
+    op.create_index('ix_rollupday_computed_at', 'rollupday', [sa.literal_column('computed_at DESC')], unique=False)
+
+    _daily('rolluplistingsdaily',
+           sa.Column('category_id', sa.Text(), nullable=False),
+           sa.Column('n', sa.BigInteger(), nullable=False), pk=('category_id',))
+    _daily('rollupescrowstepdaily',
+           sa.Column('step', sa.String(length=40), nullable=False),
+           sa.Column('total', sa.BigInteger(), nullable=False),
+           sa.Column('cancelled', sa.BigInteger(), nullable=False), pk=('step',))
+    _daily('rollupeventtypedaily',
+           sa.Column('event_type', sa.String(length=80), nullable=False),
+           sa.Column('n', sa.BigInteger(), nullable=False), pk=('event_type',))
+    _daily('rollupclickdaily',
+           sa.Column('button', sa.Text(), nullable=False),
+           sa.Column('n', sa.BigInteger(), nullable=False), pk=('button',))
+    _daily('rollupactivitydaily',
+           sa.Column('dau', sa.BigInteger(), nullable=False),
+           sa.Column('sessions', sa.BigInteger(), nullable=False), pk=())
+    _daily('rolluporderstatusdaily',
+           sa.Column('status', sa.String(length=40), nullable=False),
+           sa.Column('n', sa.BigInteger(), nullable=False), pk=('status',))
+    _daily('rollupgmvdaily',
+           sa.Column('gmv_cents', sa.BigInteger(), nullable=False),
+           sa.Column('orders_paid', sa.BigInteger(), nullable=False), pk=())
+    _daily('rollupquickviewdaily',
+           sa.Column('category_id', sa.Text(), nullable=False),
+           sa.Column('n', sa.BigInteger(), nullable=False), pk=('category_id',))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in ('rollupquickviewdaily', 'rollupgmvdaily', 'rolluporderstatusdaily', 'rollupactivitydaily',
+                 'rollupclickdaily', 'rollupeventtypedaily', 'rollupescrowstepdaily', 'rolluplistingsdaily'):
+        op.drop_table(name)
+    op.drop_index('ix_rollupday_computed_at', table_name='rollupday')
+    op.drop_table('rollupday')
+    op.drop_index('ix_events_ingested_at_brin', table_name='event', postgresql_using='brin')
+    op.drop_column('event', 'ingested_at')
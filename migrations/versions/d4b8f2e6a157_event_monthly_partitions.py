@@ -0,0 +1,118 @@
+"""event monthly range partitions
+
+Revision ID: d4b8f2e6a157
+Revises: c9e4a7d1f285
+Create Date: 2025-11-14 10:12:53.804116
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8f2e6a157'
+down_revision: Union[str, Sequence[str], None] = 'c9e4a7d1f285'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# historial que recibe particiones propias al migrar; lo más antiguo queda en event_default
+_BACKFILL_MONTHS = 12
+_PREMAKE_MONTHS = 3
+
+_COLS = ("id, event_type, user_id, session_id, listing_id, order_id, chat_id, step, "
+         "client_event_id, properties, occurred_at, ingested_at")
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _bound(d: date) -> str:
+    return f"'{datetime(d.year, d.month, 1, tzinfo=timezone.utc).isoformat()}'"
+
+
+def _event_columns() -> list:
+    return [
+        sa.Column('id', sa.UUID(as_uuid=False), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('event_type', sa.String(length=80), nullable=False),
+        sa.Column('user_id', sa.UUID(as_uuid=False), nullable=True),
+        sa.Column('session_id', sa.String(length=64), nullable=False),
+        sa.Column('listing_id', sa.UUID(as_uuid=False), nullable=True),
+        sa.Column('order_id', sa.UUID(as_uuid=False), nullable=True),
+        sa.Column('chat_id', sa.UUID(as_uuid=False), nullable=True),
+        sa.Column('step', sa.String(length=40), nullable=True),
+        sa.Column('client_event_id', sa.String(length=64), nullable=True),
+        sa.Column('properties', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['chat_id'], ['chat.id'], name=op.f('fk_event_chat_id_chat')),
+        sa.ForeignKeyConstraint(['listing_id'], ['listing.id'], name=op.f('fk_event_listing_id_listing')),
+        sa.ForeignKeyConstraint(['order_id'], ['order.id'], name=op.f('fk_event_order_id_order')),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], name=op.f('fk_event_user_id_user')),
+    ]
+
+
+def _create_indexes(unique_cols: list[str]) -> None:
+    op.create_index('ix_events_type_time', 'event', ['event_type', sa.literal_column('occurred_at DESC')], unique=False)
+    op.create_index('ix_events_user_time', 'event', ['user_id', sa.literal_column('occurred_at DESC')], unique=False)
+    op.create_index('ix_events_props_gin', 'event', ['properties'], unique=False, postgresql_using='gin')
+    op.create_index('uq_events_client_event_id', 'event', unique_cols, unique=True,
+                    postgresql_where=sa.text('client_event_id IS NOT NULL'))
+    op.create_index('ix_events_ingested_at_brin', 'event', ['ingested_at'], unique=False, postgresql_using='brin')
+
+
+def _drop_indexes(table: str) -> None:
+    for ix in ('ix_events_type_time', 'ix_events_user_time', 'ix_events_props_gin',
+               'uq_events_client_event_id', 'ix_events_ingested_at_brin'):
+        op.drop_index(ix, table_name=table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('event', 'event_unpartitioned')
+    op.execute("ALTER TABLE event_unpartitioned RENAME CONSTRAINT pk_event TO pk_event_unpartitioned")
+    _drop_indexes('event_unpartitioned')
+
+    op.create_table('event',
+    *_event_columns(),
+    sa.PrimaryKeyConstraint('id', 'occurred_at', name=op.f('pk_event')),
+    postgresql_partition_by='RANGE (occurred_at)'
+    )
+    op.execute("CREATE TABLE event_default PARTITION OF event DEFAULT")
+
+    conn = op.get_bind()
+    now = datetime.now(timezone.utc).date()
+    current = date(now.year, now.month, 1)
+    first = conn.execute(sa.text("SELECT min(occurred_at) FROM event_unpartitioned")).scalar()
+    month = _add_months(current, -_BACKFILL_MONTHS)
+    if first is not None and first.date() > month:
+        month = date(first.year, first.month, 1)
+    while month <= _add_months(current, _PREMAKE_MONTHS):
+        nxt = _add_months(month, 1)
+        op.execute(f"CREATE TABLE event_y{month.year:04d}m{month.month:02d} PARTITION OF event "
+                   f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(nxt)})")
+        month = nxt
+
+    op.execute(f"INSERT INTO event ({_COLS}) SELECT {_COLS} FROM event_unpartitioned")
+    op.drop_table('event_unpartitioned')
+    _create_indexes(['client_event_id', 'occurred_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_indexes('event')
+    op.rename_table('event', 'event_partitioned')
+    op.execute("ALTER TABLE event_partitioned RENAME CONSTRAINT pk_event TO pk_event_partitioned")
+
+    op.create_table('event',
+    *_event_columns(),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_event'))
+    )
+    op.execute(f"INSERT INTO event ({_COLS}) SELECT {_COLS} FROM event_partitioned")
+    op.drop_table('event_partitioned')  # arrastra las particiones
+    _create_indexes(['client_event_id'])
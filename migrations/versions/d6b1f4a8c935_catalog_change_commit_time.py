@@ -0,0 +1,90 @@
+"""catalog change log: assign versions at commit time (deferred constraint triggers)
+
+Revision ID: d6b1f4a8c935
+Revises: c3a9e5f1b208
+Create Date: 2025-11-20 10:26:05.774129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6b1f4a8c935'
+down_revision: Union[str, Sequence[str], None] = 'c3a9e5f1b208'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ("category", "brand", "listing")
+
+# Los triggers pasan a ser constraint triggers DEFERRABLE INITIALLY DEFERRED: la versión se asigna al
+# hacer commit, cuando la transacción ya tomó todos sus locks de fila. El advisory lock de transacción
+# se toma recién ahí y solo cubre el tramo hasta el commit, así las versiones se hacen visibles en orden
+# (un cursor `version > N` no salta cambios) sin serializar las transacciones completas ni poder formar
+# un ciclo de espera con los locks de fila (quien lo tiene ya no espera a nadie).
+# Si una fila cambia varias veces en la transacción, cada disparo reemplaza la entrada; gana el último.
+_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION catalog_change_log() RETURNS trigger AS $$
+DECLARE
+  change_op text := 'upsert';
+  rid uuid;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('catalogchange'));
+  IF TG_OP = 'DELETE' THEN
+    rid := OLD.id;
+    change_op := 'delete';
+  ELSE
+    rid := NEW.id;
+    IF TG_TABLE_NAME = 'listing' THEN
+      IF NEW.deleted_at IS NOT NULL THEN
+        change_op := 'delete';
+      END IF;
+    END IF;
+  END IF;
+  INSERT INTO catalogchange (entity, entity_id, op, version, changed_at)
+  VALUES (TG_TABLE_NAME, rid, change_op, nextval('catalogchange_version_seq'), now())
+  ON CONFLICT (entity, entity_id) DO UPDATE
+    SET op = EXCLUDED.op, version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _drop_triggers() -> None:
+    for table in _TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_change_log_upd ON "{table}"')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_change_log_ins_del ON "{table}"')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_triggers()
+    op.execute(_TRIGGER_FN)
+    for table in _TABLES:
+        op.execute(f"""
+            CREATE CONSTRAINT TRIGGER {table}_change_log_ins_del AFTER INSERT OR DELETE ON "{table}"
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION catalog_change_log()
+        """)
+        op.execute(f"""
+            CREATE CONSTRAINT TRIGGER {table}_change_log_upd AFTER UPDATE ON "{table}"
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION catalog_change_log()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_triggers()
+    for table in _TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_ins_del AFTER INSERT OR DELETE ON "{table}"
+            FOR EACH ROW EXECUTE FUNCTION catalog_change_log()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_upd AFTER UPDATE ON "{table}"
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION catalog_change_log()
+        """)
@@ -0,0 +1,48 @@
+"""listing full-text search (tsvector + pg_trgm)
+
+Revision ID: d7a3f9b1c482
+Revises: c5e8a1f3d207
+Create Date: 2025-11-06 09:21:57.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f9b1c482'
+down_revision: Union[str, Sequence[str], None] = 'c5e8a1f3d207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TSV_SQL = (
+    "setweight(to_tsvector('spanish', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Columna generada STORED: el ADD COLUMN reescribe la tabla y rellena las filas existentes.
+    op.add_column('listing', sa.Column(
+        'search_tsv', postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_TSV_SQL, persisted=True), nullable=True,
+    ))
+    op.create_index('ix_listing_search_tsv', 'listing', ['search_tsv'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_listing_title_trgm', 'listing', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_title_trgm', table_name='listing')
+    op.drop_index('ix_listing_search_tsv', table_name='listing')
+    op.drop_column('listing', 'search_tsv')
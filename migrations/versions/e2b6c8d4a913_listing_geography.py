@@ -0,0 +1,41 @@
+"""listing geography column + GiST index
+
+Revision ID: e2b6c8d4a913
+Revises: d7a3f9b1c482
+Create Date: 2025-11-07 14:03:12.870431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.types import Geography
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6c8d4a913'
+down_revision: Union[str, Sequence[str], None] = 'd7a3f9b1c482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GEOG_SQL = (
+    "CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL "
+    "THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography END"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columna generada STORED: se rellena para las filas existentes y se mantiene en sync con lat/lon.
+    op.add_column('listing', sa.Column(
+        'geog', Geography('Point', 4326),
+        sa.Computed(GEOG_SQL, persisted=True), nullable=True,
+    ))
+    op.create_index('ix_listing_geog', 'listing', ['geog'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_listing_geog', table_name='listing')
+    op.drop_column('listing', 'geog')
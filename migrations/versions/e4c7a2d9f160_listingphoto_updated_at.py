@@ -0,0 +1,31 @@
+"""listingphoto updated_at for the listing-detail HTTP validator
+
+Revision ID: e4c7a2d9f160
+Revises: d6b1f4a8c935
+Create Date: 2025-11-21 08:41:17.205963
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c7a2d9f160'
+down_revision: Union[str, Sequence[str], None] = 'd6b1f4a8c935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('listingphoto', sa.Column('updated_at', sa.DateTime(timezone=True),
+                                            server_default=sa.text('now()'), nullable=False))
+    # fotos existentes: su última modificación conocida es el alta
+    op.execute("UPDATE listingphoto SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('listingphoto', 'updated_at')
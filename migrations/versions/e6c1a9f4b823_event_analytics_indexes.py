@@ -0,0 +1,44 @@
+"""event analytics indexes: BRIN + partial expression indexes, drop GIN
+
+Revision ID: e6c1a9f4b823
+Revises: d4b8f2e6a157
+Create Date: 2025-11-14 16:38:02.417925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c1a9f4b823'
+down_revision: Union[str, Sequence[str], None] = 'd4b8f2e6a157'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_events_props_gin', table_name='event', postgresql_using='gin')
+    op.create_index('ix_events_occurred_brin', 'event', ['occurred_at'], unique=False, postgresql_using='brin')
+    op.create_index('ix_events_listing_created_cat', 'event',
+                    ['occurred_at', sa.text("(properties ->> 'category_id')")], unique=False,
+                    postgresql_where=sa.text("event_type = 'listing.created'"))
+    op.create_index('ix_events_click_button', 'event',
+                    ['occurred_at', sa.text("(properties ->> 'button')")], unique=False,
+                    postgresql_where=sa.text("event_type = 'ui.click'"))
+    op.create_index('ix_events_quick_view', 'event', ['occurred_at', 'listing_id'], unique=False,
+                    postgresql_where=sa.text("event_type = 'feature.used' AND (properties ->> 'feature_key') = 'quick_view'"))
+    op.create_index('ix_events_screen_session', 'event', ['session_id', 'occurred_at'], unique=False,
+                    postgresql_where=sa.text("event_type = 'screen.view'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_screen_session', table_name='event')
+    op.drop_index('ix_events_quick_view', table_name='event')
+    op.drop_index('ix_events_click_button', table_name='event')
+    op.drop_index('ix_events_listing_created_cat', table_name='event')
+    op.drop_index('ix_events_occurred_brin', table_name='event', postgresql_using='brin')
+    op.create_index('ix_events_props_gin', 'event', ['properties'], unique=False, postgresql_using='gin')
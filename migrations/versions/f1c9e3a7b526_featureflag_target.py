@@ -0,0 +1,28 @@
+"""featureflag target for campus/user scopes
+
+Revision ID: f1c9e3a7b526
+Revises: e2b6c8d4a913
+Create Date: 2025-11-10 11:47:30.295614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c9e3a7b526'
+down_revision: Union[str, Sequence[str], None] = 'e2b6c8d4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('featureflag', sa.Column('target', sa.String(length=120), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('featureflag', 'target')
@@ -0,0 +1,38 @@
+"""listing keyset index: predicate `is_active IS true` to match the model (and the queries)
+
+Revision ID: f2d8b6c4a391
+Revises: e4c7a2d9f160
+Create Date: 2025-11-21 09:58:33.640127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d8b6c4a391'
+down_revision: Union[str, Sequence[str], None] = 'e4c7a2d9f160'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate(predicate: str) -> None:
+    op.drop_index('ix_listing_active_created_id', table_name='listing', if_exists=True)
+    op.create_index(
+        'ix_listing_active_created_id', 'listing',
+        [sa.literal_column('created_at DESC'), sa.literal_column('id DESC')],
+        unique=False, postgresql_where=sa.text(predicate),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bases migradas con la versión anterior de c5e8a1f3d207 tienen el predicado `is_active`
+    _recreate('is_active IS true')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate('is_active')
@@ -0,0 +1,41 @@
+"""screen dwell aggregates for incremental sessionization
+
+Revision ID: f8a2c6e1d394
+Revises: e6c1a9f4b823
+Create Date: 2025-11-17 09:31:26.057140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8a2c6e1d394'
+down_revision: Union[str, Sequence[str], None] = 'e6c1a9f4b823'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('screendwelldaily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('screen', sa.Text(), nullable=False),
+    sa.Column('total_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('views', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'screen', name=op.f('pk_screendwelldaily'))
+    )
+    op.create_table('screendwellstate',
+    sa.Column('id', sa.SmallInteger(), nullable=False),
+    sa.Column('finalized_until', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_screendwellstate'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('screendwellstate')
+    op.drop_table('screendwelldaily')
@@ -0,0 +1,166 @@
+"""
+Benchmark de estrategias de índices para el event store: costo de escritura vs. velocidad de las BQ.
+
+Compara el esquema anterior (GIN sobre todo `properties`) con el actual (BRIN sobre occurred_at +
+índices parciales por expresión + índice por sesión para el LEAD() de bq_2_4) sobre tablas scratch
+con los mismos datos sintéticos. Reporta filas/s al insertar con COPY, tamaño de índices y la mediana
+del tiempo de ejecución (EXPLAIN ANALYZE) de cada consulta.
+
+Uso (dentro del contenedor de la API, con DATABASE_URL configurado):
+    python scripts/bench_event_indexes.py --rows 500000 --window-days 7
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import asyncpg
+import orjson
+
+STRATEGIES: dict[str, list[str]] = {
+    "gin": [
+        "CREATE INDEX ON {t} (event_type, occurred_at DESC)",
+        "CREATE INDEX ON {t} (user_id, occurred_at DESC)",
+        "CREATE INDEX ON {t} USING gin (properties)",
+    ],
+    "tuned": [
+        "CREATE INDEX ON {t} (event_type, occurred_at DESC)",
+        "CREATE INDEX ON {t} (user_id, occurred_at DESC)",
+        "CREATE INDEX ON {t} USING brin (occurred_at)",
+        "CREATE INDEX ON {t} (occurred_at, (properties->>'category_id')) WHERE event_type = 'listing.created'",
+        "CREATE INDEX ON {t} (occurred_at, (properties->>'button')) WHERE event_type = 'ui.click'",
+        "CREATE INDEX ON {t} (occurred_at, listing_id) "
+        "WHERE event_type = 'feature.used' AND properties->>'feature_key' = 'quick_view'",
+        "CREATE INDEX ON {t} (session_id, occurred_at) WHERE event_type = 'screen.view'",
+    ],
+}
+
+QUERIES: dict[str, str] = {
+    "bq_1_1": """
+        SELECT occurred_at::date AS day, properties->>'category_id' AS category_id, COUNT(*)
+        FROM {t} WHERE event_type = 'listing.created' AND occurred_at >= $1 AND occurred_at < $2
+        GROUP BY day, category_id""",
+    "bq_2_1": """
+        SELECT occurred_at::date AS day, event_type, COUNT(*)
+        FROM {t} WHERE occurred_at >= $1 AND occurred_at < $2
+        GROUP BY day, event_type""",
+    "bq_2_2": """
+        SELECT occurred_at::date AS day, properties->>'button' AS button, COUNT(*)
+        FROM {t} WHERE event_type = 'ui.click' AND occurred_at >= $1 AND occurred_at < $2
+        GROUP BY day, button""",
+    "bq_2_4": """
+        WITH o AS (
+          SELECT COALESCE(NULLIF(properties->>'screen',''), '(unknown)') AS screen, occurred_at,
+                 LEAD(occurred_at) OVER (PARTITION BY session_id ORDER BY occurred_at) AS next_time
+          FROM {t} WHERE event_type = 'screen.view' AND occurred_at >= $1 AND occurred_at < $2
+        )
+        SELECT screen, SUM(LEAST(300, COALESCE(EXTRACT(EPOCH FROM next_time - occurred_at), 300)))
+        FROM o GROUP BY screen""",
+    "bq_5_1": """
+        SELECT occurred_at::date AS day, listing_id, COUNT(*)
+        FROM {t} WHERE event_type = 'feature.used' AND properties->>'feature_key' = 'quick_view'
+          AND occurred_at >= $1 AND occurred_at < $2
+        GROUP BY day, listing_id""",
+}
+
+_TYPES = ["screen.view"] * 5 + ["ui.click"] * 3 + ["listing.created", "feature.used", "search.performed"]
+_COLUMNS = ("id", "event_type", "user_id", "session_id", "listing_id", "properties", "occurred_at")
+
+def _synthetic_rows(n: int, days: int, seed: int = 7) -> list[tuple]:
+    """Eventos en orden de llegada (occurred_at creciente), como en producción."""
+    rnd = random.Random(seed)
+    users = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(2_000)]
+    listings = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(5_000)]
+    categories = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(20)]
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    step = days * 86_400 / n
+    rows = []
+    for i in range(n):
+        et = rnd.choice(_TYPES)
+        props: dict = {}
+        listing_id = None
+        if et == "screen.view":
+            props["screen"] = rnd.choice(["home", "search", "listing", "chat", "profile", "checkout"])
+        elif et == "ui.click":
+            props["button"] = rnd.choice(["buy", "contact", "share", "save", "filter", "back"])
+        elif et == "listing.created":
+            props["category_id"] = rnd.choice(categories)
+        elif et == "feature.used":
+            props["feature_key"] = rnd.choice(["quick_view", "price_suggestion", "map"])
+            listing_id = rnd.choice(listings)
+        rows.append((
+            uuid.UUID(int=rnd.getrandbits(128)), et, rnd.choice(users), f"s{rnd.randrange(20_000)}",
+            listing_id, orjson.dumps(props).decode(), start + timedelta(seconds=i * step),
+        ))
+    return rows
+
+async def _run_strategy(conn: asyncpg.Connection, name: str, rows: list[tuple], *, batch: int,
+                        window: tuple[datetime, datetime], repeat: int, keep: bool) -> dict:
+    t = f"bench_event_{name}"
+    await conn.execute(f"DROP TABLE IF EXISTS {t}")
+    await conn.execute(f"""
+        CREATE TABLE {t} (
+            id uuid PRIMARY KEY, event_type varchar(80) NOT NULL, user_id uuid, session_id varchar(64) NOT NULL,
+            listing_id uuid, properties jsonb NOT NULL, occurred_at timestamptz NOT NULL
+        )""")
+    for ddl in STRATEGIES[name]:
+        await conn.execute(ddl.format(t=t))
+
+    t0 = time.perf_counter()
+    for i in range(0, len(rows), batch):
+        await conn.copy_records_to_table(t, records=rows[i:i + batch], columns=_COLUMNS)
+    write_s = time.perf_counter() - t0
+    await conn.execute(f"ANALYZE {t}")
+
+    index_bytes = await conn.fetchval(f"SELECT pg_indexes_size('{t}')")
+    timings = {}
+    for q, sql in QUERIES.items():
+        runs = []
+        for _ in range(repeat):
+            plan = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql.format(t=t)}", *window)
+            runs.append(orjson.loads(plan)[0]["Execution Time"])
+        timings[q] = statistics.median(runs)
+
+    if not keep:
+        await conn.execute(f"DROP TABLE {t}")
+    return {"rows_per_s": len(rows) / write_s, "index_mb": index_bytes / 1_048_576, "query_ms": timings}
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=1_000, help="filas por COPY (como el ingest de telemetría)")
+    ap.add_argument("--days", type=int, default=90, help="historia sintética")
+    ap.add_argument("--window-days", type=int, default=7, help="rango consultado (al final de la historia)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--keep", action="store_true", help="no borrar las tablas scratch")
+    args = ap.parse_args()
+
+    dsn = os.environ["DATABASE_URL"].replace("+asyncpg", "")
+    rows = _synthetic_rows(args.rows, args.days)
+    end = rows[-1][-1] + timedelta(seconds=1)
+    window = (end - timedelta(days=args.window_days), end)
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        results = {
+            name: await _run_strategy(conn, name, rows, batch=args.batch, window=window,
+                                      repeat=args.repeat, keep=args.keep)
+            for name in STRATEGIES
+        }
+    finally:
+        await conn.close()
+
+    names = list(results)
+    print(f"{args.rows} events over {args.days} days, window {args.window_days} days, median of {args.repeat}\n")
+    print(f"{'':<14}" + "".join(f"{n:>14}" for n in names))
+    print(f"{'insert rows/s':<14}" + "".join(f"{results[n]['rows_per_s']:>14,.0f}" for n in names))
+    print(f"{'index MB':<14}" + "".join(f"{results[n]['index_mb']:>14.1f}" for n in names))
+    for q in QUERIES:
+        print(f"{q + ' ms':<14}" + "".join(f"{results[n]['query_ms'][q]:>14.2f}" for n in names))
+
+if __name__ == "__main__":
+    asyncio.run(main())
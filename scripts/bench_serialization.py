@@ -0,0 +1,119 @@
+"""
+Micro-benchmark del camino de respuesta para páginas grandes de listings.
+
+Compara, sobre una app FastAPI mínima con los mismos datos sintéticos (objetos tipo ORM con fotos):
+- "pydantic": el camino anterior — Page[ListingOut] con model_validate por ítem, re-validación contra
+  response_model y JSONResponse (json estándar);
+- "orjson":   el camino actual de GET /v1/listings — listing_payload() + FastJSONResponse directa.
+Reporta CPU por request (process_time) y tamaño de la respuesta; no necesita DB ni Redis.
+
+Uso:
+    python scripts/bench_serialization.py --page-size 200 --requests 300
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.schemas.common import Page  # noqa: E402
+from app.schemas.listing import ListingOut, listing_payload  # noqa: E402
+
+def _fake_listings(n: int, photos: int, seed: int = 7) -> list[SimpleNamespace]:
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    out = []
+    for _ in range(n):
+        lid = str(uuid.UUID(int=rnd.getrandbits(128)))
+        created = now - timedelta(seconds=rnd.randrange(86_400 * 90))
+        out.append(SimpleNamespace(
+            id=lid, seller_id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            title=f"Listing {rnd.randrange(10**6)}", description="Lorem ipsum dolor sit amet " * 4,
+            category_id=str(uuid.UUID(int=rnd.getrandbits(128))), brand_id=None,
+            price_cents=rnd.randrange(1_000, 5_000_000), currency="COP", condition="used", quantity=1,
+            is_active=True, latitude=4.6 + rnd.random() / 10, longitude=-74.06 + rnd.random() / 10,
+            price_suggestion_used=False, quick_view_enabled=True, created_at=created, updated_at=created,
+            photos=[SimpleNamespace(
+                id=str(uuid.UUID(int=rnd.getrandbits(128))), listing_id=lid,
+                storage_key=f"listings/{lid}/{i}.jpg", image_url=None, width=1080, height=1440, created_at=created,
+            ) for i in range(photos)],
+        ))
+    return out
+
+def _app(items: list[SimpleNamespace]) -> FastAPI:
+    app = FastAPI()
+    meta = {"total": None, "total_approx": False, "page": 1, "page_size": len(items), "has_next": True, "next_cursor": "x"}
+
+    @app.get("/pydantic", response_model=Page[ListingOut], response_class=JSONResponse)
+    async def pydantic_path():
+        return Page[ListingOut](items=[ListingOut.model_validate(i) for i in items], **meta)
+
+    @app.get("/orjson", response_model=Page[ListingOut])
+    async def orjson_path():
+        return FastJSONResponse({"items": [listing_payload(i) for i in items], **meta})
+
+    return app
+
+async def _get(app: FastAPI, path: str) -> bytes:
+    """GET directo a la app ASGI (sin servidor ni cliente HTTP de por medio)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status, body = 0, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"{path}: HTTP {status}")
+    return b"".join(body)
+
+async def _measure(app: FastAPI, path: str, n: int) -> tuple[list[float], int]:
+    size = len(await _get(app, path))  # warm-up
+    cpu = []
+    for _ in range(n):
+        t0 = time.process_time()
+        await _get(app, path)
+        cpu.append((time.process_time() - t0) * 1000)
+    return cpu, size
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--page-size", type=int, default=200)
+    ap.add_argument("--photos", type=int, default=3, help="fotos por listing")
+    ap.add_argument("--requests", type=int, default=200)
+    args = ap.parse_args()
+
+    app = _app(_fake_listings(args.page_size, args.photos))
+    results = {p: await _measure(app, f"/{p}", args.requests) for p in ("pydantic", "orjson")}
+
+    print(f"page_size={args.page_size} photos={args.photos} requests={args.requests}\n")
+    print(f"{'path':<10}{'cpu ms p50':>12}{'cpu ms p95':>12}{'bytes':>10}")
+    for p, (cpu, size) in results.items():
+        p95 = statistics.quantiles(cpu, n=20)[-1]
+        print(f"{p:<10}{statistics.median(cpu):>12.2f}{p95:>12.2f}{size:>10}")
+    base, fast = (statistics.median(results[p][0]) for p in ("pydantic", "orjson"))
+    print(f"\nCPU saved per request: {base - fast:.2f} ms ({(1 - fast / base) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    asyncio.run(main())